@@ -0,0 +1,189 @@
+"""
+Compressed bitmaps over integer ids, roaring-style.
+
+Ids are split by their high bits into chunks of CHUNK_SIZE (65536). Each
+chunk holds the low 16 bits of its members in the smaller of two
+containers: a sorted array of uint16 (2 bytes per member, up to
+ARRAY_MAX members) or a fixed 8 KB bitmap. Sparse sets cost about two
+bytes per id, dense ones an eighth of a byte, and a membership test is
+a dict lookup plus a bisect or a bit test.
+
+Chunks serialize independently (chunk_to_bytes / chunk_from_bytes), so
+a store can keep one row per id range and load only the ranges a query
+touches.
+"""
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, Union
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+LOW_MASK = CHUNK_SIZE - 1
+# an array container past this size is larger than the bitmap container
+ARRAY_MAX = 4096
+BITMAP_BYTES = CHUNK_SIZE // 8
+
+_ARRAY, _BITMAP = b"A", b"B"
+
+Container = Union[array, bytearray]
+
+
+def chunk_of(value: int) -> int:
+    return value >> CHUNK_BITS
+
+
+def _to_bitmap(values: array) -> bytearray:
+    bits = bytearray(BITMAP_BYTES)
+    for low in values:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bits
+
+
+def _bitmap_members(bits: bytearray) -> Iterator[int]:
+    for index, byte in enumerate(bits):
+        while byte:
+            lowest = byte & -byte
+            yield (index << 3) | (lowest.bit_length() - 1)
+            byte ^= lowest
+
+
+def _cardinality(container: Container) -> int:
+    if isinstance(container, array):
+        return len(container)
+    return int.from_bytes(container, "little").bit_count()
+
+
+def chunk_to_bytes(container: Container) -> bytes:
+    if isinstance(container, bytearray):
+        return _BITMAP + bytes(container)
+    data = array("H", container)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return _ARRAY + data.tobytes()
+
+
+def chunk_from_bytes(data: bytes) -> Container:
+    kind, payload = data[:1], data[1:]
+    if kind == _BITMAP:
+        if len(payload) != BITMAP_BYTES:
+            raise ValueError("corrupt bitmap container")
+        return bytearray(payload)
+    if kind != _ARRAY or len(payload) % 2:
+        raise ValueError("corrupt array container")
+    values = array("H")
+    values.frombytes(payload)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class IdBitmap:
+    """A set of non-negative ints, stored as chunked containers."""
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.chunks: Dict[int, Container] = {}
+        self._len = 0
+        self.update(values)
+
+    # ----------------------------
+    # Set API
+    # ----------------------------
+    def __contains__(self, value: int) -> bool:
+        container = self.chunks.get(value >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = value & LOW_MASK
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self.chunks):
+            base = key << CHUNK_BITS
+            container = self.chunks[key]
+            lows = _bitmap_members(container) if isinstance(container, bytearray) else container
+            for low in lows:
+                yield base | low
+
+    def add(self, value: int) -> bool:
+        """Add one id; False if it was already present."""
+        if value < 0:
+            raise ValueError("ids must be non-negative")
+        key, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self.chunks.get(key)
+        if container is None:
+            self.chunks[key] = array("H", [low])
+        elif isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return False
+            container.insert(index, low)
+            if len(container) > ARRAY_MAX:
+                self.chunks[key] = _to_bitmap(container)
+        self._len += 1
+        return True
+
+    def update(self, values: Iterable[int]) -> int:
+        """Add many ids (merged chunk by chunk); returns how many were new."""
+        before = self._len
+        for key, group in groupby(sorted(values), key=lambda v: v >> CHUNK_BITS):
+            if key < 0:
+                raise ValueError("ids must be non-negative")
+            lows = [v & LOW_MASK for v in group]
+            container = self.chunks.get(key)
+            old = _cardinality(container) if container is not None else 0
+            if isinstance(container, bytearray):
+                for low in lows:
+                    container[low >> 3] |= 1 << (low & 7)
+                merged: Container = container
+            else:
+                merged = array("H", sorted(set(lows).union(container or ())))
+                if len(merged) > ARRAY_MAX:
+                    merged = _to_bitmap(merged)
+            self._len += _cardinality(merged) - old
+            self.chunks[key] = merged
+        return self._len - before
+
+    def discard(self, value: int):
+        if value not in self:
+            return
+        key, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self.chunks[key]
+        if isinstance(container, bytearray):
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            if _cardinality(container) <= ARRAY_MAX:
+                self.chunks[key] = array("H", _bitmap_members(container))
+        else:
+            del container[bisect_left(container, low)]
+            if not container:
+                del self.chunks[key]
+        self._len -= 1
+
+    # ----------------------------
+    # Chunk access (for stores)
+    # ----------------------------
+    def set_chunk(self, key: int, container: Container):
+        old = self.chunks.get(key)
+        self._len += _cardinality(container) - (_cardinality(old) if old is not None else 0)
+        self.chunks[key] = container
+
+    def chunk_bytes(self, key: int) -> bytes:
+        return chunk_to_bytes(self.chunks[key])
+
+    def chunk_cardinality(self, key: int) -> int:
+        return _cardinality(self.chunks[key])
+
+    def size_in_bytes(self) -> int:
+        """Serialized size: what a store keeps for these ids."""
+        return sum(1 + (BITMAP_BYTES if isinstance(c, bytearray) else 2 * len(c)) for c in self.chunks.values())
@@ -0,0 +1,67 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger("insightvault.requests")
+
+
+class QueryStats:
+    """DB execute wrapper counting queries and time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Times each request and counts its DB queries (without DEBUG), feeding
+    the core.metrics request histograms and logging one structured record
+    per request on "insightvault.requests": DEBUG normally, WARNING for
+    requests slower than SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or "unmatched"
+        metrics.REQUEST_SECONDS.observe(elapsed, view=view, method=request.method)
+        metrics.REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        metrics.REQUEST_DB_QUERIES.observe(stats.count, view=view)
+        metrics.REQUEST_DB_SECONDS.observe(stats.seconds, view=view)
+
+        slow = elapsed * 1000 >= getattr(settings, "SLOW_REQUEST_MS", 1000)
+        logger.log(
+            logging.WARNING if slow else logging.DEBUG,
+            "%s %s -> %s in %.1f ms (%d queries, %.1f ms db)",
+            request.method, request.path, response.status_code, elapsed * 1000, stats.count, stats.seconds * 1000,
+            extra={
+                "event": "request", "view": view, "method": request.method, "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 2), "db_queries": stats.count,
+                "db_ms": round(stats.seconds * 1000, 2), "slow": slow,
+            },
+        )
+        return response
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import markdown2
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import metrics
+from .utils import format_note_content
+
+
+class FormatNoteContentTests(TestCase):
+    def setUp(self):
+        caches["markdown"].clear()
+
+    def test_rendered_html_is_cached_by_content(self):
+        """Unchanged content is parsed once; edited content is parsed again."""
+        with mock.patch("core.utils.markdown2.markdown", wraps=markdown2.markdown) as md:
+            first = format_note_content("**hello**")
+            second = format_note_content("**hello**")
+            format_note_content("**hello** again")
+
+        self.assertEqual(first, second)
+        self.assertIn("<strong>hello</strong>", first)
+        self.assertEqual(md.call_count, 2)
+
+    def test_raw_html_is_escaped(self):
+        """safe_mode still applies to cached output."""
+        html = format_note_content("<script>alert(1)</script>")
+        self.assertNotIn("<script>", html)
+        self.assertEqual(html, format_note_content("<script>alert(1)</script>"))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.clear()
+
+    def test_histogram_exposition(self):
+        """Buckets are cumulative and end with +Inf, sum and count."""
+        hist = metrics.Histogram("test_latency_seconds", "Test.", ["view"], buckets=(0.1, 1), register=False)
+        for value in (0.05, 0.5, 5):
+            hist.observe(value, view='a"b')
+        text = hist.render()
+        self.assertIn('test_latency_seconds_bucket{view="a\\"b",le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{view="a\\"b",le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{view="a\\"b",le="+Inf"} 3', text)
+        self.assertIn('test_latency_seconds_count{view="a\\"b"} 3', text)
+        with self.assertRaises(ValueError):
+            hist.observe(1, other="x")
+
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_middleware_records_views_and_db_queries(self):
+        self.client.get(reverse("feeds:feed_list"))
+        self.assertEqual(metrics.REQUEST_SECONDS.count(view="feeds:feed_list", method="GET"), 1)
+        self.assertEqual(metrics.REQUESTS.value(view="feeds:feed_list", method="GET", status=200), 1)
+        self.assertGreater(metrics.REQUEST_DB_QUERIES.total(view="feeds:feed_list"), 0)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{view="feeds:feed_list",method="GET",status="200"} 1',
+                      response.content.decode())
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+
+class IdBitmapTests(TestCase):
+    def test_matches_a_set_across_container_kinds(self):
+        """Sparse chunks stay arrays, dense ones switch to bitmaps (and back); both round-trip."""
+        from .bitmap import ARRAY_MAX, IdBitmap, chunk_from_bytes
+
+        dense = range(70_000, 70_000 + ARRAY_MAX + 10)
+        sparse = [3, 17, 65_535, 200_000]
+        bitmap = IdBitmap(sparse)
+        self.assertEqual(bitmap.update(dense), len(dense))
+        self.assertFalse(bitmap.add(3))
+        self.assertEqual(len(bitmap), len(dense) + len(sparse))
+        self.assertIsInstance(bitmap.chunks[1], bytearray)
+        self.assertEqual(list(bitmap), sorted([*sparse, *dense]))
+        self.assertNotIn(69_999, bitmap)
+
+        for key in bitmap.chunks:
+            self.assertEqual(chunk_from_bytes(bitmap.chunk_bytes(key)), bitmap.chunks[key])
+        for value in range(70_000, 70_020):
+            bitmap.discard(value)
+        self.assertNotIsInstance(bitmap.chunks[1], bytearray)
+        self.assertEqual(len(bitmap), len(dense) - 20 + len(sparse))
+        self.assertLess(bitmap.size_in_bytes(), 2 * len(bitmap) + 16)
@@ -1,23 +1,55 @@
+import hashlib
+
 import markdown2
+from django.conf import settings
+from django.core.cache import caches
 from django.utils.safestring import mark_safe
 
+# Enable safe_mode to strip raw HTML (prevents XSS)
+MARKDOWN_EXTRAS = [
+    "fenced-code-blocks",   # ``` code ```
+    "tables",               # Markdown tables
+    "strike",               # ~~strikethrough~~
+    "underline",            # __underline__
+    "cuddled-lists",        # compact lists
+    "footnotes",            # footnotes support
+]
+
+# bump when the rendering below changes so stale cached HTML is ignored
+RENDER_VERSION = 1
+
+
+def _render_cache():
+    alias = "markdown" if "markdown" in settings.CACHES else "default"
+    return caches[alias]
+
+
+def _render_cache_key(content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"note-html:v{RENDER_VERSION}:{digest}"
+
+
+def render_markdown(content: str) -> str:
+    html = markdown2.markdown(content, extras=MARKDOWN_EXTRAS, safe_mode="escape")
+
+    # Optional: wrap output in Tailwind-friendly typography
+    return f"<div class='prose prose-indigo max-w-none'>{html}</div>"
+
+
 def format_note_content(content: str) -> str:
-    """Convert markdown-like note content into safe HTML."""
+    """
+    Convert markdown-like note content into safe HTML.
+    Results are cached by content hash, so unchanged notes are never
+    re-parsed and an edit naturally misses the cache.
+    """
     if not content:
         return ""
 
-    # Enable safe_mode to strip raw HTML (prevents XSS)
-    extras = [
-        "fenced-code-blocks",   # ``` code ```
-        "tables",               # Markdown tables
-        "strike",               # ~~strikethrough~~
-        "underline",            # __underline__
-        "cuddled-lists",        # compact lists
-        "footnotes",            # footnotes support
-    ]
-    html = markdown2.markdown(content, extras=extras, safe_mode="escape")
-
-    # Optional: wrap output in Tailwind-friendly typography
-    html = f"<div class='prose prose-indigo max-w-none'>{html}</div>"
+    cache = _render_cache()
+    key = _render_cache_key(content)
+    html = cache.get(key)
+    if html is None:
+        html = render_markdown(content)
+        cache.set(key, html, None)
 
     return mark_safe(html)
@@ -1,3 +1,15 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 
-# Create your views here.
+from . import metrics as metrics_registry
+
+
+def metrics(request):
+    """
+    Prometheus text exposition of core.metrics. Open to staff users and
+    to the addresses in METRICS_ALLOWED_IPS (the scraper).
+    """
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+    if request.META.get("REMOTE_ADDR") not in allowed and not request.user.is_staff:
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class FeedsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'feeds'
+
+    def ready(self):
+        # invalidate cached feed pages, queue thumbnails and fan new items
+        # out to subscribers' timelines on item / source writes
+        from . import page_cache, thumbnails, timeline  # noqa: F401
@@ -0,0 +1,196 @@
+"""
+Benchmarks for the fetcher hot path: XML parsing, entry normalization
+and media extraction, run over the checked-in corpus (see corpus.py).
+Driven by `manage.py bench_fetchers`.
+"""
+import io
+import json
+import os
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import feedparser
+import requests
+
+from feeds.fetchers import parse_pool
+from feeds.fetchers.rss import RSSFetcher, _element_to_entry
+from feeds.models import FeedSource
+
+from . import reference
+
+BENCH_ENDPOINT = "https://bench.example.com/feed.xml"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+STAGES = ("fetch", "fetch-stream", "normalize", "media", "media-reference")
+
+
+@dataclass
+class BenchResult:
+    corpus: str
+    stage: str
+    entries: int
+    seconds: float       # best of `repeat` runs
+    peak_bytes: int      # tracemalloc peak during one run
+
+    @property
+    def key(self) -> str:
+        return f"{self.corpus}:{self.stage}"
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.seconds if self.seconds else 0.0
+
+
+def in_memory_response(body: bytes) -> requests.Response:
+    """A streamed requests.Response over `body`, so fetch() runs unchanged."""
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = BENCH_ENDPOINT
+    resp.raw = io.BytesIO(body)
+    return resp
+
+
+def make_fetcher(body: bytes, stream: bool = False) -> RSSFetcher:
+    source = FeedSource(slug="bench", endpoint=BENCH_ENDPOINT, config={"stream": stream, "max_bytes": 0})
+    fetcher = RSSFetcher(source)
+    fetcher.http_get = lambda *args, **kwargs: in_memory_response(body)
+    return fetcher
+
+
+def parsed_entries(body: bytes, stream: bool = False) -> List:
+    """Raw entries as each parse path hands them to _normalize_entry."""
+    if not stream:
+        return list(feedparser.parse(body).entries)
+    import xml.etree.ElementTree as ET
+    root = ET.fromstring(body)
+    return [_element_to_entry(el) for el in root.iter() if el.tag.rsplit("}", 1)[-1] in ("item", "entry")]
+
+
+def _content_of(entry) -> str:
+    content = ""
+    if entry.get("content"):
+        content = entry["content"][0].get("value", "") or ""
+    return content or entry.get("summary", "") or ""
+
+
+def _stage_runner(stage: str, body: bytes) -> Callable[[], int]:
+    """A zero-arg callable doing one pass of `stage`; returns entries handled."""
+    if stage == "fetch":
+        return lambda: len(make_fetcher(body).fetch())
+    if stage == "fetch-stream":
+        return lambda: len(make_fetcher(body, stream=True).fetch())
+
+    fetcher = make_fetcher(body)
+    entries = parsed_entries(body)
+    if stage == "normalize":
+        return lambda: len([fetcher._normalize_entry(e) for e in entries])
+
+    inputs = [(e, _content_of(e)) for e in entries]
+    if stage == "media":
+        return lambda: len([fetcher._extract_media(e, BENCH_ENDPOINT, c) for e, c in inputs])
+    if stage == "media-reference":
+        return lambda: len([reference.extract_media(e, BENCH_ENDPOINT, c) for e, c in inputs])
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def measure(name: str, stage: str, body: bytes, repeat: int = 5) -> BenchResult:
+    run = _stage_runner(stage, body)
+    entries = run()  # warm-up
+
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+
+    # allocations are traced in a separate pass; tracing slows the timings
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchResult(name, stage, entries, best, peak)
+
+
+def run_benchmarks(corpus: Dict[str, bytes], stages: Sequence[str] = STAGES, repeat: int = 5) -> List[BenchResult]:
+    return [measure(name, stage, body, repeat) for name, body in corpus.items() for stage in stages]
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_baseline(results: Sequence[BenchResult], path: Path = BASELINE_PATH):
+    data = {r.key: round(r.entries_per_second, 1) for r in results if r.stage != "media-reference"}
+    path.write_text(json.dumps(dict(sorted(data.items())), indent=2) + "\n")
+
+
+def regressions(results: Sequence[BenchResult], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Results whose throughput fell more than `tolerance` (fraction) below
+    the baseline. Keys missing from the baseline are not gated.
+    """
+    failures = []
+    for r in results:
+        expected: Optional[float] = baseline.get(r.key)
+        if expected and r.entries_per_second < expected * (1 - tolerance):
+            failures.append(
+                f"{r.key}: {r.entries_per_second:,.0f} entries/s < {expected:,.0f} baseline (-{tolerance:.0%} allowed)"
+            )
+    return failures
+
+
+# ----------------------------
+# Parse throughput vs. worker count (bench_fetchers --scaling)
+# ----------------------------
+@dataclass
+class ScalingResult:
+    kind: str            # "process" (parse_pool) or "thread"
+    workers: int
+    entries: int
+    seconds: float
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.seconds if self.seconds else 0.0
+
+
+def _parse_entries(body: bytes) -> int:
+    source = parse_pool.ParseSource(endpoint=BENCH_ENDPOINT, config={"max_bytes": 0})
+    rows, *_ = parse_pool.parse_job(source, set(), 0, body)
+    return len(rows)
+
+
+def default_worker_counts() -> List[int]:
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    return counts if counts[-1] == cores else counts + [cores]
+
+
+def parse_scaling(bodies: Sequence[bytes], workers: Sequence[int],
+                  kinds: Sequence[str] = ("thread", "process")) -> List[ScalingResult]:
+    """
+    Parse every body once on pools of each size. Threads show the GIL
+    ceiling; processes should scale with cores until memory bandwidth or
+    pickling the results gets in the way.
+    """
+    results = []
+    for kind in kinds:
+        for count in workers:
+            pool = parse_pool.build_pool(count) if kind == "process" else ThreadPoolExecutor(count)
+            with pool:
+                # start every worker (and import Django there) before timing
+                list(pool.map(_parse_entries, bodies[:1] * count))
+                started = time.perf_counter()
+                entries = sum(pool.map(_parse_entries, bodies))
+                results.append(ScalingResult(kind, count, entries, time.perf_counter() - started))
+    return results
@@ -0,0 +1,169 @@
+"""
+Deterministic generator for the fetcher benchmark corpus.
+
+The files in corpus/ are checked in so numbers stay comparable across
+runs; regenerate them with `manage.py bench_fetchers --write-corpus`.
+Each shape mimics a common real-world feed: a news site with
+content:encoded HTML and media:content, a podcast with audio enclosures,
+a YouTube channel (Atom + media:group) and a blog whose only media is
+inline <img> / <iframe> markup. synthetic_large is a long RSS feed
+mixing the news and podcast item shapes.
+"""
+import gzip
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+WORDS = (
+    "market city council budget transit energy school court health storm data river policy "
+    "election housing water study report plan vote research league season police museum "
+    "festival airport bridge company workers union price climate coast farm vaccine"
+).split()
+
+START = datetime(2025, 10, 6, 12, 0, tzinfo=timezone.utc)
+
+
+def _sentence(rng, n=14):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _paragraphs(rng, count):
+    return "".join(f"<p>{_sentence(rng, rng.randint(12, 30))}</p>" for _ in range(count))
+
+
+def _rfc822(dt):
+    return dt.strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+
+def _rss(title, items, extra_ns=""):
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/"'
+        f'{extra_ns}>\n<channel><title>{title}</title><link>https://example.com/</link>'
+        f'<description>{title}</description>\n' + "\n".join(items) + "\n</channel></rss>\n"
+    )
+
+
+def _atom(title, entries, extra_ns=""):
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/"'
+        f'{extra_ns}>\n<title>{title}</title><id>urn:bench:{title}</id>'
+        f'<updated>{START.isoformat()}</updated>\n' + "\n".join(entries) + "\n</feed>\n"
+    )
+
+
+def news_item(rng, i):
+    when = START - timedelta(minutes=17 * i)
+    slug = f"story-{i}"
+    body = _paragraphs(rng, rng.randint(6, 14))
+    if rng.random() < 0.6:
+        body = f'<figure><img class="lead" src="/img/{slug}.jpg" alt="x"/></figure>' + body
+    media = (
+        f'<media:content url="https://cdn.example.com/{slug}.jpg" type="image/jpeg" medium="image"/>'
+        if rng.random() < 0.7 else ""
+    )
+    return (
+        f"<item><title>{escape(_sentence(rng, 8))}</title>"
+        f"<link>https://news.example.com/{slug}</link>"
+        f'<guid isPermaLink="false">news-{i}</guid>'
+        f"<pubDate>{_rfc822(when)}</pubDate><dc:creator>Reporter {i % 17}</dc:creator>"
+        f"<category>{rng.choice(WORDS)}</category>"
+        f"<description>{escape(_sentence(rng, 30))}</description>"
+        f"<content:encoded><![CDATA[{body}]]></content:encoded>{media}</item>"
+    )
+
+
+def podcast_item(rng, i):
+    when = START - timedelta(days=i)
+    return (
+        f"<item><title>Episode {1000 - i}: {escape(_sentence(rng, 6))}</title>"
+        f"<link>https://pod.example.com/e/{i}</link><guid>pod-{i}</guid>"
+        f"<pubDate>{_rfc822(when)}</pubDate>"
+        f"<description>{escape(_paragraphs(rng, rng.randint(3, 8)))}</description>"
+        f'<enclosure url="https://media.example.com/ep{i}.mp3" length="{rng.randint(10**7, 9 * 10**7)}" '
+        f'type="audio/mpeg"/><itunes:duration>{rng.randint(900, 5400)}</itunes:duration>'
+        f'<itunes:image href="https://pod.example.com/art/{i}.jpg"/></item>'
+    )
+
+
+def youtube_entry(rng, i):
+    vid = "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-") for _ in range(11))
+    when = START - timedelta(hours=9 * i)
+    return (
+        f"<entry><id>yt:video:{vid}</id><yt:videoId>{vid}</yt:videoId>"
+        f"<title>{escape(_sentence(rng, 7))}</title>"
+        f'<link rel="alternate" href="https://www.youtube.com/watch?v={vid}"/>'
+        f"<author><name>Channel {i % 5}</name></author>"
+        f"<published>{when.isoformat()}</published><updated>{when.isoformat()}</updated>"
+        f"<media:group><media:title>{escape(_sentence(rng, 7))}</media:title>"
+        f'<media:content url="https://www.youtube.com/v/{vid}?version=3" type="application/x-shockwave-flash"/>'
+        f'<media:thumbnail url="https://i.ytimg.com/vi/{vid}/hqdefault.jpg" width="480" height="360"/>'
+        f"<media:description>{escape(_sentence(rng, 40))}</media:description></media:group></entry>"
+    )
+
+
+def blog_entry(rng, i):
+    when = START - timedelta(hours=30 * i)
+    body = _paragraphs(rng, rng.randint(8, 20))
+    roll = rng.random()
+    if roll < 0.3:
+        body += '<iframe width="560" height="315" src="https://www.youtube.com/embed/dQw4w9WgXc{}"></iframe>'.format(i % 10)
+    elif roll < 0.7:
+        body = body.replace("</p>", f'<img src="https://blog.example.com/p/{i}.png" alt=""/></p>', 1)
+    return (
+        f"<entry><id>tag:blog.example.com,2025:{i}</id><title>{escape(_sentence(rng, 9))}</title>"
+        f'<link rel="alternate" href="https://blog.example.com/posts/{i}"/>'
+        f"<author><name>Author {i % 3}</name></author>"
+        f"<updated>{when.isoformat()}</updated>"
+        f"<summary>{escape(_sentence(rng, 25))}</summary>"
+        f'<content type="html">{escape(body)}</content></entry>'
+    )
+
+
+SHAPES = {
+    "news_rss.xml": (lambda items: _rss("News", items), news_item, 300),
+    "podcast_rss.xml": (lambda items: _rss("Podcast", items, ' xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"'),
+                        podcast_item, 200),
+    "youtube_atom.xml": (lambda entries: _atom("Channel", entries, ' xmlns:yt="http://www.youtube.com/xml/schemas/2015"'),
+                         youtube_entry, 100),
+    "blog_atom.xml": (lambda entries: _atom("Blog", entries), blog_entry, 150),
+}
+
+
+def build_feed(name, count=None, seed=1) -> bytes:
+    wrap, make, default = SHAPES[name]
+    rng = random.Random(f"{name}:{seed}")
+    return wrap([make(rng, i) for i in range(count or default)]).encode("utf-8")
+
+
+def build_synthetic_large(count=5000, seed=1) -> bytes:
+    """One RSS feed with `count` alternating news / podcast items."""
+    rng = random.Random(seed)
+    makers = [news_item, podcast_item]
+    items = [makers[i % 2](rng, i) for i in range(count)]
+    return _rss("Synthetic", items, ' xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"').encode("utf-8")
+
+
+def write_corpus(directory: Path = CORPUS_DIR):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in SHAPES:
+        (directory / name).write_bytes(build_feed(name))
+    # gzip + mtime=0 keeps the checked-in file byte-for-byte reproducible
+    with open(directory / "synthetic_large_rss.xml.gz", "wb") as fh:
+        fh.write(gzip.compress(build_synthetic_large(), mtime=0))
+
+
+def load_corpus(directory: Path = CORPUS_DIR):
+    """{file name: feed bytes} for every checked-in corpus file."""
+    corpus = {}
+    for path in sorted(directory.iterdir()):
+        if path.suffix == ".gz":
+            corpus[path.name[:-3]] = gzip.decompress(path.read_bytes())
+        elif path.suffix == ".xml":
+            corpus[path.name] = path.read_bytes()
+    return corpus
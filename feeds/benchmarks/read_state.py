@@ -0,0 +1,118 @@
+"""
+Memory and latency of per-user read state (feeds/readstate.py over
+core.bitmap) at scale, on synthetic users. Driven by
+`manage.py bench_read_state`.
+
+Each user reads a number of items drawn around `reads`, mostly near the
+head of the id space (people read what's new) and the rest scattered
+over the whole history. Bitmaps are built for `sample` users and the
+totals extrapolated to `users`. Stored sizes count CHUNK_ROW_BYTES of
+row overhead per chunk; the naive (user, item) join table is estimated
+at JOIN_ROW_BYTES per row for comparison.
+"""
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from core.bitmap import IdBitmap, chunk_from_bytes, chunk_of, chunk_to_bytes
+
+# bigint user + bigint item + row header, plus a (user, item) index entry
+JOIN_ROW_BYTES = 60
+# the same for a ReadChunk row, besides its data
+CHUNK_ROW_BYTES = 80
+# share of a user's reads within the newest 1% of items
+HEAD_SHARE = 0.8
+
+
+@dataclass
+class ReadStateBench:
+    users: int
+    items: int
+    sample: int
+    reads_per_user: float        # mean over the sample
+    stored_bytes_per_user: float   # ReadChunk rows: data + CHUNK_ROW_BYTES each
+    memory_bytes_per_user: float   # Python objects, tracemalloc
+    chunks_per_user: float
+    build_us: float              # IdBitmap from a user's ids
+    load_us: float               # deserialize the chunks a page touches
+    page_check_us: float         # unread filter over one page, in memory
+    mark_read_us: float          # add one id + re-serialize its chunk
+
+    @property
+    def stored_total(self) -> float:
+        return self.stored_bytes_per_user * self.users
+
+    @property
+    def join_total(self) -> float:
+        return self.reads_per_user * JOIN_ROW_BYTES * self.users
+
+
+def synthetic_reads(rng: random.Random, items: int, reads: int):
+    head = max(1, items // 100)
+    ids = set()
+    while len(ids) < min(reads, items):
+        if rng.random() < HEAD_SHARE:
+            ids.add(items - 1 - min(int(rng.expovariate(3 / head)), items - 1))
+        else:
+            ids.add(rng.randrange(items))
+    return ids
+
+
+def _best_us(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6
+
+
+def run(users: int = 100_000, items: int = 10_000_000, reads: int = 500, sample: int = 200,
+        page: int = 50, repeat: int = 5, seed: int = 1) -> ReadStateBench:
+    rng = random.Random(seed)
+    id_sets = [synthetic_reads(rng, items, max(1, int(rng.expovariate(1 / reads)))) for _ in range(sample)]
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    bitmaps = [IdBitmap(ids) for ids in id_sets]
+    build = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the newest page of the feed, what an unread list checks first
+    candidates = list(range(items - 1, max(-1, items - 1 - page), -1))
+    page_chunks = {chunk_of(pk) for pk in candidates}
+    stored = [{key: chunk_to_bytes(b.chunks[key]) for key in page_chunks if key in b.chunks} for b in bitmaps]
+
+    def load():
+        for chunks in stored:
+            loaded = IdBitmap()
+            for key, data in chunks.items():
+                loaded.set_chunk(key, chunk_from_bytes(data))
+
+    def check():
+        for bitmap in bitmaps:
+            [pk for pk in candidates if pk not in bitmap]
+
+    targets = [rng.randrange(items) for _ in bitmaps]
+
+    def mark():
+        for bitmap, pk in zip(bitmaps, targets):
+            bitmap.add(pk)
+            chunk_to_bytes(bitmap.chunks[chunk_of(pk)])
+
+    return ReadStateBench(
+        users=users,
+        items=items,
+        sample=sample,
+        reads_per_user=sum(map(len, bitmaps)) / sample,
+        stored_bytes_per_user=sum(b.size_in_bytes() + CHUNK_ROW_BYTES * len(b.chunks) for b in bitmaps) / sample,
+        memory_bytes_per_user=memory / sample,
+        chunks_per_user=sum(len(b.chunks) for b in bitmaps) / sample,
+        build_us=build * 1e6 / sample,
+        load_us=_best_us(load, repeat) / sample,
+        page_check_us=_best_us(check, repeat) / sample,
+        # first run only: later runs would re-add the same ids
+        mark_read_us=_best_us(mark, 1) / sample,
+    )
@@ -0,0 +1,149 @@
+"""
+Adaptive fetch intervals, learned from each source's publishing cadence.
+
+Sources without a fixed fetch_interval_seconds are fetched on a schedule
+estimated from their own history: the posting rate over the last
+FEEDS_ADAPTIVE_WINDOW_DAYS (published_at of up to FEEDS_ADAPTIVE_HISTORY
+items) and how those posts spread over the hours of the day (UTC). The
+next fetch is due when FEEDS_ADAPTIVE_TARGET_ITEMS new items are
+expected, walking the hourly profile forward, so a source that posts
+during office hours isn't polled all night and is polled soon after its
+busy hour starts.
+
+Fetches that find nothing (304, or no new items) stretch the interval by
+FEEDS_ADAPTIVE_IDLE_FACTOR each until something new turns up. Intervals
+are clamped to FEEDS_ADAPTIVE_MIN_INTERVAL..FEEDS_ADAPTIVE_MAX_INTERVAL
+and stored on the source (next_fetch_at, cadence) with a one-line
+reason; `manage.py show_feed_schedule` lists them.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import FeedItem, FeedSource
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+@dataclass
+class Cadence:
+    interval: float                  # seconds until the next fetch
+    reason: str
+    rate_per_day: Optional[float] = None
+    profile: List[float] = field(default_factory=list)  # share of posts per UTC hour
+
+    def as_dict(self) -> Dict:
+        return {
+            "interval": round(self.interval),
+            "reason": self.reason,
+            "rate_per_day": None if self.rate_per_day is None else round(self.rate_per_day, 2),
+        }
+
+
+def enabled() -> bool:
+    return getattr(settings, "FEEDS_ADAPTIVE_SCHEDULING", True)
+
+
+def default_interval() -> float:
+    return float(getattr(settings, "FEEDS_DEFAULT_FETCH_INTERVAL", 900))
+
+
+def bounds() -> Tuple[float, float]:
+    low = float(getattr(settings, "FEEDS_ADAPTIVE_MIN_INTERVAL", 5 * 60))
+    return low, max(low, float(getattr(settings, "FEEDS_ADAPTIVE_MAX_INTERVAL", DAY)))
+
+
+def history(source: FeedSource, now: datetime) -> List[datetime]:
+    """published_at of the source's latest items in the window, newest first."""
+    since = now - timezone.timedelta(days=getattr(settings, "FEEDS_ADAPTIVE_WINDOW_DAYS", 30))
+    return list(
+        FeedItem.objects.filter(source=source, is_active=True, published_at__gte=since, published_at__lte=now)
+        .order_by("-published_at")
+        .values_list("published_at", flat=True)[:getattr(settings, "FEEDS_ADAPTIVE_HISTORY", 200)]
+    )
+
+
+def hourly_profile(times: Sequence[datetime], smoothing: float = 1.0) -> List[float]:
+    """Share of posts per UTC hour; smoothed so no hour is ruled out entirely."""
+    counts = [smoothing] * 24
+    for published in times:
+        counts[published.astimezone(dt_timezone.utc).hour] += 1
+    total = sum(counts)
+    return [count / total for count in counts]
+
+
+def time_to_expected(now: datetime, rate_per_day: float, profile: Sequence[float],
+                     target: float, limit: float) -> float:
+    """
+    Seconds from `now` until `target` posts are expected, if posts arrive
+    at rate_per_day spread by `profile`. At most `limit`.
+    """
+    t = now.astimezone(dt_timezone.utc)
+    expected = 0.0
+    waited = 0.0
+    while waited < limit:
+        hour_end = t.replace(minute=0, second=0, microsecond=0) + timezone.timedelta(hours=1)
+        span = (hour_end - t).total_seconds()
+        per_second = rate_per_day * profile[t.hour] / HOUR
+        if per_second and expected + per_second * span >= target:
+            return min(waited + (target - expected) / per_second, limit)
+        expected += per_second * span
+        waited += span
+        t = hour_end
+    return limit
+
+
+def estimate(source: FeedSource, now: Optional[datetime] = None) -> Cadence:
+    """The interval until the source's next fetch, and why."""
+    if source.fetch_interval_seconds:
+        return Cadence(float(source.fetch_interval_seconds), "fixed fetch_interval_seconds")
+    if not enabled():
+        return Cadence(default_interval(), "default interval (adaptive scheduling off)")
+
+    now = now or timezone.now()
+    low, high = bounds()
+    times = history(source, now)
+    rate_per_day = None
+    profile: List[float] = []
+    if len(times) < getattr(settings, "FEEDS_ADAPTIVE_MIN_ITEMS", 5):
+        interval = default_interval()
+        reason = f"default interval, {len(times)} dated items to learn from"
+    else:
+        # measured up to now, so a source that has gone quiet slows down
+        span = max((now - times[-1]).total_seconds(), HOUR)
+        rate_per_day = len(times) * DAY / span
+        profile = hourly_profile(times)
+        target = getattr(settings, "FEEDS_ADAPTIVE_TARGET_ITEMS", 0.5)
+        # walk past the max so clamping shows in the reason
+        interval = time_to_expected(now, rate_per_day, profile, target, 2 * high)
+        busiest = max(range(24), key=profile.__getitem__)
+        reason = f"{rate_per_day:.1f} items/day over {span / DAY:.1f} days, busiest {busiest:02d}:00 UTC"
+
+    if source.idle_fetches:
+        factor = getattr(settings, "FEEDS_ADAPTIVE_IDLE_FACTOR", 1.5) ** min(source.idle_fetches, 10)
+        interval *= factor
+        reason += f"; {source.idle_fetches} fetches without new items (x{factor:.1f})"
+    clamped = min(max(interval, low), high)
+    if clamped != interval:
+        reason += f"; clamped to {'min' if clamped == low else 'max'}"
+    return Cadence(clamped, reason, rate_per_day, profile)
+
+
+def record(source: FeedSource, new_items: int, now: Optional[datetime] = None) -> Cadence:
+    """
+    Account for a successful fetch that found `new_items` and store the
+    next fetch time. Failures are left to the scheduler's backoff.
+    """
+    now = now or timezone.now()
+    source.idle_fetches = 0 if new_items else source.idle_fetches + 1
+    cadence = estimate(source, now)
+    source.next_fetch_at = now + timezone.timedelta(seconds=cadence.interval)
+    source.cadence = cadence.as_dict()
+    FeedSource.objects.filter(pk=source.pk).update(
+        idle_fetches=source.idle_fetches, next_fetch_at=source.next_fetch_at, cadence=source.cadence,
+    )
+    return cadence
@@ -0,0 +1,174 @@
+"""
+Near-duplicate detection for syndicated stories.
+
+Each new FeedItem gets a 64-bit SimHash of its text. Copies of the same
+story score within a few bits of each other, so it is split into four
+16-bit bands: two hashes within FEEDS_SIMHASH_MAX_DISTANCE (<= 3) bits
+must agree on at least one band (raising the distance past 3 loses that
+guarantee). Bands of recent cluster representatives
+live in SimhashBand, so finding candidates is one indexed lookup per
+batch regardless of corpus size.
+
+Exact copies are checked first, at any age, by text_hash: sha256 of the
+normalized words of title + text. content_hash can't serve here since
+it covers the URL, which differs on every source. Texts too short to
+simhash get no text_hash either, so short generic titles don't merge.
+"""
+import hashlib
+import re
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import FeedItem, SimhashBand
+
+BANDS = 4
+BAND_BITS = 16
+MIN_TOKENS = 8
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _signed64(value: int) -> int:
+    # BigIntegerField is signed
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word unigrams and bigrams, or None when the text is
+    too short to fingerprint reliably.
+    """
+    words = WORD_RE.findall(text.lower())
+    if len(words) < MIN_TOKENS:
+        return None
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return _signed64(value)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+def band_keys(value: int) -> List[int]:
+    unsigned = value & ((1 << 64) - 1)
+    mask = (1 << BAND_BITS) - 1
+    return [(band << BAND_BITS) | (unsigned >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def item_text(obj: FeedItem) -> str:
+    return f"{obj.title} {strip_tags(obj.summary or obj.content or '')}"
+
+
+def text_hash(text: str) -> Optional[str]:
+    """sha256 of the lowercased words of `text`, or None when it is too short."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < MIN_TOKENS:
+        return None
+    return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+
+
+def assign_duplicates(objs: List[FeedItem]) -> List[Tuple[FeedItem, FeedItem]]:
+    """
+    Compute simhash for unsaved items and point duplicates at an existing
+    representative (duplicate_of). Duplicates of another item in the same
+    batch can't be linked before insert; they are returned as
+    (duplicate, representative) pairs for link_batch_duplicates().
+    """
+    if not getattr(settings, "FEEDS_DEDUPE", True) or not objs:
+        return []
+
+    max_distance = getattr(settings, "FEEDS_SIMHASH_MAX_DISTANCE", 3)
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "FEEDS_DEDUPE_WINDOW_DAYS", 7))
+
+    for obj in objs:
+        text = item_text(obj)
+        obj.simhash = simhash(text)
+        obj.text_hash = text_hash(text)
+
+    # 1) exact text matches on any source, any age; first item wins
+    hashes = {o.text_hash for o in objs if o.text_hash}
+    by_hash: Dict[str, int] = {}
+    if hashes:
+        for hash_, item_id in (
+            FeedItem.objects.filter(text_hash__in=hashes, duplicate_of__isnull=True)
+            .order_by("-id").values_list("text_hash", "id")
+        ):
+            by_hash[hash_] = item_id
+
+    # 2) near-duplicate candidates from the band index, recent only
+    keys = {key for o in objs if o.simhash is not None for key in band_keys(o.simhash)}
+    candidates: Dict[int, List[Tuple[int, int]]] = {}
+    if keys:
+        for key, item_id, value in SimhashBand.objects.filter(key__in=keys, fetched_at__gte=cutoff).values_list(
+            "key", "item_id", "item__simhash",
+        ):
+            candidates.setdefault(key, []).append((item_id, value))
+
+    batch_reps: List[FeedItem] = []
+    pending: List[Tuple[FeedItem, FeedItem]] = []
+    for obj in objs:
+        rep_id = by_hash.get(obj.text_hash) if obj.text_hash else None
+        if rep_id is None and obj.simhash is not None:
+            rep_id = next(
+                (item_id for key in band_keys(obj.simhash) for item_id, value in candidates.get(key, [])
+                 if value is not None and hamming(obj.simhash, value) <= max_distance),
+                None,
+            )
+        if rep_id is not None:
+            obj.duplicate_of_id = rep_id
+            continue
+
+        rep = next(
+            (r for r in batch_reps if (obj.text_hash and r.text_hash == obj.text_hash)
+             or (obj.simhash is not None and r.simhash is not None
+                 and hamming(obj.simhash, r.simhash) <= max_distance)),
+            None,
+        )
+        if rep is not None:
+            pending.append((obj, rep))
+        else:
+            batch_reps.append(obj)
+    return pending
+
+
+def link_batch_duplicates(pending: List[Tuple[FeedItem, FeedItem]]):
+    """Second half of assign_duplicates, once the batch has pks."""
+    linked = []
+    for dup, rep in pending:
+        if dup.pk and rep.pk:
+            dup.duplicate_of_id = rep.pk
+            linked.append(dup)
+    if linked:
+        FeedItem.objects.bulk_update(linked, ["duplicate_of"])
+
+
+def record_bands(objs: List[FeedItem]):
+    """Add newly inserted cluster representatives to the band index."""
+    SimhashBand.objects.bulk_create([
+        SimhashBand(key=key, item_id=obj.pk, fetched_at=obj.fetched_at)
+        for obj in objs
+        if obj.pk and obj.simhash is not None and obj.duplicate_of_id is None
+        for key in band_keys(obj.simhash)
+    ])
+
+
+def prune_bands(older_than_days: Optional[int] = None) -> int:
+    """Drop band rows that fell out of the dedupe window."""
+    days = older_than_days or getattr(settings, "FEEDS_DEDUPE_WINDOW_DAYS", 7)
+    deleted, _ = SimhashBand.objects.filter(fetched_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Set
+
+import requests
+
+from . import http
 
 
 class BaseFetcher(ABC):
@@ -12,6 +16,78 @@ class BaseFetcher(ABC):
         self.source = source
         self.endpoint = source.endpoint
         self.config = source.config or {}
+        self.http = http.HttpOptions.for_source(self.config)
+        # Response validators captured by fetch(); persisted by the service layer
+        self.etag = source.etag
+        self.last_modified = source.last_modified
+        self.not_modified = False
+        # Instrumentation (see feeds/metrics.py): last HTTP status, decoded
+        # body bytes read, and seconds spent parsing / normalizing
+        self.http_status = None
+        self.bytes_received = 0
+        self.parse_seconds = 0.0
+        self.known_skipped = 0
+        # external_ids already stored for this source (populated by the
+        # service layer). Known items are skipped, and after
+        # known_run_length consecutive ones (0 = never) the fetcher stops.
+        self.known_ids: Set[str] = set()
+        self.known_run_length = 0
+        self.stopped_early = False
+        self._known_run = 0
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Build If-None-Match / If-Modified-Since from the stored validators.
+        """
+        headers = {}
+        if self.source.etag:
+            headers["If-None-Match"] = self.source.etag
+        if self.source.last_modified:
+            headers["If-Modified-Since"] = self.source.last_modified
+        return headers
+
+    def http_get(self, url: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
+                 **kwargs) -> requests.Response:
+        """
+        GET through the shared pooled session with this source's timeouts
+        and headers. The body is streamed: read it with iter_body() /
+        read_body() so max_bytes is enforced, and close the response.
+        """
+        resp = http.get_session().get(
+            url or self.endpoint,
+            headers={**self.http.headers, **(headers or {})},
+            timeout=self.http.timeout,
+            stream=True,
+            **kwargs,
+        )
+        self.http_status = resp.status_code
+        return resp
+
+    def iter_body(self, resp: requests.Response, chunk_size: int = http.CHUNK_SIZE,
+                  max_bytes: Optional[int] = None) -> Iterator[bytes]:
+        """The body in chunks, capped at max_bytes (default: self.http.max_bytes)."""
+        max_bytes = self.http.max_bytes if max_bytes is None else max_bytes
+        for chunk in http.iter_body(resp, max_bytes, chunk_size):
+            self.bytes_received += len(chunk)
+            yield chunk
+
+    def read_body(self, resp: requests.Response) -> bytes:
+        return b"".join(self.iter_body(resp))
+
+    def skip_known(self, external_id) -> bool:
+        """
+        True if this item is already stored and needn't be normalized.
+        Sets stopped_early once a long enough run of known items is seen,
+        after which the caller should stop reading entries.
+        """
+        if external_id not in self.known_ids:
+            self._known_run = 0
+            return False
+        self._known_run += 1
+        self.known_skipped += 1
+        if self.known_run_length and self._known_run >= self.known_run_length:
+            self.stopped_early = True
+        return True
 
     @abstractmethod
     def fetch(self) -> List[Dict[str, Any]]:
@@ -29,3 +105,15 @@ class BaseFetcher(ABC):
         - raw (original payload for debugging)
         """
         pass
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield normalized items one at a time. Fetchers that can parse
+        incrementally override this; the default just walks fetch().
+        """
+        yield from self.fetch()
+
+    @property
+    def streaming(self) -> bool:
+        """True if the service layer should save iter_items() batch by batch (see services.save_stream)."""
+        return False
@@ -0,0 +1,170 @@
+# feeds/fetchers/jsonstream.py
+"""
+Incremental JSON reading for large API responses, on the stdlib decoder.
+
+JsonStream walks the document as byte chunks arrive and yields the
+elements of one array (e.g. "data.items") one at a time, so memory is
+bounded by a single element rather than the whole page. Every other
+value on the way is decoded whole into `document`, which is how cursors
+and next links are read without a second pass.
+
+Paths are JSONPath-style: "$.data.items", "data.items", "media[0].url".
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, Sequence, Tuple, Union
+
+_PATH_TOKEN_RE = re.compile(r"\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]|([^.\[\]]+)")
+_WHITESPACE = " \t\n\r"
+
+PathToken = Union[str, int]
+
+
+def compile_path(path: str) -> Tuple[PathToken, ...]:
+    """'$.a.b[0].c' -> ('a', 'b', 0, 'c'); '$' or '' is the root."""
+    path = path.strip()
+    if path.startswith("$"):
+        path = path[1:]
+    tokens = []
+    for index, quoted, key in _PATH_TOKEN_RE.findall(path):
+        tokens.append(int(index) if index else (quoted or key))
+    return tuple(tokens)
+
+
+def extract(value: Any, path: Sequence[PathToken]) -> Any:
+    """The value at `path` (from compile_path), or None if any step is missing."""
+    for token in path:
+        try:
+            value = value[token]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+class JsonStream:
+    """
+    Iterate the elements of the array at `items_path` in a JSON document
+    read from `chunks`. After iteration, `document` holds the rest of the
+    document (the array itself is left out). Raises ValueError on
+    malformed input.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], items_path: Sequence[PathToken] = ()):
+        self.items_path = tuple(items_path)
+        self.document: Any = None
+        self.found = False
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # ----------------------------
+    # Buffer
+    # ----------------------------
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        if self._pos > 65536 and self._pos * 2 > len(self._buf):
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"malformed JSON: expected {char!r}, got {found or 'end of input'!r}")
+        self._pos += 1
+
+    def _decode_value(self) -> Any:
+        """
+        Decode one complete value at the cursor, reading more input while
+        it is cut off. Each retry at least doubles the pending text, so a
+        large value costs amortized linear time.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise ValueError(f"malformed JSON: {e}") from None
+            else:
+                # a number at the very end of the buffer may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            pending = len(self._buf) - self._pos
+            while len(self._buf) - self._pos < 2 * pending + 1 and self._fill():
+                pass
+
+    # ----------------------------
+    # Walk
+    # ----------------------------
+    def __iter__(self) -> Iterator[Any]:
+        self.document = yield from self._value(())
+        if self._peek():
+            raise ValueError("malformed JSON: trailing data")
+
+    def _value(self, path: Tuple[PathToken, ...]):
+        if path == self.items_path and self._peek() == "[":
+            self.found = True
+            yield from self._array_items()
+            return None
+        if self._peek() == "{" and path == self.items_path[:len(path)]:
+            return (yield from self._object(path))
+        return self._decode_value()
+
+    def _object(self, path):
+        self._expect("{")
+        obj = {}
+        if self._peek() == "}":
+            self._pos += 1
+            return obj
+        while True:
+            if self._peek() != '"':
+                raise ValueError("malformed JSON: expected an object key")
+            key = self._decode_value()
+            self._expect(":")
+            value = yield from self._value(path + (key,))
+            if not (self.found and path + (key,) == self.items_path):
+                obj[key] = value
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return obj
+            if separator != ",":
+                raise ValueError(f"malformed JSON: expected ',' or '}}', got {separator or 'end of input'!r}")
+
+    def _array_items(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"malformed JSON: expected ',' or ']', got {separator or 'end of input'!r}")
+
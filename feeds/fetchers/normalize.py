@@ -0,0 +1,31 @@
+"""
+Field normalization shared by the fetchers: dates, HTML and URLs.
+
+feedparser has no public API for parsing a lone date string or
+sanitizing a fragment outside feedparser.parse(), so its internal
+helpers are used, wrapped here so that's the only place that depends on
+them.
+"""
+import time
+from typing import Optional
+from urllib.parse import urljoin
+
+from feedparser.datetimes import _parse_date
+from feedparser.sanitizer import _sanitize_html
+
+
+def parse_feed_date(value: str) -> Optional[time.struct_time]:
+    """RFC 822 / ISO 8601 / W3CDTF and the other formats feeds use -> UTC struct_time."""
+    return _parse_date(value) if value else None
+
+
+def clean_html(value: str) -> str:
+    """The sanitizer feedparser applies to entry HTML on its own parse path."""
+    return _sanitize_html(value, "utf-8", "text/html") if value else ""
+
+
+def absolute_url(base_url: str, url: str) -> str:
+    # urljoin re-parses absolute URLs too; most feed URLs already are
+    if url.startswith(("https://", "http://")):
+        return url
+    return urljoin(base_url, url)
@@ -0,0 +1,130 @@
+# feeds/fetchers/parse_pool.py
+"""
+Optional process pool for the CPU-bound half of a fetch (feedparser +
+normalization), so parsing on many fetch threads isn't serialized by
+the GIL. Fetch threads hand the downloaded body to the pool and block on
+the result, which releases the GIL for the next download.
+
+FEEDS_PARSE_PROCESSES = 0 (the default) parses on the calling thread.
+The pool is created on first use and reused for the life of the process;
+workers are spawned (not forked, the parent runs threads) and load
+Django settings once.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger("insightvault.feeds")
+
+# normalized items cross the process boundary as tuples in this order;
+# cheaper to pickle than one dict per item
+ITEM_FIELDS = (
+    "external_id", "title", "summary", "content", "url", "author",
+    "published_at", "image_url", "video_url", "raw",
+)
+# the whole feedparser entry would repeat every field above (and the
+# parsed dates, links, content lists) in each pickle; nothing reads it
+# back but the debugging copy stored on FeedItem.raw, so pooled items
+# keep only these keys of it
+RAW_KEYS = ("id", "link", "title", "author", "published", "updated")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@dataclass
+class ParseSource:
+    """The slice of a FeedSource a fetcher needs to parse, picklable."""
+    endpoint: str
+    config: Dict[str, Any] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    slug: str = ""
+
+
+def pool_size() -> int:
+    return max(0, getattr(settings, "FEEDS_PARSE_PROCESSES", 0))
+
+
+def _init_worker(settings_module: str):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def build_pool(processes: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=get_context(getattr(settings, "FEEDS_PARSE_START_METHOD", "spawn")),
+        initializer=_init_worker,
+        initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "insightVault.settings"),),
+    )
+
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """The process-wide parse pool, or None when parsing inline."""
+    global _pool
+    if _pool is None and pool_size():
+        with _pool_lock:
+            if _pool is None:
+                _pool = build_pool(pool_size())
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def parse_job(source: ParseSource, known_ids: Set[str], known_run_length: int,
+              body: bytes) -> Tuple[List[Tuple], int, bool, float]:
+    """
+    Worker side: parse `body` as RSSFetcher.parse_body would. Returns
+    (item tuples, known_skipped, stopped_early, parse_seconds).
+    """
+    from .rss import RSSFetcher
+
+    fetcher = RSSFetcher(source)
+    fetcher.known_ids = known_ids
+    fetcher.known_run_length = known_run_length
+    items = fetcher.parse_body(body)
+    for item in items:
+        item["raw"] = {key: item["raw"][key] for key in RAW_KEYS if key in item["raw"]}
+    rows = [tuple(item[name] for name in ITEM_FIELDS) for item in items]
+    return rows, fetcher.known_skipped, fetcher.stopped_early, fetcher.parse_seconds
+
+
+def parse(fetcher, body: bytes) -> List[Dict[str, Any]]:
+    """Run fetcher.parse_body(body), in the pool when one is configured."""
+    pool = get_pool()
+    if pool is None:
+        return fetcher.parse_body(body)
+
+    source = ParseSource(
+        endpoint=fetcher.endpoint, config=fetcher.config, slug=getattr(fetcher.source, "slug", ""),
+    )
+    try:
+        rows, skipped, stopped, seconds = pool.submit(
+            parse_job, source, fetcher.known_ids, fetcher.known_run_length, body,
+        ).result()
+    except BrokenProcessPool:
+        # a worker died (OOM, killed); rebuild the pool for the next fetch
+        logger.warning("Parse pool broken, parsing %s inline", source.slug,
+                       extra={"event": "parse_pool_broken", "source": source.slug})
+        shutdown_pool()
+        return fetcher.parse_body(body)
+
+    fetcher.known_skipped += skipped
+    fetcher.stopped_early = fetcher.stopped_early or stopped
+    fetcher.parse_seconds += seconds
+    return [dict(zip(ITEM_FIELDS, row)) for row in rows]
@@ -1,83 +1,265 @@
 # feeds/fetchers/rss.py
 import re
+import time
+import xml.etree.ElementTree as ET
 from datetime import datetime, timezone as dt_timezone
-from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin, urlparse, parse_qs
+from typing import List, Dict, Any, Iterator, Optional
+from urllib.parse import urlparse, parse_qs
 
-import requests
 import feedparser
+from django.conf import settings
 
+from . import parse_pool
 from .base import BaseFetcher
+from .normalize import absolute_url, clean_html, parse_feed_date
 
 
 IMG_REGEX = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']', flags=re.IGNORECASE)
 YOUTUBE_WATCH_RE = re.compile(r"(?:youtube\.com/watch\?.*v=|youtu\.be/)([A-Za-z0-9_-]{6,})")
+YOUTUBE_EMBED_RE = re.compile(r"youtube\.com/embed/([A-Za-z0-9_-]{6,})")
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".ogg")
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+MEDIA_NS = "{http://search.yahoo.com/mrss/}"
+
+
+def _local(tag: str) -> str:
+    """'{namespace}name' -> 'name'"""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _text(elem) -> str:
+    """Element text, or its serialized children for inline xhtml content."""
+    if elem is None:
+        return ""
+    if len(elem):
+        inner = (elem.text or "") + "".join(ET.tostring(child, encoding="unicode") for child in elem)
+        return inner.strip()
+    return (elem.text or "").strip()
+
+
+def _entry_id(entry) -> Optional[str]:
+    return entry.get("id") or entry.get("guid") or entry.get("link")
+
+
+def _element_to_entry(elem) -> Dict[str, Any]:
+    """
+    Convert a parsed RSS <item> / Atom <entry> element into a dict shaped
+    like a feedparser entry, so _normalize_entry/_extract_media work on both.
+    """
+    entry: Dict[str, Any] = {"links": [], "enclosures": [], "media_content": [], "media_thumbnail": []}
+    children = []
+    for child in elem:
+        # <media:group> just wraps more media:* elements
+        children.extend(child if child.tag == f"{MEDIA_NS}group" else [child])
+
+    for child in children:
+        tag = child.tag if isinstance(child.tag, str) else ""
+        name = _local(tag)
+
+        if tag.startswith(MEDIA_NS):
+            if name == "content" and child.get("url"):
+                entry["media_content"].append({"url": child.get("url"), "type": child.get("type", "")})
+            elif name == "thumbnail" and child.get("url"):
+                entry["media_thumbnail"].append({"url": child.get("url")})
+        elif name in ("guid", "id"):
+            entry.setdefault("id", _text(child))
+        elif name == "title":
+            entry.setdefault("title", _text(child))
+        elif name == "link":
+            href = child.get("href")
+            if href is None:
+                entry.setdefault("link", _text(child))
+            else:
+                rel = child.get("rel", "alternate")
+                entry["links"].append({"rel": rel, "type": child.get("type", ""), "href": href})
+                if rel == "alternate":
+                    entry.setdefault("link", href)
+        elif name in ("description", "summary"):
+            entry.setdefault("summary", clean_html(_text(child)))
+        elif name in ("encoded", "content") and not tag.startswith(MEDIA_NS):
+            entry.setdefault("content", [{"value": clean_html(_text(child))}])
+        elif name in ("author", "creator"):
+            author = child.findtext(f"{ATOM_NS}name") or _text(child)
+            entry.setdefault("author", author)
+        elif name == "enclosure" and child.get("url"):
+            entry["enclosures"].append({"href": child.get("url"), "type": child.get("type", "")})
+        elif name in ("pubDate", "published", "date", "issued"):
+            entry.setdefault("published_parsed", parse_feed_date(_text(child)))
+        elif name in ("updated", "modified"):
+            entry.setdefault("updated_parsed", parse_feed_date(_text(child)))
+
+    # drop dates feedparser could not parse
+    for key in ("published_parsed", "updated_parsed"):
+        if key in entry and entry[key] is None:
+            del entry[key]
+    return entry
 
 
 class RSSFetcher(BaseFetcher):
     """
-    RSS/Atom fetcher using requests + feedparser.
+    RSS/Atom fetcher using the shared HTTP session + feedparser.
     Returns list of normalized dicts with keys:
       external_id, title, summary, content, url, author,
       published_at (datetime or None), image_url, video_url, raw
     """
 
     def fetch(self) -> List[Dict[str, Any]]:
-        headers = {"User-Agent": "InsightVaultBot/1.0 (+https://yourdomain.example)"}
-        resp = requests.get(self.endpoint, headers=headers, timeout=15)
-        resp.raise_for_status()
+        if self.streaming:
+            return list(self.iter_items())
+        body = self.download()
+        if body is None:
+            return []
+        return parse_pool.parse(self, body)
 
-        parsed = feedparser.parse(resp.content)
+    def download(self) -> Optional[bytes]:
+        """
+        I/O stage of fetch(): the feed body, or None on 304 (nothing
+        changed since the stored validators, so parsing is skipped).
+        """
+        resp = self.http_get(headers=self._request_headers())
+        try:
+            if resp.status_code == 304:
+                self.not_modified = True
+                return None
+            resp.raise_for_status()
+
+            self.etag = resp.headers.get("ETag")
+            self.last_modified = resp.headers.get("Last-Modified")
+            return self.read_body(resp)
+        finally:
+            resp.close()
+
+    def parse_body(self, body: bytes) -> List[Dict[str, Any]]:
+        """
+        CPU stage of fetch(): parse and normalize the new entries. Needs
+        only the endpoint and known-id state, so it can run in a worker
+        process (see parse_pool).
+        """
+        started = time.perf_counter()
+        parsed = feedparser.parse(body)
 
         items: List[Dict[str, Any]] = []
         for entry in parsed.entries:
-            external_id = entry.get("id") or entry.get("guid") or entry.get("link")
-            title = entry.get("title", "").strip()
-            # content prefers full content, fallback to summary
-            content = ""
-            if entry.get("content"):
-                try:
-                    content = entry["content"][0].get("value", "") or ""
-                except Exception:
-                    content = ""
-            if not content:
-                content = entry.get("summary", "") or ""
-
-            summary = entry.get("summary", "") or ""
-            url = entry.get("link", "") or ""
-            author = entry.get("author", "") or entry.get("dc_creator", "") or ""
-
-            published_at = self._parse_date(entry)
-
-            # Extract media (image/video) with several fallbacks
-            image_url, video_url = self._extract_media(entry, base_url=self.endpoint, content_html=content)
-
-            item = {
-                "external_id": external_id,
-                "title": title,
-                "summary": summary,
-                "content": content,
-                "url": url,
-                "author": author,
-                "published_at": published_at,
-                "image_url": image_url,
-                "video_url": video_url,
-                "raw": entry,
-            }
-            items.append(item)
+            if self.skip_known(_entry_id(entry)):
+                if self.stopped_early:
+                    break
+                continue
+            items.append(self._normalize_entry(entry))
 
+        self.parse_seconds += time.perf_counter() - started
         return items
 
+    @property
+    def streaming(self) -> bool:
+        """Per-source config "stream" overrides the FEEDS_STREAM_PARSING default."""
+        return bool(self.config.get("stream", getattr(settings, "FEEDS_STREAM_PARSING", False)))
+
+    def iter_items(self) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of fetch(): reads the body in chunks through an
+        XML pull parser and yields one normalized item per <item>/<entry>
+        as soon as it is complete, so the XML tree never holds more than
+        one entry. The items themselves stay bounded only if the consumer
+        doesn't collect them: fetch() does, services.save_stream saves
+        them in batches. Stops reading the body once it reaches a run of
+        known external_ids (see BaseFetcher.skip_known).
+        """
+        resp = self.http_get(headers=self._request_headers())
+        try:
+            if resp.status_code == 304:
+                self.not_modified = True
+                return
+            resp.raise_for_status()
+
+            self.etag = resp.headers.get("ETag")
+            self.last_modified = resp.headers.get("Last-Modified")
+
+            parser = ET.XMLPullParser(events=("start", "end"))
+            stack = []
+            # the body is never held whole, so the archive-sized cap applies
+            body = self.iter_body(resp, chunk_size=STREAM_CHUNK_SIZE, max_bytes=self.http.stream_max_bytes)
+            for chunk in body:
+                # parse time excludes the network reads and the consumer
+                started = time.perf_counter()
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        stack.append(elem)
+                        continue
+                    stack.pop()
+                    if _local(elem.tag) not in ("item", "entry"):
+                        continue
+
+                    entry = _element_to_entry(elem)
+                    # drop the finished entry so the tree never grows
+                    if stack:
+                        stack[-1].remove(elem)
+                    if self.skip_known(_entry_id(entry)):
+                        if self.stopped_early:
+                            self.parse_seconds += time.perf_counter() - started
+                            return
+                        continue
+                    item = self._normalize_entry(entry)
+                    self.parse_seconds += time.perf_counter() - started
+                    yield item
+                    started = time.perf_counter()
+                self.parse_seconds += time.perf_counter() - started
+            parser.close()
+        finally:
+            resp.close()
+
+    def _request_headers(self) -> Dict[str, str]:
+        # User-Agent / Accept-Encoding come from the shared session
+        return self.conditional_headers()
+
+    def _normalize_entry(self, entry) -> Dict[str, Any]:
+        external_id = _entry_id(entry)
+        title = entry.get("title", "").strip()
+        # content prefers full content, fallback to summary
+        content = ""
+        if entry.get("content"):
+            try:
+                content = entry["content"][0].get("value", "") or ""
+            except Exception:
+                content = ""
+        if not content:
+            content = entry.get("summary", "") or ""
+
+        summary = entry.get("summary", "") or ""
+        url = entry.get("link", "") or ""
+        author = entry.get("author", "") or entry.get("dc_creator", "") or ""
+
+        published_at = self._parse_date(entry)
+
+        # Extract media (image/video) with several fallbacks
+        image_url, video_url = self._extract_media(entry, base_url=self.endpoint, content_html=content)
+
+        return {
+            "external_id": external_id,
+            "title": title,
+            "summary": summary,
+            "content": content,
+            "url": url,
+            "author": author,
+            "published_at": published_at,
+            "image_url": image_url,
+            "video_url": video_url,
+            "raw": entry,
+        }
+
     def _parse_date(self, entry) -> Optional[datetime]:
         """
         Convert feedparser date (struct_time) to a timezone-aware datetime in UTC.
         """
         dt_obj = None
         try:
-            if getattr(entry, "published_parsed", None):
-                t = entry.published_parsed
-            elif getattr(entry, "updated_parsed", None):
-                t = entry.updated_parsed
+            if entry.get("published_parsed"):
+                t = entry["published_parsed"]
+            elif entry.get("updated_parsed"):
+                t = entry["updated_parsed"]
             else:
                 t = None
 
@@ -89,112 +271,90 @@ class RSSFetcher(BaseFetcher):
 
     def _extract_media(self, entry, base_url: str = "", content_html: str = "") -> (Optional[str], Optional[str]):
         """
-        Try multiple strategies to find a representative image_url and/or video_url.
-        Returns (image_url or None, video_url or None)
+        Find a representative image_url and/or video_url in one pass over
+        the entry's media fields, in order of preference: media:content,
+        media:thumbnail, enclosure links, enclosures, the first <img> in the
+        content, entry image/thumbnail, and YouTube links/embeds for video.
+        The content HTML is only scanned when the structured fields came up
+        empty. Returns (image_url or None, video_url or None).
         """
+        # plain dict.get skips FeedParserDict's alias handling, which none
+        # of these keys use ("enclosures" is derived, so it goes through
+        # entry.get below)
+        get = dict.get
         image_url = None
         video_url = None
 
-        # 1) 'media_content' (common in many feeds)
-        try:
-            mc = entry.get("media_content") or entry.get("mediaContents")  # some feeds vary
-            if mc:
-                # choose first image-like or video-like item
-                for m in mc:
-                    url = m.get("url") or m.get("value")
-                    mtype = (m.get("type") or "").lower()
-                    if not url:
-                        continue
-                    if "image" in mtype and not image_url:
-                        image_url = url
-                    if ("video" in mtype or "mp4" in url) and not video_url:
-                        video_url = url
-                    if image_url and video_url:
-                        break
-        except Exception:
-            pass
+        for m in get(entry, "media_content") or get(entry, "mediaContents") or ():
+            url = m.get("url") or m.get("value")
+            if not url:
+                continue
+            mtype = (m.get("type") or "").lower()
+            if not image_url and "image" in mtype:
+                image_url = url
+            if not video_url and ("video" in mtype or "mp4" in url):
+                video_url = url
+            if image_url and video_url:
+                break
 
-        # 2) 'media_thumbnail'
         if not image_url:
-            try:
-                mt = entry.get("media_thumbnail") or entry.get("mediaThumbnails")
-                if mt and isinstance(mt, (list, tuple)) and mt:
-                    image_url = mt[0].get("url") or mt[0].get("value")
-            except Exception:
-                pass
+            thumbs = get(entry, "media_thumbnail") or get(entry, "mediaThumbnails")
+            if thumbs and isinstance(thumbs, (list, tuple)) and isinstance(thumbs[0], dict):
+                image_url = thumbs[0].get("url") or thumbs[0].get("value")
 
-        # 3) enclosures / links rel=enclosure
         if not image_url or not video_url:
-            links = entry.get("links", []) or entry.get("links", [])
-            for link in links:
-                rel = (link.get("rel") or "").lower()
-                ltype = (link.get("type") or "").lower()
+            for link in get(entry, "links") or ():
+                if (link.get("rel") or "").lower() != "enclosure":
+                    continue
                 href = link.get("href") or link.get("url")
                 if not href:
                     continue
-                if rel == "enclosure":
-                    if "image" in ltype and not image_url:
-                        image_url = href
-                    elif "video" in ltype and not video_url:
-                        video_url = href
-                    # some feeds provide mp4 with type application/octet-stream etc:
-                    elif any(ext in href.lower() for ext in (".mp4", ".webm", ".ogg")):
-                        video_url = video_url or href
-
-        # 4) entry.enclosures (some feeds)
-        try:
-            enclosures = entry.get("enclosures") or []
-            for enc in enclosures:
+                ltype = (link.get("type") or "").lower()
+                if "image" in ltype and not image_url:
+                    image_url = href
+                elif "video" in ltype and not video_url:
+                    video_url = href
+                # some feeds provide mp4 with type application/octet-stream etc.
+                elif not video_url and any(ext in href.lower() for ext in VIDEO_EXTENSIONS):
+                    video_url = href
+
+        if not image_url or not video_url:
+            for enc in entry.get("enclosures") or ():
                 href = enc.get("href") or enc.get("url")
-                etype = (enc.get("type") or "").lower()
                 if not href:
                     continue
+                etype = (enc.get("type") or "").lower()
                 if "image" in etype and not image_url:
                     image_url = href
-                if ("video" in etype or any(href.lower().endswith(ext) for ext in [".mp4", ".webm", ".ogg"])) and not video_url:
+                if not video_url and ("video" in etype or href.lower().endswith(VIDEO_EXTENSIONS)):
                     video_url = href
-        except Exception:
-            pass
 
-        # 5) fallback: try to discover first <img> in content_html or summary
         if not image_url and content_html:
             m = IMG_REGEX.search(content_html)
             if m:
                 image_url = m.group(1)
 
-        # 6) fallback: check entry.get('image') or entry.get('thumbnail')
         if not image_url:
-            image_url = entry.get("image", {}).get("href") if isinstance(entry.get("image"), dict) else entry.get("image")
-            image_url = image_url or entry.get("thumbnail")
+            image = get(entry, "image")
+            image_url = (image.get("href") if isinstance(image, dict) else image) or get(entry, "thumbnail")
 
-        # 7) normalize to absolute URLs (join with base)
         if image_url:
-            image_url = urljoin(base_url, image_url)
+            image_url = absolute_url(base_url, image_url)
         if video_url:
-            video_url = urljoin(base_url, video_url)
+            video_url = absolute_url(base_url, video_url)
 
-        # 8) special handling: detect YouTube links and produce embed URL
-        #    if a YouTube watch/short/youtu.be link appears in video_url or url or content_html
         if not video_url:
-            # prioritize entry.link then content_html
-            candidates = [entry.get("link", ""), content_html or ""]
-            for c in candidates:
-                m = YOUTUBE_WATCH_RE.search(c)
+            # entry link first, then the content; the substring test keeps
+            # the regexes off the vast majority of entries
+            for text in (get(entry, "link") or "", content_html or ""):
+                if "youtu" in text:
+                    m = YOUTUBE_WATCH_RE.search(text)
+                    if m:
+                        video_url = f"https://www.youtube.com/embed/{m.group(1)}"
+                        break
+            if not video_url and content_html and "youtube.com/embed/" in content_html:
+                m = YOUTUBE_EMBED_RE.search(content_html)
                 if m:
-                    vid = m.group(1)
-                    video_url = f"https://www.youtube.com/embed/{vid}"
-                    break
-            # also check if an <iframe> with youtube exists in content_html
-            if not video_url and content_html:
-                # naive look for "youtube.com/embed/..." in content
-                if "youtube.com/embed/" in content_html:
-                    vid_match = re.search(r"youtube\.com/embed/([A-Za-z0-9_-]{6,})", content_html)
-                    if vid_match:
-                        vid = vid_match.group(1)
-                        video_url = f"https://www.youtube.com/embed/{vid}"
-
-        # final normalization: None if empty string
-        image_url = image_url or None
-        video_url = video_url or None
-
-        return image_url, video_url
+                    video_url = f"https://www.youtube.com/embed/{m.group(1)}"
+
+        return image_url or None, video_url or None
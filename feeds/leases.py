@@ -0,0 +1,88 @@
+"""
+Single-flight refreshes: at most one fetch of a source is in flight at a
+time, across threads and processes (views, refresh_all, the scheduler).
+
+A caller claims a source by writing a lease (token + expiry) with one
+conditional UPDATE; the row lock the database takes for it is what
+serializes racing callers. The owner fetches, then releases the lease
+and stores the outcome in last_refresh. Callers that lose the race poll
+the row until the lease is released and reuse that outcome instead of
+downloading the feed again. A lease left by a crashed owner lapses after
+FEEDS_REFRESH_LEASE_SECONDS.
+
+Outcomes are plain dicts here (services.RefreshResult fields); the
+services module converts them.
+"""
+import time
+import uuid
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import FeedSource
+
+
+def lease_seconds() -> float:
+    return getattr(settings, "FEEDS_REFRESH_LEASE_SECONDS", 300)
+
+
+def acquire(source_id: int, seconds: Optional[float] = None) -> Optional[str]:
+    """Claim the source's refresh; returns the lease token, or None if another caller holds it."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimed = (
+        FeedSource.objects.filter(pk=source_id)
+        .filter(Q(refresh_lease_until__isnull=True) | Q(refresh_lease_until__lt=now))
+        .update(
+            refresh_lease_until=now + timezone.timedelta(seconds=seconds or lease_seconds()),
+            refresh_lease_token=token,
+        )
+    )
+    return token if claimed else None
+
+
+def release(source_id: int, token: str, outcome: Optional[Dict] = None) -> bool:
+    """
+    Drop the lease and publish the outcome. False if the lease lapsed and
+    was claimed by someone else meanwhile (their outcome wins).
+    """
+    changes = {"refresh_lease_until": None, "refresh_lease_token": ""}
+    if outcome is not None:
+        changes["last_refresh"] = {"at": timezone.now().isoformat(), "result": outcome}
+    return bool(FeedSource.objects.filter(pk=source_id, refresh_lease_token=token).update(**changes))
+
+
+def recent_outcome(last_refresh: Optional[Dict], max_age: float) -> Optional[Dict]:
+    """The stored outcome if it is younger than max_age seconds."""
+    if not max_age or not last_refresh:
+        return None
+    at = parse_datetime(last_refresh.get("at") or "")
+    if at is None or (timezone.now() - at).total_seconds() > max_age:
+        return None
+    return last_refresh.get("result")
+
+
+def wait(source_id: int, timeout: Optional[float] = None, poll: Optional[float] = None) -> Optional[Dict]:
+    """
+    Block until the in-flight refresh of the source finishes and return
+    its outcome. None on timeout, or if the owner died and the lease lapsed.
+    """
+    timeout = getattr(settings, "FEEDS_REFRESH_WAIT_SECONDS", 30) if timeout is None else timeout
+    poll = getattr(settings, "FEEDS_REFRESH_POLL_SECONDS", 0.2) if poll is None else poll
+    deadline = time.monotonic() + timeout
+    while True:
+        row = (
+            FeedSource.objects.filter(pk=source_id)
+            .values("refresh_lease_until", "last_refresh")
+            .first()
+        )
+        if row is None:
+            return None
+        if row["refresh_lease_until"] is None:
+            return (row["last_refresh"] or {}).get("result")
+        if row["refresh_lease_until"] < timezone.now() or time.monotonic() >= deadline:
+            return None
+        time.sleep(poll)
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feeds.models import FeedSource
+from feeds.retention import Policy, apply_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive feed items past their source's retention policy to gzipped "
+        "JSONL segments and delete them in small transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", action="append", help="Only these source slugs")
+        parser.add_argument("--chunk", type=int, default=None, help="Rows per delete transaction (default FEEDS_RETENTION_CHUNK)")
+        parser.add_argument("--archive-dir", type=Path, default=None, help="Default FEEDS_ARCHIVE_DIR")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be archived")
+
+    def handle(self, *args, **options):
+        sources = FeedSource.objects.order_by("id")
+        if options["source"]:
+            sources = sources.filter(slug__in=options["source"])
+            missing = set(options["source"]) - set(sources.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Unknown source(s): {', '.join(sorted(missing))}")
+
+        def progress(result):
+            rate = result.archived / result.seconds if result.seconds else 0
+            self.stdout.write(
+                f"  {result.slug}: {result.archived}/{result.expired} archived ({rate:,.0f} rows/s)", ending="\r",
+            )
+
+        results = apply_all(
+            sources, dry_run=options["dry_run"], chunk=options["chunk"],
+            archive_dir=options["archive_dir"], progress=progress,
+        )
+
+        verb = "would be archived" if options["dry_run"] else "archived"
+        for source, result in zip(sources, results):
+            policy = Policy.for_source(source)
+            if not policy.active:
+                continue
+            line = f"{result.slug}: {result.expired if options['dry_run'] else result.archived} {verb}"
+            if not options["dry_run"] and result.archived:
+                line += (
+                    f" in {result.seconds:.1f}s ({result.archived / max(result.seconds, 1e-6):,.0f} rows/s, "
+                    f"{result.segments} segment(s))"
+                )
+            self.stdout.write(line)
+        total = sum(r.expired if options["dry_run"] else r.archived for r in results)
+        self.stdout.write(self.style.SUCCESS(f"Done: {total} items {verb}."))
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feeds.benchmarks import (
+    BASELINE_PATH, STAGES, default_worker_counts, load_baseline, parse_scaling, regressions, run_benchmarks,
+    save_baseline,
+)
+from feeds.benchmarks.corpus import CORPUS_DIR, load_corpus, write_corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark RSSFetcher parsing, normalization and media extraction over "
+        "the checked-in corpus. With --check, exits non-zero if throughput "
+        "drops below the baseline, e.g. `manage.py bench_fetchers --check`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stage", action="append", choices=STAGES, help="Only run these stages")
+        parser.add_argument("--file", action="append", help="Only run these corpus files")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage (best is kept)")
+        parser.add_argument("--check", action="store_true", help="Fail on throughput regressions")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown for --check")
+        parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+        parser.add_argument("--save-baseline", action="store_true", help="Record these results as the baseline")
+        parser.add_argument("--write-corpus", action="store_true", help="Regenerate the corpus files and exit")
+        parser.add_argument("--scaling", action="store_true",
+                            help="Measure parse throughput on thread vs process pools of growing size")
+        parser.add_argument("--workers", help="Pool sizes for --scaling, e.g. 1,2,4 (default: powers of two up to the core count)")
+        parser.add_argument("--copies", type=int, default=4, help="Copies of each corpus file parsed per --scaling run")
+
+    def handle(self, *args, **options):
+        if options["write_corpus"]:
+            write_corpus()
+            self.stdout.write(self.style.SUCCESS(f"Corpus written to {CORPUS_DIR}"))
+            return
+
+        corpus = load_corpus()
+        if options["file"]:
+            missing = set(options["file"]) - set(corpus)
+            if missing:
+                raise CommandError(f"Unknown corpus file(s): {', '.join(sorted(missing))}")
+            corpus = {name: corpus[name] for name in options["file"]}
+
+        if options["scaling"]:
+            self._scaling(corpus, options)
+            return
+
+        results = run_benchmarks(corpus, options["stage"] or STAGES, options["repeat"])
+
+        self.stdout.write(f"{'corpus:stage':<40} {'entries':>8} {'entries/s':>12} {'us/entry':>9} {'peak KiB':>9}")
+        for r in results:
+            self.stdout.write(
+                f"{r.key:<40} {r.entries:>8} {r.entries_per_second:>12,.0f} "
+                f"{r.seconds / max(r.entries, 1) * 1e6:>9.1f} {r.peak_bytes / 1024:>9,.0f}"
+            )
+
+        by_key = {r.key: r for r in results}
+        for name in corpus:
+            new, old = by_key.get(f"{name}:media"), by_key.get(f"{name}:media-reference")
+            if new and old and new.seconds:
+                self.stdout.write(f"  {name}: media extraction {old.seconds / new.seconds:.1f}x vs reference")
+
+        if options["save_baseline"]:
+            save_baseline(results, options["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+
+        if options["check"]:
+            baseline = load_baseline(options["baseline"])
+            if not baseline:
+                raise CommandError(f"No baseline at {options['baseline']}; run with --save-baseline first")
+            failures = regressions(results, baseline, options["tolerance"])
+            if failures:
+                raise CommandError("Throughput regressions:\n  " + "\n  ".join(failures))
+            self.stdout.write(self.style.SUCCESS("No throughput regressions"))
+
+    def _scaling(self, corpus, options):
+        workers = [int(n) for n in options["workers"].split(",")] if options["workers"] else default_worker_counts()
+        bodies = list(corpus.values()) * options["copies"]
+        results = parse_scaling(bodies, workers)
+
+        self.stdout.write(f"{'pool':<8} {'workers':>7} {'entries':>8} {'entries/s':>12} {'speedup':>8}")
+        single = {r.kind: r.entries_per_second for r in results if r.workers == workers[0]}
+        for r in results:
+            speedup = r.entries_per_second / single[r.kind] if single.get(r.kind) else 0
+            self.stdout.write(
+                f"{r.kind:<8} {r.workers:>7} {r.entries:>8} {r.entries_per_second:>12,.0f} {speedup:>7.2f}x"
+            )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from feeds.benchmarks.read_state import JOIN_ROW_BYTES, run
+
+
+def _size(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:,.1f} {unit}"
+        n /= 1024
+    return f"{n:,.1f} TB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-user read state (compressed id bitmaps): storage, "
+        "memory and latency, extrapolated from a sample of synthetic users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--items", type=int, default=10_000_000)
+        parser.add_argument("--reads", type=int, default=500, help="Mean items read per user")
+        parser.add_argument("--sample", type=int, default=200, help="Users actually built")
+        parser.add_argument("--page", type=int, default=50, help="Items per unread check")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        r = run(
+            users=options["users"], items=options["items"], reads=options["reads"], sample=options["sample"],
+            page=options["page"], repeat=options["repeat"], seed=options["seed"],
+        )
+        self.stdout.write(f"{r.users:,} users x {r.items:,} items, {r.reads_per_user:,.0f} reads/user "
+                          f"(sample of {r.sample})")
+        self.stdout.write(f"  stored:   {_size(r.stored_bytes_per_user)}/user in {r.chunks_per_user:.1f} chunks, "
+                          f"{_size(r.stored_total)} total")
+        self.stdout.write(f"  join table estimate ({JOIN_ROW_BYTES} B/row): {_size(r.join_total)} total "
+                          f"({r.join_total / max(r.stored_total, 1):.1f}x)")
+        self.stdout.write(f"  memory:   {_size(r.memory_bytes_per_user)}/user loaded")
+        self.stdout.write(f"  build:    {r.build_us:,.1f} us/user")
+        self.stdout.write(f"  load:     {r.load_us:,.1f} us per page of {options['page']} (deserialize)")
+        self.stdout.write(f"  unread:   {r.page_check_us:,.1f} us per page of {options['page']} (in memory)")
+        self.stdout.write(f"  mark:     {r.mark_read_us:,.1f} us per item (add + re-serialize chunk)")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from feeds.models import FeedItem, FeedItemPayload
+from feeds.services import externalize
+
+
+class Command(BaseCommand):
+    help = "Move FeedItem.raw (and optionally content) into compressed FeedItemPayload rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=500, help="Rows moved per transaction")
+        parser.add_argument("--content", action="store_true", help="Also move the HTML content column")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would move")
+
+    def handle(self, *args, **options):
+        pending = FeedItem.objects.filter(externalized=False)
+        if options["dry_run"]:
+            self.stdout.write(f"{pending.count()} feed items would be externalized")
+            return
+
+        fields = ["raw", "externalized"] + (["content"] if options["content"] else [])
+        done = 0
+        last_pk = 0
+        while True:
+            # keyset over pk: each chunk is an index range scan and already
+            # moved rows are never re-read
+            rows = list(
+                pending.filter(pk__gt=last_pk).order_by("pk")
+                .only("id", "raw", "content", "externalized")[:options["chunk"]]
+            )
+            if not rows:
+                break
+            with transaction.atomic():
+                payloads = [externalize(row, include_content=options["content"]) for row in rows]
+                FeedItemPayload.objects.bulk_create(payloads)
+                FeedItem.objects.bulk_update(rows, fields)
+            last_pk = rows[-1].pk
+            done += len(rows)
+            self.stdout.write(f"  {done} externalized", ending="\r")
+
+        self.stdout.write(f"  {done} externalized")
+        self.stdout.write(self.style.SUCCESS(
+            "Done. Run VACUUM (sqlite) / VACUUM FULL (postgres) to return the freed space."
+        ))
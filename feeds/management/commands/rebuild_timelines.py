@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from feeds import timeline
+from feeds.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain per-user timelines: re-derive subscriber counts (switching "
+        "sources past FEEDS_TIMELINE_FANOUT_LIMIT to fan-out on read), drop "
+        "their leftover entries, optionally backfill every subscription, and "
+        "cap each timeline at FEEDS_TIMELINE_MAX_ENTRIES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backfill", action="store_true",
+                            help="Copy each subscribed source's newest items into the timeline (after enabling timelines)")
+        parser.add_argument("--keep", type=int, default=None, help="Entries kept per user (default FEEDS_TIMELINE_MAX_ENTRIES)")
+
+    def handle(self, *args, **options):
+        switched = timeline.recount()
+        self.stdout.write(f"{switched} source(s) switched to fan-out on read")
+        self.stdout.write(f"{timeline.purge_heavy()} entries of fan-out-on-read sources deleted")
+
+        if options["backfill"]:
+            written = 0
+            subscriptions = Subscription.objects.filter(source__fanout_on_read=False).select_related("user", "source")
+            for subscription in subscriptions.iterator():
+                written += timeline.backfill(subscription.user, subscription.source)
+            self.stdout.write(f"{written} entries backfilled")
+
+        trimmed = timeline.trim(options["keep"])
+        self.stdout.write(self.style.SUCCESS(f"Done: {trimmed} entries trimmed."))
@@ -0,0 +1,42 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from feeds.fetchers import parse_pool
+from feeds.scheduler import FeedScheduler
+
+
+class Command(BaseCommand):
+    help = "Run the feed scheduler: fetch enabled sources as they come due (fetch_interval_seconds)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker pool size (default FEEDS_REFRESH_MAX_WORKERS)")
+        parser.add_argument("--tick", type=float, default=5.0, help="Seconds between scheduler passes")
+        parser.add_argument("--once", action="store_true", help="Fetch everything currently due, then exit")
+
+    def handle(self, *args, **options):
+        scheduler = FeedScheduler(max_workers=options["workers"], tick_seconds=options["tick"])
+
+        if options["once"]:
+            try:
+                for result in scheduler.run_once():
+                    self._report(result)
+            finally:
+                scheduler.pool.shutdown()
+                parse_pool.shutdown_pool()
+            return
+
+        signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+        self.stdout.write("Feed scheduler started (Ctrl+C to stop)")
+        try:
+            scheduler.run_forever(on_result=self._report)
+        except KeyboardInterrupt:
+            scheduler.stop()
+        self.stdout.write("Feed scheduler stopped")
+
+    def _report(self, result):
+        line = f"{result.slug}: {result.status}, {result.new_items} new, {result.elapsed:.2f}s"
+        if result.status == "error":
+            self.stderr.write(f"{line} ({result.error})")
+        else:
+            self.stdout.write(line)
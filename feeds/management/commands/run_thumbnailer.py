@@ -0,0 +1,37 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from feeds import thumbnails
+
+
+class Command(BaseCommand):
+    help = "Download queued feed images and write their thumbnails (see feeds.thumbnails)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=50, help="Assets per pass")
+        parser.add_argument("--workers", type=int, default=None, help="Download threads (default FEEDS_THUMBNAIL_WORKERS)")
+        parser.add_argument("--sleep", type=float, default=10.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Drain the current queue, then exit")
+        parser.add_argument("--backfill", action="store_true", help="Queue images of existing items and sources first")
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self.stdout.write(f"Queued {thumbnails.backfill()} image URLs")
+
+        stopped = []
+        signal.signal(signal.SIGTERM, lambda *_: stopped.append(True))
+        try:
+            while not stopped:
+                counts = thumbnails.process_pending(options["batch"], options["workers"])
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"{counts['ready']} ready, {counts['retry']} to retry, {counts['failed']} failed"
+                    )
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from feeds.cadence import DAY, default_interval, estimate
+from feeds.models import FeedSource
+
+
+class Command(BaseCommand):
+    help = "List each enabled source's fetch interval, next fetch and the reason for it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--estimate", action="store_true",
+                            help="Recompute intervals from current history instead of the stored ones")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        default = default_interval()
+        fetches_per_day = 0.0
+        sources = FeedSource.objects.filter(enabled=True).order_by("slug")
+        for source in sources:
+            if options["estimate"]:
+                learned = estimate(source, now)
+                interval, reason = learned.interval, learned.reason
+                next_at = "-"
+            else:
+                stored = source.cadence or {}
+                interval = stored.get("interval") or source.fetch_interval_seconds or default
+                reason = stored.get("reason", "not fetched by the scheduler yet")
+                next_at = timezone.localtime(source.next_fetch_at).strftime("%Y-%m-%d %H:%M") if source.next_fetch_at else "-"
+            fetches_per_day += DAY / interval
+            self.stdout.write(f"{source.slug}: every {_duration(interval)}, next {next_at} ({reason})")
+
+        fixed = len(sources) * DAY / default
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(sources)} sources: ~{fetches_per_day:,.0f} fetches/day "
+            f"(~{fixed:,.0f} at the default {_duration(default)} interval)"
+        ))
+
+
+def _duration(seconds: float) -> str:
+    if seconds >= DAY:
+        return f"{seconds / DAY:.1f}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 60:.0f}m"
@@ -0,0 +1,81 @@
+"""
+Per-source ingestion metrics (exported at /metrics, see core.metrics)
+and the "insightvault.feeds" structured log records.
+"""
+import logging
+
+from core.metrics import COUNT_BUCKETS, Counter, Histogram
+
+logger = logging.getLogger("insightvault.feeds")
+
+REFRESHES = Counter(
+    "feeds_refresh_total", "Source refreshes by outcome (ok / not_modified / error).", ["source", "status"],
+)
+SHARED_REFRESHES = Counter(
+    "feeds_refresh_shared_total",
+    "Refresh requests answered with an in-flight or recent fetch instead of a new one.",
+    ["source"],
+)
+HTTP_RESPONSES = Counter(
+    "feeds_http_responses_total", "Fetch responses by HTTP status code.", ["source", "code"],
+)
+FETCH_SECONDS = Histogram(
+    "feeds_fetch_seconds", "Network time per fetch (excluding parsing).", ["source"],
+)
+PARSE_SECONDS = Histogram(
+    "feeds_parse_seconds", "Parse + normalize time per fetch.", ["source"],
+)
+SAVE_SECONDS = Histogram(
+    "feeds_save_seconds", "Time to persist one fetch.", ["source"],
+)
+FETCH_BYTES = Counter(
+    "feeds_fetch_bytes_total", "Decoded response bytes read.", ["source"],
+)
+ITEMS = Counter(
+    "feeds_items_total",
+    "Fetched items by outcome: new (inserted), duplicate (inserted as a copy "
+    "of another source's story) or known (already stored, skipped).",
+    ["source", "outcome"],
+)
+BATCH_ITEMS = Histogram(
+    "feeds_new_items_per_fetch", "New items inserted per fetch.", ["source"], buckets=COUNT_BUCKETS,
+)
+TIMELINE_ROWS = Counter(
+    "feeds_timeline_rows_total", "Timeline entries written by fan-out on ingest.", ["source"],
+)
+
+THUMBNAILS = Counter(
+    "feeds_thumbnails_total", "Image thumbnail jobs by outcome (ready / retry / failed).", ["outcome"],
+)
+
+
+def record_ingest(source, new: int, duplicates: int, known: int):
+    ITEMS.inc(new - duplicates, source=source.slug, outcome="new")
+    ITEMS.inc(duplicates, source=source.slug, outcome="duplicate")
+    ITEMS.inc(known, source=source.slug, outcome="known")
+    BATCH_ITEMS.observe(new, source=source.slug)
+
+
+def record_refresh(result):
+    """Export one RefreshResult and log it (DEBUG, or WARNING on errors)."""
+    slug = result.slug
+    REFRESHES.inc(source=slug, status=result.status)
+    if result.http_status is not None:
+        HTTP_RESPONSES.inc(source=slug, code=result.http_status)
+    FETCH_SECONDS.observe(max(result.fetch_seconds - result.parse_seconds, 0.0), source=slug)
+    PARSE_SECONDS.observe(result.parse_seconds, source=slug)
+    FETCH_BYTES.inc(result.bytes, source=slug)
+    if result.status != "error":
+        SAVE_SECONDS.observe(result.save_seconds, source=slug)
+
+    fields = {
+        "event": "feed_refresh", "source": slug, "status": result.status, "http_status": result.http_status,
+        "new_items": result.new_items, "bytes": result.bytes,
+        "fetch_ms": round(result.fetch_seconds * 1000, 2), "parse_ms": round(result.parse_seconds * 1000, 2),
+        "save_ms": round(result.save_seconds * 1000, 2), "error": result.error,
+    }
+    if result.status == "error":
+        logger.warning("Failed to refresh %s: %s", slug, result.error, extra=fields)
+    else:
+        logger.debug("Refreshed %s: %s, %d new in %.0f ms", slug, result.status, result.new_items,
+                    result.elapsed * 1000, extra=fields)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0002_feeditem_image_url_feeditem_video_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsource',
+            name='refresh_requested_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0003_feedsource_refresh_requested_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsource',
+            name='recent_external_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
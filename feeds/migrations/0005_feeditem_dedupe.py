@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0004_feedsource_recent_external_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feeditem',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='feeds.feeditem'),
+        ),
+        migrations.AddField(
+            model_name='feeditem',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SimhashBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField()),
+                ('fetched_at', models.DateTimeField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='simhash_bands', to='feeds.feeditem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'fetched_at'], name='feeds_simha_key_101365_idx'), models.Index(fields=['fetched_at'], name='feeds_simha_fetched_c7e2c1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0005_feeditem_dedupe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItemPayload',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payload', serialize=False, to='feeds.feeditem')),
+                ('codec', models.CharField(default='zlib', max_length=10)),
+                ('raw_data', models.BinaryField(blank=True, null=True)),
+                ('content_data', models.BinaryField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='feeditem',
+            name='externalized',
+            field=models.BooleanField(default=False),
+        ),
+    ]
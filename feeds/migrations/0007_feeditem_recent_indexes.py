@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0006_feeditem_payload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='feeditem',
+            name='feeds_feedi_is_acti_6464dd_idx',
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['is_active', '-published_at', '-fetched_at', '-id'], name='feeditem_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['source', 'is_active', '-published_at', '-fetched_at', '-id'], name='feeditem_source_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0007_feeditem_recent_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsource',
+            name='items_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedsource',
+            name='items_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
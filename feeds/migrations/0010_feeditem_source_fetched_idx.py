@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0009_mediaasset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['source', '-fetched_at', '-id'], name='feeditem_source_fetched_idx'),
+        ),
+    ]
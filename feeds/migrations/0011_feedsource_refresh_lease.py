@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0010_feeditem_source_fetched_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsource',
+            name='last_refresh',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='feedsource',
+            name='refresh_lease_token',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='feedsource',
+            name='refresh_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
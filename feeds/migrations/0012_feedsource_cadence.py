@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0011_feedsource_refresh_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedsource',
+            name='cadence',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='feedsource',
+            name='idle_fetches',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='feedsource',
+            name='next_fetch_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
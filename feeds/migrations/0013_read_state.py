@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0012_feedsource_cadence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('cardinality', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_read_chunks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'chunk'), name='uniq_read_chunk')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField()),
+                ('item_id', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feeds.feedsource')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_read_markers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('source__isnull', False)), fields=('user', 'source'), name='uniq_read_marker_source'), models.UniqueConstraint(condition=models.Q(('source__isnull', True)), fields=('user',), name='uniq_read_marker_all')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feeds', '0014_timelines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feeditem',
+            name='text_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 import hashlib
 
+
+def compute_content_hash(url: str, content: str, title: str) -> str:
+    """Hex sha256 of url + content + title, used for content dedupe."""
+    base = (url or "") + (content or "") + (title or "")
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -30,7 +38,26 @@ class FeedSource(models.Model):
 
     # optional fetch hints (in seconds or cron rule in config)
     fetch_interval_seconds = models.IntegerField(null=True, blank=True)
+    # learned schedule when fetch_interval_seconds is unset (see feeds.cadence)
+    next_fetch_at = models.DateTimeField(null=True, blank=True)
+    idle_fetches = models.PositiveIntegerField(default=0)
+    cadence = models.JSONField(default=dict, blank=True)
+    # set by the refresh views, consumed by the feed scheduler
+    refresh_requested_at = models.DateTimeField(null=True, blank=True)
+    # single-flight refresh lease and the last refresh outcome (see feeds.leases)
+    refresh_lease_until = models.DateTimeField(null=True, blank=True)
+    refresh_lease_token = models.CharField(max_length=32, blank=True, default="")
+    last_refresh = models.JSONField(default=dict, blank=True)
+    # high-water mark: newest external_ids seen, lets ingestion stop at known items
+    recent_external_ids = models.JSONField(default=list, blank=True)
     logo_url = models.URLField(max_length=1000, blank=True, null=True)
+    # bumped whenever this source's items change; keys the page cache (see feeds.page_cache)
+    items_version = models.PositiveIntegerField(default=0)
+    items_changed_at = models.DateTimeField(null=True, blank=True)
+    # subscriptions (see timeline.py); past FEEDS_TIMELINE_FANOUT_LIMIT the
+    # source is merged into timelines at read time instead of copied into them
+    subscriber_count = models.PositiveIntegerField(default=0)
+    fanout_on_read = models.BooleanField(default=False)
 
     def __str__(self):
         return self.name
@@ -52,6 +79,17 @@ class FeedItem(TimestampedModel):
 
     # helper for dedupe by content — store hex sha256 of (url || content)
     content_hash = models.CharField(max_length=64, db_index=True, blank=True, null=True)
+    # 64-bit SimHash of the text, for near-duplicate detection (see dedupe.py)
+    simhash = models.BigIntegerField(null=True, blank=True)
+    # sha256 of the normalized title + text, URL-independent, so exact
+    # syndicated copies on other sources match (see dedupe.py)
+    text_hash = models.CharField(max_length=64, db_index=True, blank=True, null=True)
+    # set on syndicated copies; points at the cluster's representative item
+    duplicate_of = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="duplicates"
+    )
+    # raw (and possibly content) live compressed in FeedItemPayload
+    externalized = models.BooleanField(default=False)
 
 
     class Meta:
@@ -61,21 +99,53 @@ class FeedItem(TimestampedModel):
         ordering = ["-published_at", "-fetched_at"]
         indexes = [
             models.Index(fields=["published_at"]),
-            models.Index(fields=["is_active"]),
             models.Index(fields=["content_hash"]),
+            # feed_list keyset pages: filter columns first, then the
+            # (published_at, fetched_at, id) ordering
+            models.Index(
+                fields=["is_active", "-published_at", "-fetched_at", "-id"], name="feeditem_active_recent_idx",
+            ),
+            models.Index(
+                fields=["source", "is_active", "-published_at", "-fetched_at", "-id"],
+                name="feeditem_source_recent_idx",
+            ),
+            # retention: per-source age / count cut-offs (see retention.py)
+            models.Index(fields=["source", "-fetched_at", "-id"], name="feeditem_source_fetched_idx"),
         ]
 
     def __str__(self):
         return f"{self.source.slug}:{self.external_id}"
 
+    def _payload(self):
+        if not self.externalized:
+            return None
+        try:
+            return self.payload
+        except FeedItemPayload.DoesNotExist:
+            return None
+
+    @property
+    def full_content(self):
+        """content, loading it from side storage if it was externalized."""
+        payload = self._payload()
+        if payload is not None and payload.content_data is not None:
+            return payload.content
+        return self.content
+
+    @property
+    def raw_payload(self):
+        """raw, loading it from side storage if it was externalized."""
+        payload = self._payload()
+        if payload is not None:
+            return payload.raw
+        return self.raw
+
     def compute_and_set_content_hash(self):
         """
         Compute a stable hash from url + content + title (fallback).
         Call this before saving if you want content-based deduplication.
         """
-        base = (self.url or "") + (self.content or "") + (self.title or "")
-        h = hashlib.sha256(base.encode("utf-8")).hexdigest()
-        self.content_hash = h
+        self.content_hash = compute_content_hash(self.url, self.full_content, self.title)
         return self.content_hash
 
     def save(self, *args, **kwargs):
@@ -87,3 +157,174 @@ class FeedItem(TimestampedModel):
                 # fail-safe: don't block save if hashing fails
                 self.content_hash = None
         super().save(*args, **kwargs)
+
+
+class SimhashBand(models.Model):
+    """
+    LSH index over FeedItem.simhash: one row per 16-bit band of each
+    cluster representative, so near-duplicate candidates are an indexed
+    lookup instead of a scan (see dedupe.py).
+    """
+    key = models.BigIntegerField()
+    item = models.ForeignKey(FeedItem, on_delete=models.CASCADE, related_name="simhash_bands")
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "fetched_at"]),
+            models.Index(fields=["fetched_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.key}:{self.item_id}"
+
+
+class FeedItemPayload(models.Model):
+    """
+    Compressed side storage for the large FeedItem columns, so list
+    queries on the hot table only read narrow rows. Loaded lazily through
+    FeedItem.raw_payload / FeedItem.full_content.
+    """
+    item = models.OneToOneField(FeedItem, primary_key=True, on_delete=models.CASCADE, related_name="payload")
+    codec = models.CharField(max_length=10, default="zlib")
+    raw_data = models.BinaryField(null=True, blank=True)
+    content_data = models.BinaryField(null=True, blank=True)
+
+    def __str__(self):
+        return f"payload:{self.item_id}"
+
+    @classmethod
+    def pack(cls, item, raw, content=None, codec=None):
+        from . import payloads
+        codec = codec or payloads.default_codec()
+        return cls(
+            item=item,
+            codec=codec,
+            raw_data=payloads.pack_json(raw, codec),
+            content_data=payloads.pack_text(content, codec),
+        )
+
+    @property
+    def raw(self):
+        from . import payloads
+        return payloads.unpack_json(self.raw_data, self.codec)
+
+    @property
+    def content(self):
+        from . import payloads
+        return payloads.unpack_text(self.content_data, self.codec)
+
+
+class MediaAsset(TimestampedModel):
+    """
+    A remote image (FeedItem.image_url, FeedSource.logo_url) and its local
+    thumbnails. One row per URL; the files are named by content hash, so
+    the same image behind different URLs is stored once (see thumbnails.py).
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
+    url_hash = models.CharField(max_length=40, unique=True)  # sha1(url), the public key
+    url = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    format = models.CharField(max_length=10, blank=True)  # thumbnail encoding: webp / jpeg
+    width = models.PositiveIntegerField(null=True, blank=True)   # of the original
+    height = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"{self.status}:{self.url}"
+
+
+class ReadChunk(models.Model):
+    """
+    One 65536-id range of a user's read-items bitmap (see readstate.py).
+    data is a serialized core.bitmap container.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_read_chunks")
+    chunk = models.PositiveIntegerField()  # FeedItem.id >> 16
+    data = models.BinaryField()
+    cardinality = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "chunk"], name="uniq_read_chunk"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.chunk} ({self.cardinality})"
+
+
+class ReadMarker(models.Model):
+    """
+    "Mark all read" for a user: every item at or below this feed_list
+    position (published_at, fetched_at, id), in one source or in all of
+    them (source=None), counts as read.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_read_markers")
+    source = models.ForeignKey(FeedSource, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    published_at = models.DateTimeField(null=True, blank=True)
+    fetched_at = models.DateTimeField()
+    item_id = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "source"], condition=models.Q(source__isnull=False), name="uniq_read_marker_source",
+            ),
+            models.UniqueConstraint(
+                fields=["user"], condition=models.Q(source__isnull=True), name="uniq_read_marker_all",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.source_id or 'all'}@{self.item_id}"
+
+
+class Subscription(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_subscriptions")
+    source = models.ForeignKey(FeedSource, on_delete=models.CASCADE, related_name="subscriptions")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "source"], name="uniq_subscription"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.source_id}"
+
+
+class TimelineEntry(models.Model):
+    """
+    An item of a subscribed source, copied into the user's timeline at
+    ingest (fan-out on write, see timeline.py). The sort keys are
+    denormalized so a page is one range scan of timeline_user_recent_idx.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="feed_timeline")
+    item = models.ForeignKey(FeedItem, on_delete=models.CASCADE, related_name="+")
+    source = models.ForeignKey(FeedSource, on_delete=models.CASCADE, related_name="+")
+    published_at = models.DateTimeField(null=True, blank=True)
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "item"], name="uniq_timeline_item"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-published_at", "-fetched_at", "-item"], name="timeline_user_recent_idx"),
+            # unsubscribe / heavy-source cleanup
+            models.Index(fields=["source", "user"], name="timeline_source_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.item_id}"
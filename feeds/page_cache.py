@@ -0,0 +1,152 @@
+"""
+Fragment cache for feed_list / feed_detail.
+
+Each FeedSource carries items_version, bumped in the DB whenever its
+visible items change (new rows at ingest, admin edits). Views read the
+enabled sources and their versions from a snapshot cached for
+FEEDS_VERSION_TTL seconds, so a cached page costs no queries; the
+snapshot is dropped at once in the process that bumps, and other
+processes (the feed scheduler writes from its own) see the bump within
+the TTL. Fragments are rendered without the request, so nothing
+user-specific is cached; the per-user page shell around them is cheap.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import FeedItem, FeedSource
+from .signals import in_bulk_delete, items_ingested
+
+SNAPSHOT_KEY = "feeds:sources"
+# FeedSource fields rendered in the fragments (sidebar, cards, detail)
+SOURCE_FIELDS = ("id", "slug", "name", "logo_url")
+
+
+def page_cache():
+    return caches["feeds"]
+
+
+@dataclass
+class SourceSnapshot:
+    """Enabled sources with their item versions, as one cacheable value."""
+    sources: List[Dict]
+    by_id: Dict[int, Dict] = field(init=False)
+    meta: str = field(init=False)
+
+    def __post_init__(self):
+        self.by_id = {s["id"]: s for s in self.sources}
+        self.meta = _digest([[s[f] for f in SOURCE_FIELDS] for s in self.sources])
+
+    def by_slug(self, slug: str) -> Optional[Dict]:
+        return next((s for s in self.sources if s["slug"] == slug), None)
+
+    def version(self, source_id: Optional[int] = None):
+        """One source's items_version, or all of them for the unfiltered list."""
+        if source_id is not None:
+            source = self.by_id.get(source_id)
+            return source["items_version"] if source else None
+        return [s["items_version"] for s in self.sources]
+
+    def changed_at(self, source_id: Optional[int] = None):
+        if source_id is not None:
+            source = self.by_id.get(source_id)
+            return source["items_changed_at"] if source else None
+        return max((s["items_changed_at"] for s in self.sources if s["items_changed_at"]), default=None)
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()[:20]
+
+
+def source_snapshot() -> SourceSnapshot:
+    snapshot = page_cache().get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = SourceSnapshot(list(
+            FeedSource.objects.filter(enabled=True).order_by("id")
+            .values(*SOURCE_FIELDS, "items_version", "items_changed_at")
+        ))
+        page_cache().set(SNAPSHOT_KEY, snapshot, getattr(settings, "FEEDS_VERSION_TTL", 5))
+    return snapshot
+
+
+def list_key(snapshot: SourceSnapshot, source: Optional[Dict], cursor: Optional[str]) -> str:
+    source_id = source["id"] if source else None
+    return "feeds:list:" + _digest((snapshot.meta, source_id, cursor or "", snapshot.version(source_id)))
+
+
+def detail_key(pk: int) -> str:
+    return f"feeds:detail:{pk}"
+
+
+def bump_versions(source_ids=(), item_ids=()) -> int:
+    """
+    Invalidate everything cached for these sources and for the sources
+    of these items, in one UPDATE. Call after writes that bypass the
+    signals below (queryset.update / bulk deletes).
+    """
+    updated = FeedSource.objects.filter(Q(id__in=list(source_ids)) | Q(items__id__in=list(item_ids))).update(
+        items_version=F("items_version") + 1, items_changed_at=timezone.now(),
+    )
+    page_cache().delete(SNAPSHOT_KEY)
+    return updated
+
+
+def conditional_response(request, etag: str, changed_at):
+    """
+    304 when the browser's copy is current. Pages that will show flash
+    messages are always rendered so the messages aren't swallowed.
+    """
+    if request.COOKIES.get("messages"):
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(changed_at.timestamp()) if changed_at else None,
+    )
+
+
+def page_etag(request, key: str) -> str:
+    # the page shell differs per user (nav, csrf); the session cookie
+    # stands in for the user without a session lookup
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, "")
+    return '"%s"' % _digest((key, session))
+
+
+def with_validators(response, etag: str, changed_at):
+    response.headers["ETag"] = etag
+    if changed_at:
+        response.headers["Last-Modified"] = http_date(changed_at.timestamp())
+    # revalidate every time; 304s are cheap
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ----------------------------
+# Invalidation
+# ----------------------------
+@receiver(items_ingested, dispatch_uid="feeds.page_cache.ingested")
+def _items_ingested(sender, source, items, **kwargs):
+    # a syndicated copy changes its representative's detail page too
+    bump_versions([source.id], {obj.duplicate_of_id for obj in items if obj.duplicate_of_id})
+
+
+@receiver(post_save, sender=FeedItem, dispatch_uid="feeds.page_cache.item_saved")
+@receiver(post_delete, sender=FeedItem, dispatch_uid="feeds.page_cache.item_deleted")
+def _item_changed(sender, instance, **kwargs):
+    if not kwargs.get("raw") and not in_bulk_delete():
+        bump_versions([instance.source_id], [instance.duplicate_of_id] if instance.duplicate_of_id else ())
+
+
+@receiver(post_save, sender=FeedSource, dispatch_uid="feeds.page_cache.source_saved")
+@receiver(post_delete, sender=FeedSource, dispatch_uid="feeds.page_cache.source_deleted")
+def _source_changed(sender, instance, update_fields=None, **kwargs):
+    # fetch bookkeeping (last_fetched, validators, ...) isn't rendered
+    if update_fields is None or set(update_fields) & {"name", "slug", "logo_url", "enabled"}:
+        page_cache().delete(SNAPSHOT_KEY)
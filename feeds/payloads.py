@@ -0,0 +1,51 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is always available
+    zstandard = None
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd payloads")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def pack_json(value, codec: str):
+    if value is None:
+        return None
+    return compress(json.dumps(value, cls=DjangoJSONEncoder).encode("utf-8"), codec)
+
+
+def unpack_json(data, codec: str):
+    if data is None:
+        return None
+    return json.loads(decompress(bytes(data), codec))
+
+
+def pack_text(value, codec: str):
+    if value is None:
+        return None
+    return compress(value.encode("utf-8"), codec)
+
+
+def unpack_text(data, codec: str):
+    if data is None:
+        return None
+    return decompress(bytes(data), codec).decode("utf-8")
@@ -0,0 +1,186 @@
+"""
+Per-user read state for feed items.
+
+Items read one by one are kept as a compressed bitmap over FeedItem.id
+(core.bitmap), one ReadChunk row per 65536-id range. A user's state
+grows with what they have read, not with users x items, and a page of
+items only loads the ranges its ids fall in (usually one or two rows,
+ids being roughly chronological).
+
+"Mark all read" doesn't touch the bitmap: it moves a ReadMarker, a
+feed_list position (for one source or for all) at and below which
+everything counts as read. The unread filter checks candidates against
+both in memory while paging in feed order, and stops at the marker.
+"""
+import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from core.bitmap import IdBitmap, chunk_from_bytes, chunk_of
+from core.pagination import encode_cursor, keyset_page
+
+from .models import FeedSource, ReadChunk, ReadMarker
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+Position = Tuple[bool, int, int, int]
+
+
+def position(published_at, fetched_at, item_id: int) -> Position:
+    """
+    Sort key of a row in feed_list order (FEED_ORDERING: newest first,
+    NULL published_at last): a larger key is further down the list.
+    """
+    return (
+        published_at is None,
+        -((published_at - _EPOCH) // _MICROSECOND) if published_at is not None else 0,
+        -((fetched_at - _EPOCH) // _MICROSECOND),
+        -item_id,
+    )
+
+
+def item_position(item) -> Position:
+    return position(item.published_at, item.fetched_at, item.pk)
+
+
+class ReadState:
+    """
+    One user's read state, loaded lazily: markers up front (a few rows),
+    bitmap ranges as items are checked.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.bitmap = IdBitmap()
+        self._loaded = set()
+        self.markers: Dict[Optional[int], Position] = {
+            source_id: position(published_at, fetched_at, item_id)
+            for source_id, published_at, fetched_at, item_id in ReadMarker.objects.filter(user=user).values_list(
+                "source_id", "published_at", "fetched_at", "item_id",
+            )
+        }
+
+    def load(self, item_ids: Iterable[int]):
+        """Fetch the bitmap ranges covering item_ids that aren't loaded yet."""
+        needed = {chunk_of(pk) for pk in item_ids} - self._loaded
+        if not needed:
+            return
+        for key, data in ReadChunk.objects.filter(user=self.user, chunk__in=needed).values_list("chunk", "data"):
+            self.bitmap.set_chunk(key, chunk_from_bytes(bytes(data)))
+        self._loaded |= needed
+
+    def covered(self, item, scopes: Sequence[Optional[int]]) -> bool:
+        """Is the item at or below the marker of any of these scopes (source ids, None = all)?"""
+        key = None
+        for scope in scopes:
+            marker = self.markers.get(scope)
+            if marker is not None:
+                key = key or item_position(item)
+                if key >= marker:
+                    return True
+        return False
+
+    def is_read(self, item) -> bool:
+        self.load([item.pk])
+        return item.pk in self.bitmap or self.covered(item, (None, item.source_id))
+
+    def unread(self, items: Sequence) -> List:
+        self.load(item.pk for item in items)
+        return [item for item in items if not self.is_read(item)]
+
+
+def unread_page(state: ReadState, queryset, ordering: Sequence[str], cursor: Optional[str], limit: int,
+                source_id: Optional[int] = None):
+    """
+    keyset_page of the user's unread rows of `queryset` (feed_list order,
+    within one source or all). Rows are checked in batches; scanning
+    ends at the list's marker, since everything below it is read, or
+    after FEEDS_UNREAD_SCAN_LIMIT rows (the cursor then resumes there).
+    """
+    scan_limit = getattr(settings, "FEEDS_UNREAD_SCAN_LIMIT", 2000)
+    scopes = (None,) if source_id is None else (None, source_id)
+    rows: List = []
+    scanned = 0
+    while True:
+        batch, next_cursor = keyset_page(queryset, ordering, cursor, limit + 1)
+        state.load(item.pk for item in batch)
+        for item in batch:
+            if state.covered(item, scopes):
+                return rows, None
+            if not state.is_read(item):
+                if len(rows) == limit:
+                    return rows, encode_cursor(rows[-1], ordering)
+                rows.append(item)
+        scanned += len(batch)
+        if next_cursor is None:
+            return rows, None
+        if scanned >= scan_limit:
+            return rows, encode_cursor(batch[-1], ordering)
+        cursor = next_cursor
+
+
+def mark_read(user, item_ids: Iterable[int]) -> int:
+    """Add items to the user's bitmap; returns how many weren't read before."""
+    ids = {int(pk) for pk in item_ids}
+    if not ids:
+        return 0
+    keys = {chunk_of(pk) for pk in ids}
+    try:
+        return _merge(user, ids, keys)
+    except IntegrityError:
+        # a concurrent first write of the same range; merge into theirs
+        return _merge(user, ids, keys)
+
+
+def _merge(user, ids, keys) -> int:
+    with transaction.atomic():
+        rows = {
+            row.chunk: row
+            for row in ReadChunk.objects.select_for_update().filter(user=user, chunk__in=keys)
+        }
+        bitmap = IdBitmap()
+        for key, row in rows.items():
+            bitmap.set_chunk(key, chunk_from_bytes(bytes(row.data)))
+        added = bitmap.update(ids)
+        if not added:
+            return 0
+
+        changed, created = [], []
+        for key in keys:
+            cardinality = bitmap.chunk_cardinality(key)
+            row = rows.get(key)
+            if row is None:
+                created.append(ReadChunk(user=user, chunk=key, data=bitmap.chunk_bytes(key), cardinality=cardinality))
+            elif row.cardinality != cardinality:
+                row.data, row.cardinality = bitmap.chunk_bytes(key), cardinality
+                changed.append(row)
+        ReadChunk.objects.bulk_create(created)
+        for row in changed:
+            row.save(update_fields=["data", "cardinality", "updated_at"])
+        return added
+
+
+def mark_all_read(user, queryset, ordering: Sequence[str], cursor: Optional[str] = None,
+                  source: Optional[FeedSource] = None) -> bool:
+    """
+    Mark everything listed by `queryset` from `cursor` down (the whole
+    list without one) as read, for one source or all. The marker only
+    ever moves up the list. False if there was nothing to mark.
+    """
+    rows, _ = keyset_page(queryset.only("id", "published_at", "fetched_at"), ordering, cursor, 1)
+    if not rows:
+        return False
+    first = rows[0]
+    new = item_position(first)
+    with transaction.atomic():
+        marker = ReadMarker.objects.select_for_update().filter(user=user, source=source).first()
+        if marker is not None and position(marker.published_at, marker.fetched_at, marker.item_id) <= new:
+            return True
+        marker = marker or ReadMarker(user=user, source=source)
+        marker.published_at, marker.fetched_at, marker.item_id = first.published_at, first.fetched_at, first.pk
+        marker.save()
+    return True
+
@@ -0,0 +1,199 @@
+"""
+Retention for FeedItem: per-source limits on age and item count, with
+expired rows exported to gzipped JSONL segments before they are deleted.
+
+Policies come from FEEDS_RETENTION_MAX_AGE_DAYS / FEEDS_RETENTION_MAX_ITEMS,
+overridden per source by config["retention_max_age_days"] and
+config["retention_max_items"] (0 disables a limit). Age counts from
+fetched_at, so a backdated entry isn't dropped the moment it arrives.
+Never expired: items a Note points at, and the source's high-water mark
+(recent_external_ids), which would otherwise be re-ingested on the next
+fetch. Driven by `manage.py apply_feed_retention`.
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from core.pagination import keyset_filter
+from journal.models import Note
+from search.index import remove_objects
+
+from . import page_cache
+from .dedupe import prune_bands
+from .models import FeedItem, FeedSource
+from .signals import bulk_delete
+
+logger = logging.getLogger("insightvault.feeds")
+
+# newest first; the last kept row bounds the max_items cut
+COUNT_ORDERING = ["-fetched_at", "-id"]
+
+
+@dataclass
+class Policy:
+    max_age_days: int = 0
+    max_items: int = 0
+
+    @classmethod
+    def for_source(cls, source: FeedSource) -> "Policy":
+        config = source.config or {}
+        return cls(
+            max_age_days=int(config.get(
+                "retention_max_age_days", getattr(settings, "FEEDS_RETENTION_MAX_AGE_DAYS", 0)) or 0),
+            max_items=int(config.get(
+                "retention_max_items", getattr(settings, "FEEDS_RETENTION_MAX_ITEMS", 0)) or 0),
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(self.max_age_days or self.max_items)
+
+
+@dataclass
+class RetentionResult:
+    slug: str
+    expired: int = 0        # rows matching the policy (what a dry run reports)
+    archived: int = 0       # rows exported and deleted
+    segments: int = 0
+    seconds: float = 0.0
+
+
+def expired_items(source: FeedSource, policy: Policy):
+    """Rows of `source` past its policy, minus the ones always kept."""
+    items = FeedItem.objects.filter(source=source)
+    expired = Q(pk__in=[])
+    if policy.max_age_days:
+        expired |= Q(fetched_at__lt=timezone.now() - timezone.timedelta(days=policy.max_age_days))
+    if policy.max_items:
+        kept = items.order_by(*COUNT_ORDERING).values_list("fetched_at", "id")
+        last_kept = next(iter(kept[policy.max_items - 1:policy.max_items]), None)
+        if last_kept:
+            expired |= keyset_filter(COUNT_ORDERING, last_kept)
+    return (
+        items.filter(expired)
+        .exclude(Exists(Note.objects.filter(feed_item=OuterRef("pk"))))
+        .exclude(external_id__in=source.recent_external_ids or [])
+    )
+
+
+def archive_row(item: FeedItem) -> Dict:
+    row = {field.attname: getattr(item, field.attname) for field in FeedItem._meta.concrete_fields}
+    row.pop("externalized")
+    row.update(source=item.source.slug, raw=item.raw_payload, content=item.full_content)
+    return row
+
+
+class SegmentWriter:
+    """
+    Appends archived rows to <archive_dir>/<source>/<run>-<n>.jsonl.gz.
+    Each chunk is written as its own gzip member and fsynced before the
+    rows are deleted, so a segment is readable (gzip concatenates
+    members) even if the run dies halfway. A crash between the write and
+    the delete archives those rows twice on the next run, never zero times.
+    """
+
+    def __init__(self, directory: Path, segment_rows: int):
+        self.directory = Path(directory)
+        self.segment_rows = segment_rows
+        self.stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+        self.segments = 0
+        self._rows_in_segment = segment_rows  # opens a segment on first write
+        self.path: Optional[Path] = None
+
+    def write(self, rows: List[Dict]):
+        if self._rows_in_segment >= self.segment_rows:
+            self.segments += 1
+            self._rows_in_segment = 0
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.path = self.directory / f"{self.stamp}-{self.segments:04d}.jsonl.gz"
+        data = "".join(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(gzip.compress(data))
+            f.flush()
+            os.fsync(f.fileno())
+        self._rows_in_segment += len(rows)
+
+
+def delete_items(ids: List[int]):
+    """
+    Delete a batch of FeedItems with QuerySet.delete(), so every relation
+    gets its own on_delete. The per-item post_delete work (a search
+    unindex and a page cache bump each) is muted and done once for the
+    batch instead.
+    """
+    source_ids = list(FeedItem.objects.filter(pk__in=ids).values_list("source_id", flat=True).distinct())
+    with bulk_delete():
+        FeedItem.objects.filter(pk__in=ids).only("id", "source_id", "duplicate_of_id").delete()
+    remove_objects("feeditem", ids)
+    page_cache.bump_versions(source_ids)
+
+
+def apply_retention(
+    source: FeedSource,
+    dry_run: bool = False,
+    chunk: Optional[int] = None,
+    archive_dir: Optional[Path] = None,
+    progress: Optional[Callable[[RetentionResult], None]] = None,
+) -> RetentionResult:
+    """
+    Export and delete `source`'s expired items, `chunk` rows per
+    transaction so writers are only blocked briefly.
+    """
+    result = RetentionResult(source.slug)
+    policy = Policy.for_source(source)
+    if not policy.active:
+        return result
+    started = time.perf_counter()
+    expired = expired_items(source, policy)
+    result.expired = expired.count()
+    if dry_run or not result.expired:
+        result.seconds = time.perf_counter() - started
+        return result
+
+    chunk = chunk or getattr(settings, "FEEDS_RETENTION_CHUNK", 500)
+    writer = SegmentWriter(
+        Path(archive_dir or settings.FEEDS_ARCHIVE_DIR) / source.slug,
+        getattr(settings, "FEEDS_ARCHIVE_SEGMENT_ROWS", 50_000),
+    )
+    last_pk = 0
+    while True:
+        rows = list(expired.filter(pk__gt=last_pk).order_by("pk").select_related("source", "payload")[:chunk])
+        if not rows:
+            break
+        writer.write([archive_row(item) for item in rows])
+        with transaction.atomic():
+            delete_items([item.pk for item in rows])
+        last_pk = rows[-1].pk
+        result.archived += len(rows)
+        result.segments = writer.segments
+        result.seconds = time.perf_counter() - started
+        if progress:
+            progress(result)
+
+    logger.info(
+        "Archived %d items of %s in %.1f s", result.archived, source.slug, result.seconds,
+        extra={"event": "feed_retention", "source": source.slug, "archived": result.archived,
+               "segments": result.segments, "duration_ms": round(result.seconds * 1000, 2)},
+    )
+    return result
+
+
+def apply_all(sources=None, dry_run: bool = False, **kwargs) -> List[RetentionResult]:
+    sources = FeedSource.objects.order_by("id") if sources is None else sources
+    results = [apply_retention(source, dry_run=dry_run, **kwargs) for source in sources]
+    if not dry_run and any(r.archived for r in results):
+        # removed representatives surface their copies in other sources' lists
+        page_cache.bump_versions(FeedSource.objects.values_list("id", flat=True))
+        prune_bands()
+    return results
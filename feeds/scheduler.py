@@ -0,0 +1,211 @@
+import heapq
+import random
+import time
+from datetime import datetime, timezone as dt_timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from . import cadence, leases
+from .fetchers import parse_pool
+from .models import FeedSource
+from .services import HostLimiter, RefreshResult, finish_refresh, submit_refresh
+
+
+def base_interval(source: FeedSource) -> float:
+    """
+    Seconds between fetches for a healthy source: fetch_interval_seconds,
+    else the interval last learned from its cadence (see cadence.py).
+    """
+    if source.fetch_interval_seconds:
+        return float(source.fetch_interval_seconds)
+    learned = (source.cadence or {}).get("interval") if cadence.enabled() else None
+    return float(learned or getattr(settings, "FEEDS_DEFAULT_FETCH_INTERVAL", 900))
+
+
+def backoff_interval(source: FeedSource, failures: int) -> float:
+    """
+    Exponential backoff for a failing source: interval * 2^failures,
+    capped at FEEDS_MAX_BACKOFF_SECONDS.
+    """
+    cap = getattr(settings, "FEEDS_MAX_BACKOFF_SECONDS", 6 * 3600)
+    return min(base_interval(source) * (2 ** min(failures, 16)), max(cap, base_interval(source)))
+
+
+def with_jitter(seconds: float, jitter: Optional[float] = None) -> float:
+    """Spread fetches out by +/- `jitter` (fraction) so sources don't align."""
+    if jitter is None:
+        jitter = getattr(settings, "FEEDS_SCHEDULER_JITTER", 0.1)
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+class FeedScheduler:
+    """
+    Keeps a priority queue of sources ordered by next-due time and
+    dispatches due fetches to a worker pool.
+
+    Fetch + parse run on the pool (see services.fetch_source); results are
+    saved on the scheduler thread as they complete. Sources queued from the
+    refresh views (refresh_requested_at) jump to the front of the queue.
+    After a successful fetch a source comes back after its
+    fetch_interval_seconds, or the interval learned from its publishing
+    cadence (see cadence.py). Each fetch holds the source's refresh lease (see leases.py); a source
+    someone else is refreshing is skipped until its next interval.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, tick_seconds: float = 5.0):
+        if max_workers is None:
+            max_workers = getattr(settings, "FEEDS_REFRESH_MAX_WORKERS", 8)
+        self.max_workers = max(1, max_workers)
+        self.tick_seconds = tick_seconds
+        self.limiter = HostLimiter()
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="feeds-scheduler")
+
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}     # source id -> current due time (heap entries may be stale)
+        self._failures: Dict[int, int] = {}
+        self._in_flight: Dict = {}          # future -> source
+        self._leases: Dict[int, str] = {}   # source id -> lease token of in-flight fetches
+        self._stopped = False
+
+    # ----------------------------
+    # Queue bookkeeping
+    # ----------------------------
+    def schedule(self, source_id: int, due: float):
+        self._due[source_id] = due
+        heapq.heappush(self._heap, (due, source_id))
+
+    def next_due(self) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def _busy_ids(self):
+        return {source.id for source in self._in_flight.values()}
+
+    def sync_sources(self, now: float):
+        """
+        Pick up new, removed and manually queued sources from the DB.
+        """
+        busy = self._busy_ids()
+        seen = set()
+        requested = []
+        for source in FeedSource.objects.filter(enabled=True).only(
+            "id", "last_fetched", "fetch_interval_seconds", "refresh_requested_at", "next_fetch_at", "cadence",
+        ):
+            seen.add(source.id)
+            if source.id in busy:
+                continue
+            if source.refresh_requested_at:
+                requested.append(source.id)
+                self.schedule(source.id, now)
+            elif source.id not in self._due:
+                if source.next_fetch_at and not source.fetch_interval_seconds and cadence.enabled():
+                    due = source.next_fetch_at.timestamp()
+                elif source.last_fetched:
+                    due = source.last_fetched.timestamp() + with_jitter(base_interval(source))
+                else:
+                    due = now
+                self.schedule(source.id, due)
+
+        if requested:
+            FeedSource.objects.filter(id__in=requested).update(refresh_requested_at=None)
+        for source_id in set(self._due) - seen:
+            # disabled or deleted since last sync; stale heap entries are skipped
+            self._due.pop(source_id, None)
+            self._failures.pop(source_id, None)
+
+    def pop_due(self, now: float) -> List[int]:
+        due_ids = []
+        free = self.max_workers - len(self._in_flight)
+        while free > 0:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            _, source_id = heapq.heappop(self._heap)
+            del self._due[source_id]
+            due_ids.append(source_id)
+            free -= 1
+        return due_ids
+
+    # ----------------------------
+    # Dispatch + completion
+    # ----------------------------
+    def dispatch(self, source_ids: List[int]):
+        for source in FeedSource.objects.filter(id__in=source_ids, enabled=True):
+            token = leases.acquire(source.id)
+            if token is None:
+                # a manual refresh has it; that fetch counts as this one
+                self.schedule(source.id, time.time() + with_jitter(base_interval(source)))
+                continue
+            self._leases[source.id] = token
+            future = submit_refresh(self.pool, source, self.limiter)
+            self._in_flight[future] = source
+
+    def complete(self, future, now: float) -> RefreshResult:
+        source = self._in_flight.pop(future)
+        result = finish_refresh(source, future)
+        leases.release(source.id, self._leases.pop(source.id), result.outcome())
+        if result.status == "error":
+            failures = self._failures.get(source.id, 0) + 1
+            self._failures[source.id] = failures
+            delay = backoff_interval(source, failures)
+        else:
+            self._failures.pop(source.id, None)
+            delay = cadence.record(source, result.new_items, datetime.fromtimestamp(now, dt_timezone.utc)).interval
+        self.schedule(source.id, now + with_jitter(delay))
+        return result
+
+    def tick(self, now: Optional[float] = None) -> List[RefreshResult]:
+        """
+        One scheduler pass: sync, dispatch what is due, then wait up to
+        tick_seconds for in-flight fetches and save those that finished.
+        """
+        now = time.time() if now is None else now
+        self.sync_sources(now)
+        self.dispatch(self.pop_due(now))
+
+        results = []
+        if self._in_flight:
+            done, _ = wait(list(self._in_flight), timeout=self.tick_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.append(self.complete(future, time.time()))
+        return results
+
+    def run_forever(self, on_result=None):
+        try:
+            while not self._stopped:
+                started = time.time()
+                for result in self.tick():
+                    if on_result:
+                        on_result(result)
+                if not self._in_flight:
+                    due = self.next_due()
+                    sleep_for = self.tick_seconds if due is None else min(self.tick_seconds, due - time.time())
+                    remaining = sleep_for - (time.time() - started)
+                    if remaining > 0:
+                        time.sleep(remaining)
+        finally:
+            self.pool.shutdown(wait=True)
+            parse_pool.shutdown_pool()
+            for source_id, token in self._leases.items():
+                leases.release(source_id, token)
+
+    def run_once(self) -> List[RefreshResult]:
+        """Fetch every source that is currently due, then return."""
+        now = time.time()
+        self.sync_sources(now)
+        results = []
+        while True:
+            self.dispatch(self.pop_due(now))
+            if not self._in_flight:
+                break
+            done, _ = wait(list(self._in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                results.append(self.complete(future, time.time()))
+        return results
+
+    def stop(self):
+        self._stopped = True
+
@@ -1,13 +1,58 @@
-from typing import List, Dict
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, fields
+from itertools import islice
+from typing import List, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import transaction
 
-from .models import FeedSource, FeedItem
+from . import leases, metrics
+from .dedupe import assign_duplicates, link_batch_duplicates, record_bands
+from .models import FeedSource, FeedItem, FeedItemPayload, compute_content_hash
+from .signals import items_ingested
+from .fetchers.rest import RESTFetcher
 from .fetchers.rss import RSSFetcher
-# from .fetchers.rest import RESTFetcher
 # from .fetchers.youtube import YouTubeFetcher
 # from .fetchers.twitter import TwitterFetcher
 
+logger = logging.getLogger("insightvault.feeds")
+
+
+@dataclass
+class RefreshResult:
+    """
+    Outcome of refreshing a single source.
+    status is "ok", "not_modified" (HTTP 304) or "error"; timings are in seconds.
+    fetch_seconds covers network + parsing; parse_seconds is the parsing share.
+    shared is set when the outcome is another caller's fetch (see leases.py).
+    """
+    slug: str
+    status: str = "ok"
+    new_items: int = 0
+    fetch_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    save_seconds: float = 0.0
+    http_status: Optional[int] = None
+    bytes: int = 0
+    error: str = ""
+    shared: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return self.fetch_seconds + self.save_seconds
+
+    def outcome(self) -> Dict:
+        """JSON-safe fields, as stored for callers sharing this fetch."""
+        outcome = asdict(self)
+        outcome.pop("shared")
+        return outcome
+
 
 def get_fetcher_for_source(source: FeedSource):
     """
@@ -16,8 +61,8 @@ def get_fetcher_for_source(source: FeedSource):
     """
     if source.api_type == FeedSource.ApiType.RSS:
         return RSSFetcher(source)
-    # elif source.api_type == FeedSource.ApiType.REST:
-    #     return RESTFetcher(source)
+    elif source.api_type == FeedSource.ApiType.REST:
+        return RESTFetcher(source)
     # elif source.api_type == FeedSource.ApiType.YOUTUBE:
     #     return YouTubeFetcher(source)
     # elif source.api_type == FeedSource.ApiType.TWITTER:
@@ -26,57 +71,414 @@ def get_fetcher_for_source(source: FeedSource):
         raise ValueError(f"Unsupported api_type: {source.api_type}")
 
 
+INGEST_BATCH_SIZE = 500
+
+
+def _chunked(values: List, size: int = INGEST_BATCH_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _existing_external_ids(source: FeedSource, external_ids: List[str]) -> Set[str]:
+    existing: Set[str] = set()
+    for chunk in _chunked(external_ids):
+        existing.update(
+            FeedItem.objects.filter(source=source, external_id__in=chunk)
+            .order_by()
+            .values_list("external_id", flat=True)
+        )
+    return existing
+
+
+def _build_feed_item(source: FeedSource, item: Dict, fetched_at) -> FeedItem:
+    obj = FeedItem(
+        source=source,
+        external_id=item["external_id"],
+        title=item["title"],
+        summary=item.get("summary", ""),
+        content=item.get("content", ""),
+        url=item.get("url", ""),
+        author=item.get("author", ""),
+        published_at=item.get("published_at"),
+        raw=item.get("raw"),
+        fetched_at=fetched_at,
+        image_url=item.get("image_url") or "",
+        video_url=item.get("video_url") or "",
+    )
+    # bulk_create bypasses FeedItem.save(), so hash here
+    obj.content_hash = compute_content_hash(obj.url, obj.content, obj.title)
+    return obj
+
+
+def payload_storage() -> str:
+    """FEEDS_PAYLOAD_STORAGE: "side" (compressed FeedItemPayload rows) or "inline"."""
+    return getattr(settings, "FEEDS_PAYLOAD_STORAGE", "side")
+
+
+def externalize(obj: FeedItem, include_content: Optional[bool] = None) -> FeedItemPayload:
+    """
+    Move obj.raw (and content, with FEEDS_PAYLOAD_EXTERNAL_CONTENT) into an
+    unsaved FeedItemPayload and blank them on obj. The payload is cached on
+    obj, so full_content / raw_payload keep working without a query.
+    """
+    if include_content is None:
+        include_content = getattr(settings, "FEEDS_PAYLOAD_EXTERNAL_CONTENT", False)
+    content = obj.content if include_content else None
+    payload = FeedItemPayload.pack(obj, obj.raw, content)
+    obj.raw = None
+    if include_content:
+        obj.content = ""
+    obj.externalized = True
+    obj.payload = payload
+    return payload
+
+
+def _merge_recent_ids(seen: List[str], previous: Optional[List[str]]) -> List[str]:
+    """Newest-first ids from this fetch, then the previous mark, capped."""
+    limit = getattr(settings, "FEEDS_KNOWN_IDS_LIMIT", 200)
+    merged = list(dict.fromkeys(seen + list(previous or [])))
+    return merged[:limit]
+
+
+def save_items(source: FeedSource, items: List[Dict], fetcher=None) -> int:
+    """
+    Persist already-fetched items for a source and bump last_fetched.
+
+    Known external_ids are looked up in one query per batch, and only the
+    missing items are inserted with bulk_create inside a single
+    transaction. Syndicated copies of an existing story are linked to it
+    via duplicate_of (see dedupe.py). ignore_conflicts covers a concurrent writer inserting the
+    same rows in between. With FEEDS_PAYLOAD_STORAGE = "side" the raw
+    entry goes to a compressed FeedItemPayload row instead of the hot table.
+    When the fetcher is passed, its response validators (ETag /
+    Last-Modified) are stored for the next conditional request.
+    Returns number of new items saved.
+    """
+    # Drop items without an id and duplicates within the same payload
+    unique: Dict[str, Dict] = {}
+    for item in items:
+        external_id = item.get("external_id")
+        if external_id and external_id not in unique:
+            unique[external_id] = item
+
+    existing = _existing_external_ids(source, list(unique))
+    fetched_at = timezone.now()
+
+    new_objs: List[FeedItem] = []
+    for external_id, item in unique.items():
+        if external_id in existing:
+            continue
+        try:
+            new_objs.append(_build_feed_item(source, item, fetched_at))
+        except Exception as e:
+            # Don’t block other items on malformed entries
+            logger.warning("Error saving feed item for %s: %s", source.slug, e,
+                           extra={"event": "feed_item_error", "source": source.slug, "external_id": external_id})
+
+    pending_duplicates = assign_duplicates(new_objs)
+    side_storage = payload_storage() == "side"
+    if side_storage:
+        for obj in new_objs:
+            externalize(obj)
+
+    inserted: List[FeedItem] = []
+    with transaction.atomic():
+        if new_objs:
+            FeedItem.objects.bulk_create(new_objs, batch_size=INGEST_BATCH_SIZE, ignore_conflicts=True)
+            # ignore_conflicts leaves pks unset; read them back. Rows skipped
+            # by a conflict keep the other writer's fetched_at, so they
+            # don't match here and aren't counted.
+            by_external_id = {obj.external_id: obj for obj in new_objs}
+            for chunk in _chunked(list(by_external_id)):
+                for external_id, pk in FeedItem.objects.filter(
+                    source=source, external_id__in=chunk, fetched_at=fetched_at,
+                ).order_by().values_list("external_id", "id"):
+                    obj = by_external_id[external_id]
+                    obj.pk = pk
+                    obj._state.adding = False
+                    inserted.append(obj)
+            if side_storage and inserted:
+                FeedItemPayload.objects.bulk_create(
+                    [obj.payload for obj in inserted], batch_size=INGEST_BATCH_SIZE,
+                )
+            link_batch_duplicates(pending_duplicates)
+            record_bands(inserted)
+
+        # Update last_fetched (+ validators, unless the server answered 304)
+        update_fields = ["last_fetched"]
+        source.last_fetched = timezone.now()
+        if unique:
+            source.recent_external_ids = _merge_recent_ids(list(unique), source.recent_external_ids)
+            update_fields.append("recent_external_ids")
+        if fetcher is not None and not fetcher.not_modified:
+            source.etag = fetcher.etag
+            source.last_modified = fetcher.last_modified
+            update_fields += ["etag", "last_modified"]
+        source.save(update_fields=update_fields)
+
+    metrics.record_ingest(
+        source,
+        new=len(inserted),
+        duplicates=sum(1 for obj in inserted if obj.duplicate_of_id),
+        # known items the fetcher skipped never reach this function
+        known=len(existing) + (fetcher.known_skipped if fetcher is not None else 0),
+    )
+    if inserted:
+        items_ingested.send(sender=FeedSource, source=source, items=inserted)
+    return len(inserted)
+
+
+def save_stream(source: FeedSource, fetcher, batch_size: Optional[int] = None) -> Tuple[int, float]:
+    """
+    Read a streaming fetcher's iter_items() and save_items() it in
+    batches of INGEST_BATCH_SIZE as it parses, so a large first ingest
+    holds at most two batches (the one being saved and the next) instead
+    of the whole feed. Validators are stored with the last batch only: a
+    read that fails midway is retried in full rather than answered 304.
+    Returns (new items saved, seconds spent saving).
+    """
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    limit = getattr(settings, "FEEDS_KNOWN_IDS_LIMIT", 200)
+    previous = source.recent_external_ids
+    head: List[str] = []
+    saved, save_seconds, batches = 0, 0.0, 0
+
+    items = fetcher.iter_items()
+    batch = list(islice(items, batch_size))
+    while True:
+        # look ahead one batch, so the last one is known when it is saved
+        following = list(islice(items, batch_size)) if batch else []
+        if len(head) < limit:
+            head.extend(item["external_id"] for item in batch if item.get("external_id"))
+        started = time.perf_counter()
+        saved += save_items(source, batch, None if following else fetcher)
+        save_seconds += time.perf_counter() - started
+        batches += 1
+        if not following:
+            break
+        batch = following
+
+    if batches > 1:
+        # each save_items() put its batch ahead of the previous ones; the
+        # high-water mark is the head of the feed
+        source.recent_external_ids = _merge_recent_ids(head, previous)
+        source.save(update_fields=["recent_external_ids"])
+    return saved, save_seconds
+
+
+def recent_external_ids(source: FeedSource, limit: Optional[int] = None) -> Set[str]:
+    """The newest external_ids stored for a source (one indexed query)."""
+    if limit is None:
+        limit = getattr(settings, "FEEDS_KNOWN_IDS_LIMIT", 200)
+    return set(
+        FeedItem.objects.filter(source=source)
+        .order_by("-published_at", "-fetched_at")
+        .values_list("external_id", flat=True)[:limit]
+    )
+
+
+def prepare_fetcher(source: FeedSource):
+    """
+    Build the fetcher for a source on the calling (DB-owning) thread.
+
+    The fetcher gets the source's high-water mark (recent external_ids) so
+    it can skip known items and stop after a run of them. Sources whose
+    feeds reorder old entries set config["reorders"] to keep reading the
+    whole feed.
+    """
+    fetcher = get_fetcher_for_source(source)
+    fetcher.known_ids = set(source.recent_external_ids or []) or recent_external_ids(source)
+    if not (source.config or {}).get("reorders"):
+        fetcher.known_run_length = getattr(settings, "FEEDS_KNOWN_RUN_LENGTH", 3)
+    return fetcher
+
+
 def fetch_and_save_items(source: FeedSource) -> int:
     """
     Fetch new items from a source and save them into DB.
     Returns number of new items saved.
     """
-    fetcher = get_fetcher_for_source(source)
+    fetcher = prepare_fetcher(source)
+    if fetcher.streaming:
+        return save_stream(source, fetcher)[0]
     items: List[Dict] = fetcher.fetch()
+    return save_items(source, items, fetcher)
 
-    new_count = 0
-    for item in items:
-        try:
-            FeedItem.objects.create(
-                source=source,
-                external_id=item["external_id"],
-                title=item["title"],
-                summary=item.get("summary", ""),
-                content=item.get("content", ""),
-                url=item.get("url", ""),
-                author=item.get("author", ""),
-                published_at=item.get("published_at"),
-                raw=item.get("raw"),
-                fetched_at=timezone.now(),
-                image_url=item.get("image_url", ""),
-                video_url=item.get("video_url", ""),
-            )
-            new_count += 1
-        except IntegrityError:
-            # Already exists (unique constraint)
-            continue
-        except Exception as e:
-            # Don’t block other items on unexpected errors
-            print(f"Error saving feed item for {source.slug}: {e}")
-            continue
 
-    # Update last_fetched
-    source.last_fetched = timezone.now()
-    source.save(update_fields=["last_fetched"])
+class HostLimiter:
+    """
+    Caps the number of in-flight fetches per host across worker threads.
+    """
+
+    def __init__(self, per_host: Optional[int] = None):
+        if per_host is None:
+            per_host = getattr(settings, "FEEDS_REFRESH_PER_HOST", 2)
+        self.per_host = max(1, per_host)
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
 
-    return new_count
+    def slot_for(self, source: FeedSource) -> threading.BoundedSemaphore:
+        host = urlparse(source.endpoint or "").netloc.lower()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
 
 
-def refresh_all_sources() -> int:
+def fetch_source(fetcher, limiter: Optional[HostLimiter] = None):
     """
-    Fetch + save for all enabled sources.
-    Returns total new items saved across sources.
+    Network + parse stage of a refresh (fetcher from prepare_fetcher).
+    Never touches the DB, so it is safe to run on a worker thread.
+    Returns (fetcher, items, fetch_seconds). Streaming fetchers are left
+    alone (items is None): finish_refresh reads and saves them batch by
+    batch (save_stream) so their items are never all held at once.
     """
-    total_new = 0
-    for source in FeedSource.objects.filter(enabled=True):
-        try:
-            total_new += fetch_and_save_items(source)
-        except Exception as e:
-            print(f"Failed to refresh {source.slug}: {e}")
+    if fetcher.streaming:
+        return fetcher, None, 0.0
+    slot = limiter.slot_for(fetcher.source) if limiter else nullcontext()
+    with slot:
+        started = time.perf_counter()
+        items = fetcher.fetch()
+        return fetcher, items, time.perf_counter() - started
+
+
+def submit_refresh(pool, source: FeedSource, limiter: Optional[HostLimiter] = None) -> Future:
+    """
+    Start a refresh: prepare_fetcher here, fetch_source on `pool`. A
+    source whose fetcher can't be built (e.g. an unsupported api_type)
+    gets an already-failed future, so finish_refresh reports it as an
+    error like any other failed fetch and the other sources carry on.
+    """
+    try:
+        fetcher = prepare_fetcher(source)
+    except Exception as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+    return pool.submit(fetch_source, fetcher, limiter)
+
+
+def finish_refresh(source: FeedSource, future: Future) -> RefreshResult:
+    """
+    Save stage of a refresh: persist the outcome of a fetch_source() future.
+    Must run on the thread that owns the DB connection. The result is
+    exported to /metrics and logged (see feeds/metrics.py).
+    """
+    result = RefreshResult(slug=source.slug)
+    try:
+        fetcher, items, result.fetch_seconds = future.result()
+        started = time.perf_counter()
+        if items is None:
+            result.new_items, result.save_seconds = save_stream(source, fetcher)
+            result.fetch_seconds = time.perf_counter() - started - result.save_seconds
+        else:
+            result.new_items = save_items(source, items, fetcher)
+            result.save_seconds = time.perf_counter() - started
+        result.http_status = fetcher.http_status
+        result.bytes = fetcher.bytes_received
+        result.parse_seconds = fetcher.parse_seconds
+        if fetcher.not_modified:
+            result.status = "not_modified"
+    except Exception as e:
+        result.status = "error"
+        result.error = str(e)
+        response = getattr(e, "response", None)
+        if response is not None:
+            result.http_status = response.status_code
+    metrics.record_refresh(result)
+    return result
+
+
+def shared_result(source: FeedSource, outcome: Dict) -> RefreshResult:
+    """A stored outcome (leases.py) as this caller's RefreshResult."""
+    names = {f.name for f in fields(RefreshResult)}
+    metrics.SHARED_REFRESHES.inc(source=source.slug)
+    values = {k: v for k, v in outcome.items() if k in names}
+    values.update(slug=source.slug, shared=True)
+    return RefreshResult(**values)
+
+
+def _attach(source: FeedSource) -> RefreshResult:
+    outcome = leases.wait(source.pk)
+    if outcome is None:
+        return RefreshResult(
+            slug=source.slug, status="error", shared=True, error="another refresh of this source is still running",
+        )
+    return shared_result(source, outcome)
+
+
+def refresh_sources(
+    sources: Iterable[FeedSource],
+    max_workers: Optional[int] = None,
+    per_host: Optional[int] = None,
+    min_interval: Optional[float] = None,
+) -> List[RefreshResult]:
+    """
+    Refresh many sources concurrently.
+
+    Network fetch + parsing runs on a bounded thread pool, with at most
+    `per_host` requests in flight against the same host. Fetchers never
+    touch the DB, so all writes happen here on the calling thread as each
+    fetch completes; total time tracks the slowest source, not the sum.
+
+    Refreshes are single-flight (see leases.py): a source that another
+    caller is fetching right now isn't fetched again, this call waits for
+    that fetch and returns its outcome. So does a source whose last
+    refresh (as loaded) is under `min_interval` seconds old
+    (FEEDS_MIN_REFRESH_SECONDS). Those results have shared=True.
+    """
+    sources = list(sources)
+    if max_workers is None:
+        max_workers = getattr(settings, "FEEDS_REFRESH_MAX_WORKERS", 8)
+    if min_interval is None:
+        min_interval = getattr(settings, "FEEDS_MIN_REFRESH_SECONDS", 30)
+
+    results: List[RefreshResult] = []
+    claimed: Dict[int, str] = {}
+    waiting: List[FeedSource] = []
+    for source in sources:
+        recent = leases.recent_outcome(source.last_refresh, min_interval)
+        if recent is not None:
+            results.append(shared_result(source, recent))
             continue
-    return total_new
+        token = leases.acquire(source.pk)
+        if token:
+            claimed[source.pk] = token
+        else:
+            waiting.append(source)
+
+    fetching = [source for source in sources if source.pk in claimed]
+    try:
+        if fetching:
+            limiter = HostLimiter(per_host)
+            workers = max(1, min(max_workers, len(fetching)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feeds-refresh") as pool:
+                futures = {submit_refresh(pool, source, limiter): source for source in fetching}
+                for future in as_completed(futures):
+                    source = futures[future]
+                    result = finish_refresh(source, future)
+                    leases.release(source.pk, claimed.pop(source.pk), result.outcome())
+                    results.append(result)
+    finally:
+        # only left over if something above raised
+        for source_id, token in claimed.items():
+            leases.release(source_id, token)
+
+    results.extend(_attach(source) for source in waiting)
+    return results
+
+
+def queue_refresh(sources) -> int:
+    """
+    Ask the feed scheduler (manage.py run_feed_scheduler) to refresh these
+    sources on its next tick. Returns number of sources queued.
+    """
+    return sources.update(refresh_requested_at=timezone.now())
+
+
+def refresh_all_sources() -> List[RefreshResult]:
+    """
+    Fetch + save for all enabled sources concurrently.
+    Returns one RefreshResult per source (see refresh_sources).
+    """
+    return refresh_sources(FeedSource.objects.filter(enabled=True))
@@ -0,0 +1,30 @@
+import threading
+from contextlib import contextmanager
+
+from django.dispatch import Signal
+
+# Sent by services.save_items after new FeedItems are bulk-inserted
+# (bulk_create skips post_save). Receivers get source= and items=, the
+# list of inserted FeedItem instances with their pks set.
+items_ingested = Signal()
+
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_delete():
+    """
+    Inside this block per-item post_delete receivers for FeedItem (search
+    unindex, page cache bump) do nothing: the caller deleting a batch
+    does that work once for the whole batch (see retention.delete_items).
+    """
+    _bulk.depth = getattr(_bulk, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _bulk.depth -= 1
+
+
+def in_bulk_delete() -> bool:
+    return bool(getattr(_bulk, "depth", 0))
@@ -0,0 +1,17 @@
+from django import template
+from django.urls import reverse
+
+from feeds import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(url, size):
+    """
+    Local thumbnail URL for a remote image: {{ item.image_url|thumbnail:"card" }}.
+    No DB access, so it is safe inside cached fragments.
+    """
+    if not url or not thumbnails.enabled() or not url.startswith(("http://", "https://")):
+        return url or ""
+    return reverse("feeds:thumbnail", args=[thumbnails.url_key(url), size])
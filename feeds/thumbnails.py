@@ -0,0 +1,260 @@
+"""
+Local thumbnails for remote feed images (FeedItem.image_url,
+FeedSource.logo_url).
+
+Ingest and source edits only queue URLs (one INSERT, see the receivers
+below); `manage.py run_thumbnailer` downloads them, resizes each to the
+FEEDS_THUMBNAIL_SIZES bounding boxes and stores WebP (or JPEG) files in
+default_storage under thumbs/, named by the original's sha256 so an
+image shared by many items is kept once. Pages link to
+feeds:thumbnail, which serves the file once it exists and redirects to
+the original URL until then.
+"""
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from . import metrics
+from .fetchers import http
+from .models import FeedItem, FeedSource, MediaAsset
+from .signals import items_ingested
+
+logger = logging.getLogger("insightvault.feeds")
+
+DEFAULT_SIZES = {"logo": 96, "card": 480, "detail": 1280}
+CACHE_FOREVER = 365 * 24 * 3600
+
+
+def sizes() -> Dict[str, int]:
+    """Name -> bounding box edge in px; thumbnails keep their aspect ratio."""
+    return getattr(settings, "FEEDS_THUMBNAIL_SIZES", DEFAULT_SIZES)
+
+
+@lru_cache(maxsize=None)
+def _webp_available() -> bool:
+    return features.check("webp")
+
+
+def output_format() -> str:
+    wanted = getattr(settings, "FEEDS_THUMBNAIL_FORMAT", "webp")
+    return "webp" if wanted == "webp" and _webp_available() else "jpeg"
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def thumbnail_name(content_hash: str, size: str, fmt: str) -> str:
+    return f"thumbs/{content_hash[:2]}/{content_hash}-{size}.{fmt}"
+
+
+def queue(urls: Iterable[str]) -> int:
+    """Register http(s) URLs for thumbnailing; known URLs are ignored."""
+    assets = {}
+    for url in urls:
+        if url and url.startswith(("http://", "https://")):
+            assets.setdefault(url_key(url), url)
+    if not assets:
+        return 0
+    MediaAsset.objects.bulk_create(
+        [MediaAsset(url_hash=key, url=url) for key, url in assets.items()], ignore_conflicts=True,
+    )
+    return len(assets)
+
+
+# ----------------------------
+# Download + resize (worker threads; no DB access)
+# ----------------------------
+class ThumbnailError(Exception):
+    pass
+
+
+@dataclass
+class Rendered:
+    content_hash: str
+    format: str
+    width: int
+    height: int
+    files: Dict[str, bytes] = field(default_factory=dict)
+
+
+def download(url: str) -> bytes:
+    options = http.HttpOptions.for_source({
+        "max_bytes": getattr(settings, "FEEDS_THUMBNAIL_MAX_BYTES", 15 * 1024 * 1024),
+    })
+    resp = http.get_session().get(url, timeout=options.timeout, stream=True)
+    try:
+        resp.raise_for_status()
+        content_type = resp.headers.get("Content-Type", "")
+        if content_type and not content_type.startswith(("image/", "application/octet-stream")):
+            raise ThumbnailError(f"not an image: {content_type}")
+        return b"".join(http.iter_body(resp, options.max_bytes))
+    finally:
+        resp.close()
+
+
+def _flatten(image: Image.Image, fmt: str) -> Image.Image:
+    if fmt == "webp" and image.mode in ("RGBA", "RGB"):
+        return image
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        if fmt == "webp":
+            return image
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render(body: bytes, fmt: Optional[str] = None, boxes: Optional[Dict[str, int]] = None) -> Rendered:
+    """Every thumbnail size of one image, encoded as `fmt`."""
+    fmt = fmt or output_format()
+    boxes = boxes or sizes()
+    max_pixels = getattr(settings, "FEEDS_THUMBNAIL_MAX_PIXELS", 40_000_000)
+    try:
+        image = Image.open(io.BytesIO(body))
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ThumbnailError(f"image too large: {width}x{height}")
+        # JPEG can decode straight at a reduced scale; far cheaper than a full decode
+        image.draft("RGB", (max(boxes.values()),) * 2)
+        image = _flatten(ImageOps.exif_transpose(image), fmt)
+    except (OSError, Image.DecompressionBombError, SyntaxError) as e:
+        raise ThumbnailError(f"unreadable image: {e}") from e
+
+    rendered = Rendered(hashlib.sha256(body).hexdigest(), fmt, width, height)
+    try:
+        # largest first, each step shrinking the previous result
+        for size, edge in sorted(boxes.items(), key=lambda pair: -pair[1]):
+            image = image.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, format=fmt.upper(), quality=getattr(settings, "FEEDS_THUMBNAIL_QUALITY", 80))
+            rendered.files[size] = out.getvalue()
+    except (OSError, ValueError) as e:
+        # truncated data only shows up on the full decode
+        raise ThumbnailError(f"cannot resize image: {e}") from e
+    return rendered
+
+
+def store(rendered: Rendered):
+    """Write the files unless this content is already stored."""
+    for size, data in rendered.files.items():
+        name = thumbnail_name(rendered.content_hash, size, rendered.format)
+        try:
+            if not default_storage.exists(name):
+                saved = default_storage.save(name, ContentFile(data))
+                if saved != name:
+                    # another worker stored the same image meanwhile
+                    default_storage.delete(saved)
+        except OSError as e:
+            raise ThumbnailError(f"cannot store {name}: {e}") from e
+
+
+def build(url: str) -> Rendered:
+    rendered = render(download(url))
+    store(rendered)
+    rendered.files.clear()
+    return rendered
+
+
+# ----------------------------
+# Queue processing (main thread owns the DB)
+# ----------------------------
+def process_pending(limit: int = 50, workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Thumbnail up to `limit` pending assets. Failures are retried on later
+    passes until FEEDS_THUMBNAIL_MAX_ATTEMPTS; after that the asset is
+    marked failed and pages keep using the original URL.
+    """
+    now = timezone.now()
+    retry_after = now - timezone.timedelta(seconds=getattr(settings, "FEEDS_THUMBNAIL_RETRY_SECONDS", 600))
+    assets: List[MediaAsset] = list(
+        MediaAsset.objects.filter(status=MediaAsset.Status.PENDING)
+        .filter(Q(attempts=0) | Q(updated_at__lte=retry_after))
+        .order_by("id")[:limit]
+    )
+    counts = {"ready": 0, "retry": 0, "failed": 0}
+    if not assets:
+        return counts
+
+    max_attempts = getattr(settings, "FEEDS_THUMBNAIL_MAX_ATTEMPTS", 3)
+    workers = workers or getattr(settings, "FEEDS_THUMBNAIL_WORKERS", 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="feeds-thumbs") as pool:
+        futures = [(asset, pool.submit(build, asset.url)) for asset in assets]
+        for asset, future in futures:
+            asset.attempts += 1
+            asset.updated_at = now
+            try:
+                rendered = future.result()
+            except Exception as e:
+                # one bad asset must not cost the pass the assets already built
+                asset.error = str(e)[:255] or type(e).__name__
+                failed = asset.attempts >= max_attempts
+                asset.status = MediaAsset.Status.FAILED if failed else MediaAsset.Status.PENDING
+                counts["failed" if failed else "retry"] += 1
+                expected = isinstance(e, (ThumbnailError, requests.RequestException))
+                logger.log(logging.DEBUG if expected else logging.WARNING,
+                           "Thumbnail of %s failed: %s", asset.url, e, exc_info=not expected,
+                           extra={"event": "thumbnail", "url": asset.url, "error": asset.error})
+            else:
+                asset.status = MediaAsset.Status.READY
+                asset.content_hash = rendered.content_hash
+                asset.format = rendered.format
+                asset.width, asset.height = rendered.width, rendered.height
+                asset.error = ""
+                counts["ready"] += 1
+
+    MediaAsset.objects.bulk_update(
+        assets, ["status", "attempts", "error", "content_hash", "format", "width", "height", "updated_at"],
+    )
+    for outcome, count in counts.items():
+        metrics.THUMBNAILS.inc(count, outcome=outcome)
+    return counts
+
+
+def backfill(chunk: int = 1000) -> int:
+    """Queue the images of existing items and sources."""
+    queued = queue(FeedSource.objects.exclude(logo_url__isnull=True).values_list("logo_url", flat=True))
+    urls = FeedItem.objects.filter(is_active=True).exclude(image_url="").values_list("image_url", flat=True)
+    batch = []
+    for url in urls.iterator(chunk_size=chunk):
+        batch.append(url)
+        if len(batch) >= chunk:
+            queued += queue(batch)
+            batch = []
+    return queued + queue(batch)
+
+
+# ----------------------------
+# Receivers
+# ----------------------------
+def enabled() -> bool:
+    return getattr(settings, "FEEDS_THUMBNAILS", True)
+
+
+@receiver(items_ingested, dispatch_uid="feeds.thumbnails.ingested")
+def _items_ingested(sender, source, items, **kwargs):
+    if enabled():
+        queue(obj.image_url for obj in items)
+
+
+@receiver(post_save, sender=FeedSource, dispatch_uid="feeds.thumbnails.source_saved")
+def _source_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    # logos are set by hand (admin / fixtures), not at ingest
+    if enabled() and not raw and (update_fields is None or "logo_url" in update_fields):
+        queue([instance.logo_url or ""])
@@ -0,0 +1,254 @@
+"""
+Per-user timelines over subscribed sources.
+
+A user's feed ("items from my sources, newest first") is materialized as
+TimelineEntry rows: when a fetch inserts items, the items_ingested
+receiver below copies them into the timeline of every subscriber of the
+source (fan-out on write), with the sort keys denormalized. Reading a
+page is then one range scan of timeline_user_recent_idx plus a primary
+key lookup for the cards, however many sources the user follows.
+
+Sources with more than FEEDS_TIMELINE_FANOUT_LIMIT subscribers would
+cost that many rows per new item, so they are switched to fan-out on
+read (FeedSource.fanout_on_read, sticky): they get no entries, and a
+page merges their newest items in from FeedItem by the same cursor.
+
+Subscribing backfills the newest FEEDS_TIMELINE_BACKFILL items of the
+source. Timelines are capped at FEEDS_TIMELINE_MAX_ENTRIES rows per user
+by `manage.py rebuild_timelines`, which also re-derives subscriber
+counts and clears entries left behind by sources gone heavy.
+"""
+import heapq
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.dispatch import receiver
+
+from core.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_page
+
+from . import metrics
+from .models import FeedItem, FeedSource, Subscription, TimelineEntry
+from .readstate import position
+from .signals import items_ingested
+
+# The feed_list order over timeline rows; cursors are interchangeable
+# with FeedItem cursors over ["-published_at", "-fetched_at", "-id"].
+TIMELINE_ORDERING = ["-published_at", "-fetched_at", "-item_id"]
+FANOUT_BATCH_SIZE = 1000
+
+
+def enabled() -> bool:
+    return getattr(settings, "FEEDS_TIMELINES", True)
+
+
+def fanout_limit() -> int:
+    return getattr(settings, "FEEDS_TIMELINE_FANOUT_LIMIT", 1000)
+
+
+def max_entries() -> int:
+    return getattr(settings, "FEEDS_TIMELINE_MAX_ENTRIES", 1000)
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+def _entries(user_ids: Iterable[int], items: Sequence[FeedItem], covered: Set[Tuple[int, int]],
+             rep_sources: dict):
+    for user_id in user_ids:
+        for item in items:
+            # a syndicated copy is left out where its representative shows up anyway
+            if item.duplicate_of_id and (user_id, rep_sources.get(item.duplicate_of_id)) in covered:
+                continue
+            yield TimelineEntry(
+                user_id=user_id, item_id=item.pk, source_id=item.source_id,
+                published_at=item.published_at, fetched_at=item.fetched_at,
+            )
+
+
+def _insert(users, items: Sequence[FeedItem]) -> int:
+    """
+    Copy items (of one source) into the timelines of `users` (a
+    queryset of user ids). Returns the number of rows written.
+    """
+    reps = {item.duplicate_of_id for item in items if item.duplicate_of_id}
+    rep_sources = dict(FeedItem.objects.filter(pk__in=reps).values_list("id", "source_id")) if reps else {}
+    covered = set()
+    if rep_sources:
+        covered = set(Subscription.objects.filter(
+            user_id__in=users, source_id__in=set(rep_sources.values()),
+        ).values_list("user_id", "source_id"))
+
+    written = 0
+    batch: List[TimelineEntry] = []
+    for entry in _entries(users.iterator(), items, covered, rep_sources):
+        batch.append(entry)
+        if len(batch) == FANOUT_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            written += len(batch)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
+
+
+def fan_out(source: FeedSource, items: Sequence[FeedItem]) -> int:
+    """Copy newly ingested items of `source` into its subscribers' timelines."""
+    heavy, count = FeedSource.objects.filter(pk=source.pk).values_list("fanout_on_read", "subscriber_count").get()
+    if heavy or not count:
+        return 0
+    if count > fanout_limit():
+        FeedSource.objects.filter(pk=source.pk).update(fanout_on_read=True)
+        return 0
+    users = Subscription.objects.filter(source=source).values_list("user_id", flat=True)
+    written = _insert(users, items)
+    metrics.TIMELINE_ROWS.inc(written, source=source.slug)
+    return written
+
+
+def backfill(user, source: FeedSource, limit: Optional[int] = None) -> int:
+    """Copy the newest items of `source` into one user's timeline."""
+    if limit is None:
+        limit = getattr(settings, "FEEDS_TIMELINE_BACKFILL", 200)
+    items = list(
+        FeedItem.objects.filter(source=source, is_active=True)
+        .order_by("-published_at", "-fetched_at", "-id")
+        .only("id", "source", "published_at", "fetched_at", "duplicate_of")[:limit]
+    )
+    if not items:
+        return 0
+    return _insert(Subscription.objects.filter(user=user, source=source).values_list("user_id", flat=True), items)
+
+
+def subscribe(user, source: FeedSource) -> bool:
+    """Subscribe `user` to `source`; False if they already were."""
+    with transaction.atomic():
+        _, created = Subscription.objects.get_or_create(user=user, source=source)
+        if not created:
+            return False
+        FeedSource.objects.filter(pk=source.pk).update(subscriber_count=F("subscriber_count") + 1)
+        heavy, count = FeedSource.objects.filter(pk=source.pk).values_list(
+            "fanout_on_read", "subscriber_count",
+        ).get()
+        if not heavy and count > fanout_limit():
+            FeedSource.objects.filter(pk=source.pk).update(fanout_on_read=True)
+            heavy = True
+    if enabled() and not heavy:
+        backfill(user, source)
+    return True
+
+
+def unsubscribe(user, source: FeedSource) -> bool:
+    """Drop the subscription and its timeline rows; False if there was none."""
+    with transaction.atomic():
+        deleted, _ = Subscription.objects.filter(user=user, source=source).delete()
+        if not deleted:
+            return False
+        FeedSource.objects.filter(pk=source.pk, subscriber_count__gt=0).update(
+            subscriber_count=F("subscriber_count") - 1,
+        )
+        TimelineEntry.objects.filter(user=user, source=source).delete()
+    return True
+
+
+@receiver(items_ingested, dispatch_uid="feeds.timeline.ingested")
+def _items_ingested(sender, source, items, **kwargs):
+    if enabled():
+        fan_out(source, items)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def page(user, items, ordering: Sequence[str], cursor: Optional[str], limit: int):
+    """
+    keyset_page of the user's timeline, as rows of `items` (a FeedItem
+    queryset, ordered by `ordering`, i.e. feed_list's). Entries come
+    from one range scan; subscribed fan-out-on-read sources are paged
+    from `items` by the same cursor and merged in.
+    """
+    subscribed = dict(Subscription.objects.filter(user=user).values_list("source_id", "source__fanout_on_read"))
+    entries, more = keyset_page(
+        TimelineEntry.objects.filter(user=user).only("item", "published_at", "fetched_at"),
+        TIMELINE_ORDERING, cursor, limit,
+    )
+    # (position, item id, cursor row, cursor ordering)
+    candidates = [(position(e.published_at, e.fetched_at, e.item_id), e.item_id, e, TIMELINE_ORDERING)
+                  for e in entries]
+
+    heavy = [source_id for source_id, on_read in subscribed.items() if on_read]
+    if heavy:
+        rows, heavy_more = keyset_page(
+            items.filter(source_id__in=heavy).exclude(duplicate_of__source_id__in=list(subscribed)),
+            ordering, cursor, limit,
+        )
+        more = more or heavy_more
+        candidates = list(heapq.merge(
+            candidates, [(position(r.published_at, r.fetched_at, r.pk), r.pk, r, ordering) for r in rows],
+            key=lambda candidate: candidate[0],
+        ))
+
+    merged, seen = [], set()
+    for candidate in candidates:
+        if candidate[1] not in seen:
+            seen.add(candidate[1])
+            merged.append(candidate)
+    if len(merged) > limit:
+        merged, more = merged[:limit], True
+
+    by_id = items.order_by().in_bulk([pk for _, pk, _, _ in merged])
+    rows = [by_id[pk] for _, pk, _, _ in merged if pk in by_id]
+    next_cursor = encode_cursor(merged[-1][2], merged[-1][3]) if more and merged else None
+    return rows, next_cursor
+
+
+# ----------------------------
+# Maintenance
+# ----------------------------
+def recount() -> int:
+    """Re-derive subscriber counts and heavy flags; returns sources switched to fan-out on read."""
+    counts = dict(Subscription.objects.values("source_id").annotate(n=Count("id")).values_list("source_id", "n"))
+    for source in FeedSource.objects.only("id", "subscriber_count"):
+        if source.subscriber_count != counts.get(source.pk, 0):
+            FeedSource.objects.filter(pk=source.pk).update(subscriber_count=counts.get(source.pk, 0))
+    return FeedSource.objects.filter(fanout_on_read=False, subscriber_count__gt=fanout_limit()).update(
+        fanout_on_read=True,
+    )
+
+
+def purge_heavy(chunk: int = FANOUT_BATCH_SIZE) -> int:
+    """Delete entries of fan-out-on-read sources (pages read them from FeedItem)."""
+    deleted = 0
+    entries = TimelineEntry.objects.filter(source__fanout_on_read=True)
+    while True:
+        ids = list(entries.values_list("id", flat=True)[:chunk])
+        if not ids:
+            return deleted
+        deleted += TimelineEntry.objects.filter(pk__in=ids).delete()[0]
+
+
+def trim(keep: Optional[int] = None) -> int:
+    """Cut every timeline to its newest `keep` entries (0 = unbounded)."""
+    keep = max_entries() if keep is None else keep
+    if not keep:
+        return 0
+    deleted = 0
+    over = (
+        TimelineEntry.objects.values("user_id").annotate(n=Count("id")).filter(n__gt=keep)
+        .values_list("user_id", flat=True)
+    )
+    for user_id in list(over):
+        entries = TimelineEntry.objects.filter(user_id=user_id)
+        _, cursor = keyset_page(entries.only("item", "published_at", "fetched_at"), TIMELINE_ORDERING, None, keep)
+        if cursor is None:
+            continue
+        values = decode_cursor(cursor, TIMELINE_ORDERING)
+        nulls = entries.filter(published_at__isnull=True)
+        if values[0] is None:
+            deleted += nulls.filter(keyset_filter(TIMELINE_ORDERING[1:], values[1:])).delete()[0]
+        else:
+            older = entries.filter(published_at__isnull=False).filter(keyset_filter(TIMELINE_ORDERING, values))
+            deleted += older.delete()[0] + nulls.delete()[0]
+    return deleted
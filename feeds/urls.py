@@ -5,7 +5,13 @@ app_name = "feeds"
 
 urlpatterns = [
     path("", views.feed_list, name="feed_list"),
+    path("mine/", views.my_feed, name="my_feed"),
+    path("sources/<slug:slug>/subscribe/", views.subscribe, name="subscribe"),
+    path("sources/<slug:slug>/unsubscribe/", views.unsubscribe, name="unsubscribe"),
     path("refresh/<slug:slug>/", views.refresh_source, name="refresh_source"),
     path("refresh-all/", views.refresh_all, name="refresh_all"),
     path("<int:pk>/", views.feed_detail, name="feed_detail"),
+    path("read/", views.mark_read, name="mark_read"),
+    path("read/all/", views.mark_all_read, name="mark_all_read"),
+    path("thumbs/<str:key>/<slug:size>/", views.thumbnail, name="thumbnail"),
 ]
@@ -1,50 +1,273 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseBadRequest, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 from django.contrib import messages
+from django.conf import settings
 
-from .models import FeedSource, FeedItem
-from .services import fetch_and_save_items
+from core.pagination import InvalidCursor, keyset_page
+from . import page_cache, readstate, thumbnails, timeline
+from .models import FeedSource, FeedItem, MediaAsset, Subscription
+from .services import queue_refresh, refresh_all_sources, refresh_sources
+
+
+# Keyset order for feed_list (NULL published_at last); id makes it unique.
+# Backed by the *_recent_idx indexes on FeedItem.
+FEED_ORDERING = ["-published_at", "-fetched_at", "-id"]
+FEED_PAGE_SIZE = 50
+# Only what feeds/feed_list.html renders
+FEED_CARD_FIELDS = [
+    "id", "title", "summary", "author", "image_url", "published_at", "fetched_at",
+    "source__slug", "source__name", "source__logo_url",
+]
+
+
+def _list_items(source):
+    if source:
+        return FeedItem.objects.filter(source_id=source["id"], is_active=True)
+    # syndicated copies are folded into their representative
+    return FeedItem.objects.filter(is_active=True, duplicate_of__isnull=True)
 
 
 def feed_list(request):
     """
-    Show all feed items (from DB).
-    Optionally filter by source (?source=slug).
+    Show all feed items (from DB), one per duplicate cluster.
+    Optionally filter by source (?source=slug); older pages via ?cursor=.
+    The item list is served from the page cache until the source's items
+    change (see feeds.page_cache), with ETag / Last-Modified for 304s.
+    Signed-in users can list only their unread items (?unread=1), which
+    is rendered per request (see feeds.readstate).
     """
+    snapshot = page_cache.source_snapshot()
     source_slug = request.GET.get("source")
+    source = None
     if source_slug:
-        source = get_object_or_404(FeedSource, slug=source_slug, enabled=True)
-        items = FeedItem.objects.filter(source=source, is_active=True)
-    else:
-        items = FeedItem.objects.filter(is_active=True)
+        source = snapshot.by_slug(source_slug)
+        if source is None:
+            raise Http404("No such source")
+
+    cursor = request.GET.get("cursor")
+    unread = request.GET.get("unread") == "1" and request.user.is_authenticated
+    shell = {"active_source": source_slug, "cursor": cursor or "", "unread": unread}
+    if source and request.user.is_authenticated:
+        shell["subscribed"] = Subscription.objects.filter(user=request.user, source_id=source["id"]).exists()
+    if unread:
+        items = _list_items(source).select_related("source").only(*FEED_CARD_FIELDS)
+        try:
+            items, next_cursor = readstate.unread_page(
+                readstate.ReadState(request.user), items, FEED_ORDERING, cursor, FEED_PAGE_SIZE,
+                source["id"] if source else None,
+            )
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor")
+        body = render_to_string("feeds/_feed_list_body.html", {
+            "sources": snapshot.sources,
+            "items": items,
+            "active_source": source_slug,
+            "next_cursor": next_cursor,
+            "unread": True,
+        })
+        response = render(request, "feeds/feed_list.html", {"body": body, **shell})
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    key = page_cache.list_key(snapshot, source, cursor)
+    changed_at = snapshot.changed_at(source["id"] if source else None)
+    etag = page_cache.page_etag(request, key)
+    not_modified = page_cache.conditional_response(request, etag, changed_at)
+    if not_modified is not None:
+        return not_modified
+
+    body = page_cache.page_cache().get(key)
+    if body is None:
+        items = _list_items(source).select_related("source").only(*FEED_CARD_FIELDS)
+        try:
+            items, next_cursor = keyset_page(items, FEED_ORDERING, cursor, FEED_PAGE_SIZE)
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor")
+
+        body = render_to_string("feeds/_feed_list_body.html", {
+            "sources": snapshot.sources,
+            "items": items,
+            "active_source": source_slug,
+            "next_cursor": next_cursor,
+        })
+        page_cache.page_cache().set(key, body)
+
+    response = render(request, "feeds/feed_list.html", {"body": body, **shell})
+    return page_cache.with_validators(response, etag, changed_at)
 
-    items = items.select_related("source")[:50]  # limit for now
 
-    context = {
-        "sources": FeedSource.objects.filter(enabled=True),
+@login_required
+def my_feed(request):
+    """
+    Items from the sources the user subscribes to, newest first; older
+    pages via ?cursor=. Read from the user's materialized timeline (see
+    feeds.timeline), per request.
+    """
+    snapshot = page_cache.source_snapshot()
+    cursor = request.GET.get("cursor")
+    items = FeedItem.objects.filter(is_active=True).select_related("source").only(*FEED_CARD_FIELDS)
+    try:
+        items, next_cursor = timeline.page(request.user, items, FEED_ORDERING, cursor, FEED_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    body = render_to_string("feeds/_feed_list_body.html", {
+        "sources": snapshot.sources,
         "items": items,
-        "active_source": source_slug,
-    }
-    return render(request, "feeds/feed_list.html", context)
+        "next_cursor": next_cursor,
+        "mine": True,
+    })
+    response = render(request, "feeds/feed_list.html", {"body": body, "mine": True, "cursor": cursor or ""})
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 def feed_detail(request, pk):
     """
-    Show a single feed item in detail.
+    Show a single feed item in detail (cached like feed_list). For
+    signed-in users the page POSTs to mark_read once opened.
+    """
+    snapshot = page_cache.source_snapshot()
+    cache_key = page_cache.detail_key(pk)
+    cached = page_cache.page_cache().get(cache_key)
+    # (source_id, items_version, source meta, html); stale once either moves
+    if cached is None or cached[1:3] != (snapshot.version(cached[0]), snapshot.meta):
+        item = get_object_or_404(FeedItem, pk=pk, is_active=True)
+        copies = item.duplicates.filter(is_active=True).select_related("source").only("id", "source__name")
+        html = render_to_string("feeds/_feed_detail_body.html", {"item": item, "copies": copies})
+        cached = (item.source_id, snapshot.version(item.source_id), snapshot.meta, html)
+        if cached[1] is not None:  # items of disabled sources aren't versioned
+            page_cache.page_cache().set(cache_key, cached)
+
+    source_id, version, meta, body = cached
+    changed_at = snapshot.changed_at(source_id)
+    etag = page_cache.page_etag(request, f"{cache_key}:{version}:{meta}")
+    not_modified = page_cache.conditional_response(request, etag, changed_at)
+    if not_modified is not None:
+        return not_modified
+
+    # the page marks the item read itself (a POST to mark_read), so
+    # prefetches and link previews of a signed-in session don't
+    response = render(request, "feeds/feed_detail.html", {"body": body, "item_id": pk})
+    return page_cache.with_validators(response, etag, changed_at)
+
+
+def thumbnail(request, key, size):
+    """
+    A local thumbnail of a feed image (see feeds.thumbnails). The file is
+    named by content, so it is cached for a year; until it has been made
+    this redirects, uncached, to the original URL.
     """
-    item = get_object_or_404(FeedItem, pk=pk, is_active=True)
-    return render(request, "feeds/feed_detail.html", {"item": item})
+    if size not in thumbnails.sizes():
+        raise Http404("Unknown thumbnail size")
+    cache_key = f"feeds:thumb:{key}"
+    asset = page_cache.page_cache().get(cache_key)
+    if asset is None:
+        asset = MediaAsset.objects.filter(url_hash=key).values("url", "status", "content_hash", "format").first()
+        if asset is None:
+            raise Http404("Unknown image")
+        ready = asset["status"] == MediaAsset.Status.READY
+        page_cache.page_cache().set(cache_key, asset, None if ready else getattr(settings, "FEEDS_VERSION_TTL", 5))
 
+    if asset["status"] == MediaAsset.Status.READY:
+        name = thumbnails.thumbnail_name(asset["content_hash"], size, asset["format"])
+        etag = f'"{asset["content_hash"][:20]}-{size}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None and default_storage.exists(name):
+            response = FileResponse(default_storage.open(name), content_type=f"image/{asset['format']}")
+        if response is not None:
+            response.headers["ETag"] = etag
+            patch_cache_control(response, public=True, max_age=thumbnails.CACHE_FOREVER, immutable=True)
+            return response
+
+    response = redirect(asset["url"])
+    patch_cache_control(response, no_cache=True, max_age=0)
+    return response
+
+
+@login_required
+@require_POST
+def mark_read(request):
+    """
+    Mark items read for the current user (AJAX): POST ids=1&ids=2...
+    """
+    try:
+        ids = [int(pk) for pk in request.POST.getlist("ids")]
+    except ValueError:
+        return JsonResponse({"error": "Invalid request"}, status=400)
+    return JsonResponse({"success": True, "marked": readstate.mark_read(request.user, ids)})
+
+
+@login_required
+@require_POST
+def mark_all_read(request):
+    """
+    Mark everything in a feed list (?source=, from ?cursor= down) read.
+    Redirect back to the unread list.
+    """
+    source_slug = request.POST.get("source") or None
+    source = get_object_or_404(FeedSource, slug=source_slug) if source_slug else None
+    items = _list_items({"id": source.pk} if source else None)
+    try:
+        readstate.mark_all_read(request.user, items, FEED_ORDERING, request.POST.get("cursor") or None, source)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    messages.success(request, f"Marked {source.name if source else 'all feeds'} as read")
+    query = {"unread": 1, **({"source": source_slug} if source_slug else {})}
+    return redirect(f"{reverse('feeds:feed_list')}?{urlencode(query)}")
+
+
+@login_required
+@require_POST
+def subscribe(request, slug):
+    """
+    Subscribe the current user to a source (adds it to their feed).
+    Redirect back to the source's list.
+    """
+    source = get_object_or_404(FeedSource, slug=slug, enabled=True)
+    if timeline.subscribe(request.user, source):
+        messages.success(request, f"Subscribed to {source.name}")
+    return redirect(f"{reverse('feeds:feed_list')}?{urlencode({'source': slug})}")
+
+
+@login_required
+@require_POST
+def unsubscribe(request, slug):
+    """
+    Unsubscribe the current user from a source.
+    Redirect back to the source's list.
+    """
+    source = get_object_or_404(FeedSource, slug=slug)
+    if timeline.unsubscribe(request.user, source):
+        messages.success(request, f"Unsubscribed from {source.name}")
+    return redirect(f"{reverse('feeds:feed_list')}?{urlencode({'source': slug})}")
 
 
 def refresh_source(request, slug):
     """
     Manually refresh a single source (fetch new items).
+    With FEEDS_REFRESH_ASYNC the fetch is handed to the feed scheduler
+    and this returns immediately.
     Redirect back to feed list.
     """
     source = get_object_or_404(FeedSource, slug=slug, enabled=True)
-    new_count = fetch_and_save_items(source)
-    messages.success(request, f"Fetched {new_count} new items from {source.name}")
+    if getattr(settings, "FEEDS_REFRESH_ASYNC", False):
+        queue_refresh(FeedSource.objects.filter(pk=source.pk))
+        messages.success(request, f"Refresh of {source.name} queued")
+        return redirect("feeds:feed_list")
+
+    # single-flight: joins a refresh already in progress (see feeds.leases)
+    [result] = refresh_sources([source])
+    if result.status == "error":
+        messages.warning(request, f"Could not refresh {source.name}: {result.error}")
+    else:
+        messages.success(request, f"Fetched {result.new_items} new items from {source.name}")
     return redirect("feeds:feed_list")
 
 
@@ -52,9 +275,16 @@ def refresh_all(request):
     """
     Refresh all sources manually.
     """
-    total_new = 0
-    for src in FeedSource.objects.filter(enabled=True):
-        total_new += fetch_and_save_items(src)
+    if getattr(settings, "FEEDS_REFRESH_ASYNC", False):
+        queued = queue_refresh(FeedSource.objects.filter(enabled=True))
+        messages.success(request, f"Refresh of {queued} sources queued")
+        return redirect("feeds:feed_list")
+
+    results = refresh_all_sources()
+    total_new = sum(r.new_items for r in results)
+    failed = [r.slug for r in results if r.status == "error"]
 
+    if failed:
+        messages.warning(request, f"Could not refresh: {', '.join(failed)}")
     messages.success(request, f"Fetched {total_new} new items from all sources")
     return redirect("feeds:feed_list")
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'journal',
     'core',
     'feeds',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -36,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'insightVault.urls'
@@ -65,6 +67,53 @@ DATABASES = {
     }
 }
 
+# Cache
+# "markdown" holds rendered note HTML keyed by content hash; LocMemCache
+# evicts least-recently-used entries past MAX_ENTRIES.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'markdown': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'markdown',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': config('MARKDOWN_CACHE_MAX_ENTRIES', default=5000, cast=int)},
+    },
+    # rendered feed_list / feed_detail fragments (feeds.page_cache)
+    'feeds': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feeds',
+        'TIMEOUT': config('FEEDS_PAGE_CACHE_TTL', default=3600, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': config('FEEDS_PAGE_CACHE_MAX_ENTRIES', default=2000, cast=int)},
+    },
+}
+
+# Full-text search: "auto" uses SQLite FTS5 when available, else the postings index
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+
+# Instrumentation: /metrics (Prometheus text) is open to staff and these
+# addresses; requests slower than SLOW_REQUEST_MS are logged at WARNING
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [s.strip() for s in v.split(',')])
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=1000, cast=int)
+
+# LOG_FORMAT=json emits one JSON object per line, including the extra
+# fields on the insightvault.feeds / insightvault.requests records
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+        'json': {'()': 'core.logging.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': config('LOG_FORMAT', default='plain')},
+    },
+    'loggers': {
+        'insightvault': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO'), 'propagate': False},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,6 +163,100 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
+# Feeds refresh engine
+FEEDS_REFRESH_MAX_WORKERS = config('FEEDS_REFRESH_MAX_WORKERS', default=8, cast=int)
+FEEDS_REFRESH_PER_HOST = config('FEEDS_REFRESH_PER_HOST', default=2, cast=int)
+# Refresh views queue work for `manage.py run_feed_scheduler` instead of fetching inline
+FEEDS_REFRESH_ASYNC = config('FEEDS_REFRESH_ASYNC', default=True, cast=bool)
+FEEDS_DEFAULT_FETCH_INTERVAL = config('FEEDS_DEFAULT_FETCH_INTERVAL', default=900, cast=int)
+FEEDS_MAX_BACKOFF_SECONDS = config('FEEDS_MAX_BACKOFF_SECONDS', default=6 * 3600, cast=int)
+FEEDS_SCHEDULER_JITTER = 0.1
+# Adaptive intervals for sources without fetch_interval_seconds (feeds/cadence.py):
+# fetch when FEEDS_ADAPTIVE_TARGET_ITEMS new items are expected from the source's
+# posting rate and hour-of-day profile, slower after fetches that find nothing.
+FEEDS_ADAPTIVE_SCHEDULING = config('FEEDS_ADAPTIVE_SCHEDULING', default=True, cast=bool)
+FEEDS_ADAPTIVE_MIN_INTERVAL = config('FEEDS_ADAPTIVE_MIN_INTERVAL', default=5 * 60, cast=int)
+FEEDS_ADAPTIVE_MAX_INTERVAL = config('FEEDS_ADAPTIVE_MAX_INTERVAL', default=24 * 3600, cast=int)
+FEEDS_ADAPTIVE_TARGET_ITEMS = 0.5
+FEEDS_ADAPTIVE_IDLE_FACTOR = 1.5
+FEEDS_ADAPTIVE_WINDOW_DAYS = 30
+FEEDS_ADAPTIVE_HISTORY = 200
+FEEDS_ADAPTIVE_MIN_ITEMS = 5
+# Single-flight refreshes (feeds/leases.py): a refresh within FEEDS_MIN_REFRESH_SECONDS
+# of the last one reuses its outcome; concurrent callers wait up to
+# FEEDS_REFRESH_WAIT_SECONDS for the in-flight fetch. Leases of crashed workers lapse.
+FEEDS_MIN_REFRESH_SECONDS = config('FEEDS_MIN_REFRESH_SECONDS', default=30, cast=int)
+FEEDS_REFRESH_WAIT_SECONDS = 30
+FEEDS_REFRESH_LEASE_SECONDS = 300
+# Shared fetcher HTTP client (per-source overrides: config["connect_timeout"],
+# ["read_timeout"], ["max_bytes"], ["stream_max_bytes"], ["headers"]).
+# MAX_BYTES caps bodies read whole; streamed RSS parses (FEEDS_STREAM_PARSING /
+# config["stream"]) use STREAM_MAX_BYTES instead, sized for large archive feeds.
+FEEDS_HTTP_CONNECT_TIMEOUT = config('FEEDS_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+FEEDS_HTTP_READ_TIMEOUT = config('FEEDS_HTTP_READ_TIMEOUT', default=15, cast=float)
+FEEDS_HTTP_MAX_BYTES = config('FEEDS_HTTP_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+FEEDS_HTTP_STREAM_MAX_BYTES = config('FEEDS_HTTP_STREAM_MAX_BYTES', default=1024 * 1024 * 1024, cast=int)
+FEEDS_HTTP_MAX_PER_HOST = config('FEEDS_HTTP_MAX_PER_HOST', default=4, cast=int)
+FEEDS_HTTP_POOL_HOSTS = 32
+# Parse feeds incrementally (per-source override: config["stream"])
+FEEDS_STREAM_PARSING = config('FEEDS_STREAM_PARSING', default=False, cast=bool)
+# Parse (non-streamed) feeds in this many worker processes; 0 = on the fetch thread
+FEEDS_PARSE_PROCESSES = config('FEEDS_PARSE_PROCESSES', default=0, cast=int)
+# REST sources: pages read per fetch at most (per-source config["max_pages"])
+FEEDS_REST_MAX_PAGES = 10
+# High-water mark: remember this many ids per source, stop after a run of known ones
+FEEDS_KNOWN_IDS_LIMIT = 200
+FEEDS_KNOWN_RUN_LENGTH = config('FEEDS_KNOWN_RUN_LENGTH', default=3, cast=int)
+# Cross-source duplicate detection (exact content_hash + SimHash within N bits)
+FEEDS_DEDUPE = config('FEEDS_DEDUPE', default=True, cast=bool)
+FEEDS_DEDUPE_WINDOW_DAYS = 7
+FEEDS_SIMHASH_MAX_DISTANCE = 3
+
+# Where FeedItem.raw lives: "side" = compressed FeedItemPayload rows (zstd
+# when installed, else zlib), "inline" = the old JSON column on FeedItem.
+# Existing rows: manage.py externalize_feed_payloads
+FEEDS_PAYLOAD_STORAGE = config('FEEDS_PAYLOAD_STORAGE', default='side')
+FEEDS_PAYLOAD_EXTERNAL_CONTENT = config('FEEDS_PAYLOAD_EXTERNAL_CONTENT', default=False, cast=bool)
+
+# Cached feed pages: fragments live in the "feeds" cache until their
+# source's items_version changes; other processes (the scheduler) see a
+# bump within FEEDS_VERSION_TTL seconds.
+FEEDS_VERSION_TTL = config('FEEDS_VERSION_TTL', default=5, cast=int)
+
+# Local thumbnails of item images / source logos, made by
+# `manage.py run_thumbnailer` into MEDIA_ROOT/thumbs (bounding box in px)
+FEEDS_THUMBNAILS = config('FEEDS_THUMBNAILS', default=True, cast=bool)
+FEEDS_THUMBNAIL_SIZES = {'logo': 96, 'card': 480, 'detail': 1280}
+FEEDS_THUMBNAIL_FORMAT = config('FEEDS_THUMBNAIL_FORMAT', default='webp')  # falls back to jpeg
+FEEDS_THUMBNAIL_QUALITY = 80
+FEEDS_THUMBNAIL_MAX_BYTES = config('FEEDS_THUMBNAIL_MAX_BYTES', default=15 * 1024 * 1024, cast=int)
+FEEDS_THUMBNAIL_MAX_PIXELS = 40_000_000
+FEEDS_THUMBNAIL_WORKERS = config('FEEDS_THUMBNAIL_WORKERS', default=4, cast=int)
+FEEDS_THUMBNAIL_MAX_ATTEMPTS = 3
+FEEDS_THUMBNAIL_RETRY_SECONDS = 600
+
+# Retention (`manage.py apply_feed_retention`): 0 keeps items forever;
+# per source: config["retention_max_age_days"] / ["retention_max_items"].
+# Expired rows are exported to FEEDS_ARCHIVE_DIR as gzipped JSONL segments.
+FEEDS_RETENTION_MAX_AGE_DAYS = config('FEEDS_RETENTION_MAX_AGE_DAYS', default=0, cast=int)
+FEEDS_RETENTION_MAX_ITEMS = config('FEEDS_RETENTION_MAX_ITEMS', default=0, cast=int)
+FEEDS_RETENTION_CHUNK = 500
+FEEDS_ARCHIVE_DIR = config('FEEDS_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+FEEDS_ARCHIVE_SEGMENT_ROWS = 50_000
+
+# Per-user read state (feeds/readstate.py): ?unread=1 checks at most this many
+# rows per page against the user's read bitmap before returning a partial page.
+FEEDS_UNREAD_SCAN_LIMIT = 2000
+
+# Subscriptions and per-user timelines (feeds/timeline.py): new items are copied
+# into subscribers' timelines at ingest, except for sources with more than
+# FEEDS_TIMELINE_FANOUT_LIMIT subscribers, which are merged in at read time.
+# `manage.py rebuild_timelines` caps each timeline at FEEDS_TIMELINE_MAX_ENTRIES.
+FEEDS_TIMELINES = config('FEEDS_TIMELINES', default=True, cast=bool)
+FEEDS_TIMELINE_FANOUT_LIMIT = config('FEEDS_TIMELINE_FANOUT_LIMIT', default=1000, cast=int)
+FEEDS_TIMELINE_BACKFILL = 200
+FEEDS_TIMELINE_MAX_ENTRIES = config('FEEDS_TIMELINE_MAX_ENTRIES', default=1000, cast=int)
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
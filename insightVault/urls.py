@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import views as core_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -15,6 +17,12 @@ urlpatterns = [
 
         # feeds app URLs
     path('feeds/', include('feeds.urls')),
+
+    # search app URLs
+    path('search/', include('search.urls')),
+
+    # Prometheus scrape endpoint
+    path('metrics', core_views.metrics, name='metrics'),
 ]
 
 if settings.MEDIA_URL and settings.MEDIA_ROOT:
@@ -18,9 +18,13 @@ focus:ring-indigo-500 transition-all duration-200
 """
 
 class NoteForm(forms.ModelForm):
+    # Free-text "a, b, c"; resolved to Tag rows by the view (_handle_tags)
+    tags = forms.CharField(required=False)
+    field_order = ['title', 'content', 'tags', 'pinned']
+
     class Meta:
         model = Note
-        fields = ['title', 'content', 'tags', 'pinned']
+        fields = ['title', 'content', 'pinned']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -38,7 +42,6 @@ class NoteForm(forms.ModelForm):
         })
 
         # --- Tags (optional) ---
-        self.fields['tags'].required = False
         self.fields['tags'].widget.attrs.update({
             "class": TAG_INPUT,
             "placeholder": "#tags, separated, by commas"
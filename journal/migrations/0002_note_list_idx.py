@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', '-pinned', '-updated_at', 'id'], name='journal_note_list_idx'),
+        ),
+    ]
@@ -30,6 +30,10 @@ class Note(models.Model):
 
     class Meta:
         ordering = ["-pinned", "-updated_at"]
+        indexes = [
+            # backs the keyset-paginated notes list
+            models.Index(fields=["author", "-pinned", "-updated_at", "id"], name="journal_note_list_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.title or not self.title.strip():
@@ -103,11 +103,56 @@ document.addEventListener("DOMContentLoaded", function () {
       });
   };
 
+  // ---- Load more note cards (keyset pagination) ----
+  const loadMoreBtn = document.getElementById("load-more-btn");
+  if (loadMoreBtn) {
+    loadMoreBtn.addEventListener("click", () => {
+      const url = `${loadMoreBtn.dataset.url}?cursor=${encodeURIComponent(loadMoreBtn.dataset.cursor)}`;
+      fetch(url, {
+        headers: { "X-Requested-With": "XMLHttpRequest" }
+      })
+        .then(res => res.json())
+        .then(data => {
+          if (!data.success) {
+            console.error("Load more failed:", data.error);
+            return;
+          }
+          document.getElementById("notes-list").insertAdjacentHTML("beforeend", data.html);
+          if (data.next_cursor) {
+            loadMoreBtn.dataset.cursor = data.next_cursor;
+          } else {
+            loadMoreBtn.remove();
+          }
+        });
+    });
+  }
+
   // ---- Expand/Collapse note content smoothly ----
   window.expandNote = function (noteId, event) {
     if (event.target.tagName === "BUTTON" || event.target.tagName === "A") return;
 
     const container = document.getElementById(`note-content-${noteId}`);
+    const full = container.querySelector(".note-full");
+
+    // The rendered body is only fetched the first time a note is expanded
+    if (full.dataset.loaded !== "true") {
+      fetch(`/journal/get/${noteId}/`, {
+        headers: { "X-Requested-With": "XMLHttpRequest" }
+      })
+        .then(res => res.json())
+        .then(data => {
+          if (data.success) {
+            full.innerHTML = data.note.rendered_content;
+            full.dataset.loaded = "true";
+            toggleNote(container);
+          }
+        });
+      return;
+    }
+    toggleNote(container);
+  };
+
+  function toggleNote(container) {
     const preview = container.querySelector(".note-preview");
     const full = container.querySelector(".note-full");
 
@@ -124,7 +169,7 @@ document.addEventListener("DOMContentLoaded", function () {
       full.classList.remove("hidden");
       full.style.maxHeight = full.scrollHeight + "px";
     }
-  };
+  }
 
   // ---- Helper: Get CSRF token ----
   function getCookie(name) {
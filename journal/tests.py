@@ -1,3 +1,104 @@
+import base64
+import json
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Note, Tag
+from .views import NOTES_PAGE_SIZE
+
+User = get_user_model()
+
+AJAX = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+
+class JournalPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="writer@example.com", password="pass1234")
+        self.client.force_login(self.user)
+
+        now = timezone.now()
+        for i in range(NOTES_PAGE_SIZE * 2 + 5):
+            note = Note.objects.create(author=self.user, title=f"Note {i}", content="x" * 500, pinned=(i % 10 == 0))
+            # several notes share a timestamp to exercise the id tie-breaker
+            Note.objects.filter(pk=note.pk).update(updated_at=now - timedelta(minutes=i // 3))
+
+    def test_first_page_is_bounded(self):
+        """The home page renders one page of previews, not full bodies."""
+        response = self.client.get(reverse("journal:home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["notes"]), NOTES_PAGE_SIZE)
+        self.assertIsNotNone(response.context["next_cursor"])
+        self.assertEqual(len(response.context["notes"][0].preview), 200)
+
+    def test_cursor_walks_every_note_once_in_order(self):
+        """Following next_cursor yields the same order as the full queryset."""
+        seen = [n.id for n in self.client.get(reverse("journal:home")).context["notes"]]
+        cursor = self.client.get(reverse("journal:home")).context["next_cursor"]
+        while cursor:
+            data = self.client.get(reverse("journal:note_cards"), {"cursor": cursor}, **AJAX).json()
+            self.assertTrue(data["success"])
+            seen += [int(i) for i in re.findall(r'id="note-(\d+)"', data["html"])]
+            cursor = data["next_cursor"]
+
+        expected = list(Note.objects.filter(author=self.user).order_by("-pinned", "-updated_at", "id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_bad_cursor_rejected(self):
+        response = self.client.get(reverse("journal:note_cards"), {"cursor": "not-a-cursor"}, **AJAX)
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_cursor_rejected(self):
+        """Well-formed cursors with wrong value types are a 400, not a query error."""
+        for values in (["x", "y", 1], [True, 2, 3], [True, None, 1], [True, "2025-01-01T00:00:00+00:00", "x"],
+                       [True, "2025-01-01T00:00:00+00:00", 1 << 80], [True, {}, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+            response = self.client.get(reverse("journal:note_cards"), {"cursor": cursor}, **AJAX)
+            self.assertEqual(response.status_code, 400, values)
+
+
+class JournalQueryCountTests(TestCase):
+    """Query counts must not grow with the number of notes or tags."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="counter@example.com", password="pass1234")
+        self.client.force_login(self.user)
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def add_notes(self, count, tags_per_note):
+        for i in range(count):
+            note = Note.objects.create(author=self.user, title=f"n{i}", content="body")
+            note.tags.set([Tag.objects.get_or_create(name=f"t{i}-{j}")[0] for j in range(tags_per_note)])
+
+    def test_home_queries_constant(self):
+        self.add_notes(2, 1)
+        few = self.count_queries(lambda: self.client.get(reverse("journal:home")))
+        self.add_notes(15, 4)
+        many = self.count_queries(lambda: self.client.get(reverse("journal:home")))
+        self.assertEqual(few, many)
+
+    def save(self, tags):
+        response = self.client.post(reverse("journal:save_note"), {"title": "t", "content": "c", "tags": tags}, **AJAX)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_save_note_queries_constant(self):
+        few = self.count_queries(lambda: self.save("a"))
+        many = self.count_queries(lambda: self.save(", ".join(f"tag{i}" for i in range(12)) + ", a"))
+        self.assertEqual(few, many)
 
-# Create your tests here.
+    def test_save_note_reuses_existing_tags(self):
+        self.save("alpha, beta")
+        data = self.save("beta, gamma, beta")
+        self.assertEqual(data["note"]["tags_list"], ["beta", "gamma"])
+        self.assertEqual(sorted(Tag.objects.values_list("name", flat=True)), ["alpha", "beta", "gamma"])
@@ -5,6 +5,7 @@ app_name = "journal"
 
 urlpatterns = [
     path("", views.journal_home, name="home"),
+    path("notes/", views.note_cards, name="note_cards"),
     path("save/", views.save_note, name="save_note"),
     path("get/<int:pk>/", views.get_note, name="get_note"),
     path("delete/<int:pk>/", views.delete_note, name="delete_note"),
@@ -1,36 +1,90 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Substr
 from django.http import JsonResponse
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
+from core.pagination import InvalidCursor, keyset_page
 from .models import Note, Tag
 from .forms import NoteForm
 from django.utils.text import Truncator
 
+# Keyset order for the notes list; id makes it unique
+NOTE_ORDERING = ["-pinned", "-updated_at", "id"]
+NOTES_PAGE_SIZE = 20
+PREVIEW_CHARS = 200
+
 # ----------------------------
 # Helpers
 # ----------------------------
-def _note_to_dict(note):
-    """Serialize a note to JSON-friendly dict."""
+def _note_to_dict(note, tags=None):
+    """
+    Serialize a note to JSON-friendly dict.
+    Pass `tags` when they are already in hand to skip the tags query.
+    """
+    if tags is None:
+        tags = note.tags.all()
     return {
         "id": note.id,
         "title": note.title,
         "content": note.content,
         "rendered_content": note.rendered_html(), 
-        "tags_list": [tag.name for tag in note.tags.all()],
+        "tags_list": [tag.name for tag in tags],
         "pinned": note.pinned,
         "updated_at": note.updated_at.strftime("%b %d, %Y %H:%M"),
     }
 
 
+def _note_cards(user, cursor=None):
+    """
+    One page of lightweight note cards for the list view: only the first
+    PREVIEW_CHARS+1 characters of content are read, the rendered body is
+    fetched on expand via get_note.
+    Returns (notes, next_cursor).
+    """
+    notes = (
+        Note.objects.filter(author=user)
+        .annotate(preview_source=Substr("content", 1, PREVIEW_CHARS + 1))
+        .defer("content")
+        .prefetch_related("tags")
+    )
+    notes, next_cursor = keyset_page(notes, NOTE_ORDERING, cursor, NOTES_PAGE_SIZE)
+    for note in notes:
+        note.preview = Truncator(note.preview_source).chars(PREVIEW_CHARS)
+    return notes, next_cursor
+
+
+def _resolve_tags(names):
+    """
+    Map tag names to Tag rows with a fixed number of queries: one SELECT
+    for the existing names and one bulk_create for the missing ones.
+    """
+    if not names:
+        return []
+    found = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [Tag(name=name) for name in names if name not in found]
+    if missing:
+        try:
+            with transaction.atomic():
+                created = Tag.objects.bulk_create(missing)
+        except IntegrityError:
+            # a concurrent save created some of them first
+            Tag.objects.bulk_create(missing, ignore_conflicts=True)
+            created = []
+        if len(created) != len(missing) or any(tag.pk is None for tag in created):
+            # backend can't return ids from bulk inserts: read them back
+            created = Tag.objects.filter(name__in=[tag.name for tag in missing])
+        found.update((tag.name, tag) for tag in created)
+    return [found[name] for name in names]
+
+
 def _handle_tags(note, tags_str):
-    """Sync tags with ManyToMany field."""
-    tags = []
-    for name in tags_str.split(","):
-        name = name.strip()
-        if name:
-            tag, _ = Tag.objects.get_or_create(name=name)
-            tags.append(tag)
+    """Sync tags with ManyToMany field. Returns the note's tags."""
+    names = list(dict.fromkeys(name.strip() for name in tags_str.split(",") if name.strip()))
+    tags = _resolve_tags(names)
     note.tags.set(tags)
+    return tags
 
 
 # ----------------------------
@@ -40,20 +94,39 @@ def _handle_tags(note, tags_str):
 @login_required
 def journal_home(request):
     """
-    Render the journal main page with user's notes.
-    AJAX requests for note CRUD should go to dedicated endpoints.
+    Render the journal main page with the first page of the user's notes.
+    Further pages come from note_cards; AJAX requests for note CRUD
+    should go to dedicated endpoints.
     """
-    notes = Note.objects.filter(author=request.user).select_related("author").prefetch_related("tags")
-
-    for note in notes:
-        note.preview = Truncator(note.content).chars(200)  
+    notes, next_cursor = _note_cards(request.user)
 
     return render(request, "journal/journal.html", {
         "notes": notes,
+        "next_cursor": next_cursor,
         "form": NoteForm()
     })
 
 
+@login_required
+def note_cards(request):
+    """
+    Next page of note cards after ?cursor= (AJAX only).
+    """
+    if request.headers.get("X-Requested-With") != "XMLHttpRequest":
+        return JsonResponse({"error": "Invalid request"}, status=400)
+
+    try:
+        notes, next_cursor = _note_cards(request.user, request.GET.get("cursor"))
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+    html = "".join(
+        render_to_string("journal/_note_card.html", {"note": note}, request=request)
+        for note in notes
+    )
+    return JsonResponse({"success": True, "html": html, "next_cursor": next_cursor})
+
+
 @login_required
 @require_POST
 def save_note(request):
@@ -80,11 +153,11 @@ def save_note(request):
 
         # Handle tags safely
         tags_str = request.POST.get("tags", "").strip()
-        _handle_tags(note, tags_str)
+        tags = _handle_tags(note, tags_str)
 
         return JsonResponse({
             "success": True,
-            "note": _note_to_dict(note),
+            "note": _note_to_dict(note, tags),
             "message": "Note updated" if note_id else "Note created"
         })
 
@@ -0,0 +1,295 @@
+import math
+import re
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.utils.html import strip_tags
+
+from feeds.models import FeedItem
+
+from .models import SearchDocument, SearchPosting, SearchStats
+
+FTS_TABLE = "search_fts"
+
+# kind -> small code packed into the FTS5 rowid, so updates and deletes
+# are rowid lookups instead of scans over UNINDEXED columns
+KIND_CODES = {"feeditem": 1, "note": 2}
+CODE_BITS = 3
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERM_LENGTH = 64
+TITLE_WEIGHT = 2
+
+IndexDocument = namedtuple("IndexDocument", "kind object_id owner_id title body")
+SearchHit = namedtuple("SearchHit", "kind object_id score")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if 1 < len(t) <= MAX_TERM_LENGTH]
+
+
+def document_for(obj) -> IndexDocument:
+    """Build the index document for a FeedItem or Note."""
+    label = obj._meta.model_name
+    if label == "feeditem":
+        body = " ".join(filter(None, [strip_tags(obj.summary or ""), strip_tags(obj.full_content or "")]))
+        return IndexDocument("feeditem", obj.pk, None, obj.title or "", body)
+    if label == "note":
+        return IndexDocument("note", obj.pk, obj.author_id, obj.title or "", obj.content or "")
+    raise ValueError(f"Not searchable: {label}")
+
+
+def _rowid(kind: str, object_id: int) -> int:
+    return (object_id << CODE_BITS) | KIND_CODES[kind]
+
+
+def _visibility(kinds: Sequence[str], owner_id: Optional[int]):
+    """Feed items are public; notes only match their author."""
+    kinds = [k for k in kinds if k in KIND_CODES]
+    if owner_id is None:
+        kinds = [k for k in kinds if k != "note"]
+    return kinds
+
+
+class Fts5Backend:
+    """SQLite FTS5 virtual table, ranked with bm25()."""
+
+    name = "fts5"
+
+    def index(self, docs: Sequence[IndexDocument]):
+        if not docs:
+            return
+        with connection.cursor() as cursor:
+            rowids = [(_rowid(d.kind, d.object_id),) for d in docs]
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", rowids)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body, kind, object_id, owner_id) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [(_rowid(d.kind, d.object_id), d.title, d.body, d.kind, d.object_id, d.owner_id) for d in docs],
+            )
+
+    def remove(self, kind: str, object_ids: Iterable[int]):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+                [(_rowid(kind, object_id),) for object_id in object_ids],
+            )
+
+    def clear(self, kind: Optional[str] = None):
+        with connection.cursor() as cursor:
+            if kind:
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE kind = %s", [kind])
+            else:
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, terms, kinds, owner_id, offset, limit):
+        # every term quoted so user input can't inject FTS5 query syntax
+        match = " ".join('"%s"' % t for t in terms)
+        # deactivated feed items stay indexed but aren't shown, so they
+        # mustn't count towards the total either (one pk lookup per match)
+        items = connection.ops.quote_name(FeedItem._meta.db_table)
+        where = f"{FTS_TABLE} MATCH %s AND kind IN ({', '.join(['%s'] * len(kinds))}) " \
+                "AND (owner_id IS NULL OR owner_id = %s) " \
+                f"AND (kind != 'feeditem' OR NOT EXISTS (SELECT 1 FROM {items} " \
+                f"WHERE {items}.id = {FTS_TABLE}.object_id AND {items}.is_active = %s))"
+        params = [match, *kinds, owner_id, False]
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {where}", params)
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT kind, object_id, bm25({FTS_TABLE}, %s, 1.0) AS score FROM {FTS_TABLE} "
+                f"WHERE {where} ORDER BY score LIMIT %s OFFSET %s",
+                [float(TITLE_WEIGHT), *params, limit, offset],
+            )
+            # bm25() is lower-is-better; flip so higher scores rank first everywhere
+            hits = [SearchHit(kind, int(object_id), -score) for kind, object_id, score in cursor.fetchall()]
+        return hits, total
+
+
+class PostingsBackend:
+    """
+    Pure-Python inverted index stored in SearchDocument / SearchPosting,
+    for databases without FTS5. Matches all terms and ranks with BM25.
+    """
+
+    name = "postings"
+    k1 = 1.2
+    b = 0.75
+
+    def stats(self):
+        """(document count, summed length) for BM25, from the SearchStats row."""
+        row = SearchStats.objects.filter(pk=1).values_list("documents", "total_length").first()
+        return row if row is not None else self.recount()
+
+    def recount(self):
+        totals = SearchDocument.objects.aggregate(n=Count("id"), total=Sum("length"))
+        row = (totals["n"] or 0, totals["total"] or 0)
+        SearchStats.objects.update_or_create(pk=1, defaults={"documents": row[0], "total_length": row[1]})
+        return row
+
+    def _adjust_stats(self, documents: int, length: int):
+        if not (documents or length):
+            return
+        updated = SearchStats.objects.filter(pk=1).update(
+            documents=F("documents") + documents, total_length=F("total_length") + length,
+        )
+        if not updated:
+            self.recount()
+
+    def _term_counts(self, doc: IndexDocument) -> Counter:
+        counts = Counter(tokenize(doc.body))
+        for term in tokenize(doc.title):
+            counts[term] += TITLE_WEIGHT
+        return counts
+
+    def index(self, docs: Sequence[IndexDocument]):
+        if not docs:
+            return
+        with transaction.atomic():
+            for kind in {d.kind for d in docs}:
+                self.remove(kind, [d.object_id for d in docs if d.kind == kind])
+
+            counted = [(doc, self._term_counts(doc)) for doc in docs]
+            rows = SearchDocument.objects.bulk_create([
+                SearchDocument(kind=doc.kind, object_id=doc.object_id, owner_id=doc.owner_id,
+                               length=sum(counts.values()))
+                for doc, counts in counted
+            ])
+            if any(row.pk is None for row in rows):
+                ids = {
+                    (kind, object_id): pk for kind, object_id, pk in SearchDocument.objects.filter(
+                        object_id__in=[d.object_id for d in docs]
+                    ).values_list("kind", "object_id", "id")
+                }
+                for row in rows:
+                    row.pk = ids[(row.kind, row.object_id)]
+
+            SearchPosting.objects.bulk_create(
+                [
+                    SearchPosting(term=term, document_id=row.pk, tf=tf)
+                    for row, (_, counts) in zip(rows, counted)
+                    for term, tf in counts.items()
+                ],
+                batch_size=1000,
+            )
+            self._adjust_stats(len(rows), sum(row.length for row in rows))
+
+    def remove(self, kind: str, object_ids: Iterable[int]):
+        docs = SearchDocument.objects.filter(kind=kind, object_id__in=list(object_ids))
+        with transaction.atomic():
+            gone = docs.aggregate(n=Count("id"), total=Sum("length"))
+            docs.delete()
+            self._adjust_stats(-(gone["n"] or 0), -(gone["total"] or 0))
+
+    def clear(self, kind: Optional[str] = None):
+        docs = SearchDocument.objects.all()
+        if kind:
+            docs = docs.filter(kind=kind)
+        with transaction.atomic():
+            SearchPosting.objects.filter(document__in=docs).delete()
+            docs.delete()
+            self.recount()
+
+    def search(self, terms, kinds, owner_id, offset, limit):
+        # corpus document frequency of each term, counted in the (term, document) index
+        df = dict(
+            SearchPosting.objects.filter(term__in=terms).values("term").annotate(n=Count("id"))
+            .values_list("term", "n")
+        )
+        if len(df) < len(terms):
+            return [], 0
+
+        # documents with every term: the rarest term's postings, narrowed by
+        # each next term in the database, so common terms are only looked
+        # up for the remaining candidates
+        matched = None
+        for term in sorted(terms, key=lambda t: df[t]):
+            postings = SearchPosting.objects.filter(term=term)
+            if matched is not None:
+                postings = postings.filter(document_id__in=matched)
+            matched = postings.values("document_id")
+
+        owner = Q(document__owner_id__isnull=True)
+        if owner_id is not None:
+            owner |= Q(document__owner_id=owner_id)
+        # deactivated feed items stay indexed but aren't shown (see views._load_hits)
+        inactive = Exists(FeedItem.objects.filter(pk=OuterRef("document__object_id"), is_active=False))
+        rows = (
+            SearchPosting.objects.filter(owner, term__in=terms, document_id__in=matched, document__kind__in=kinds)
+            .exclude(inactive, document__kind="feeditem")
+            .values_list("document_id", "term", "tf", "document__length")
+        )
+        matches: Dict[int, Dict[str, int]] = {}
+        lengths: Dict[int, int] = {}
+        for doc_id, term, tf, length in rows:
+            matches.setdefault(doc_id, {})[term] = tf
+            lengths[doc_id] = length
+        if not matches:
+            return [], 0
+
+        n_docs, total_length = self.stats()
+        avg_len = total_length / n_docs if n_docs else 0
+        idf = {term: math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5)) for term in terms}
+        scores = {}
+        for doc_id, tfs in matches.items():
+            norm = self.k1 * (1 - self.b + self.b * lengths[doc_id] / (avg_len or 1))
+            scores[doc_id] = sum(idf[term] * tf * (self.k1 + 1) / (tf + norm) for term, tf in tfs.items())
+
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        page = ranked[offset:offset + limit]
+        refs = {
+            pk: (kind, object_id)
+            for pk, kind, object_id in SearchDocument.objects.filter(id__in=page).values_list("id", "kind", "object_id")
+        }
+        hits = [SearchHit(*refs[doc_id], scores[doc_id]) for doc_id in page]
+        return hits, len(ranked)
+
+
+_backend = None
+
+
+def fts5_available() -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def get_backend():
+    """
+    SEARCH_BACKEND = "fts5" | "postings" | "auto" (FTS5 when on SQLite
+    and the virtual table exists, postings otherwise).
+    """
+    global _backend
+    choice = getattr(settings, "SEARCH_BACKEND", "auto")
+    if _backend is None or (choice != "auto" and _backend.name != choice):
+        if choice == "fts5" or (choice == "auto" and fts5_available()):
+            _backend = Fts5Backend()
+        else:
+            _backend = PostingsBackend()
+    return _backend
+
+
+def index_objects(objs: Iterable):
+    """Add or refresh FeedItems / Notes in the index."""
+    get_backend().index([document_for(obj) for obj in objs])
+
+
+def remove_objects(kind: str, object_ids: Iterable[int]):
+    get_backend().remove(kind, object_ids)
+
+
+def search(query: str, user=None, kinds: Optional[Sequence[str]] = None, page: int = 1, per_page: int = 20):
+    """
+    Ranked search over feed items (public) and the user's own notes.
+    Returns (hits, total); each hit is a SearchHit, best match first.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    owner_id = user.pk if user is not None and user.is_authenticated else None
+    kinds = _visibility(kinds or list(KIND_CODES), owner_id)
+    if not terms or not kinds:
+        return [], 0
+    offset = (max(page, 1) - 1) * per_page
+    return get_backend().search(terms, kinds, owner_id, offset, per_page)
@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.index import Fts5Backend, IndexDocument, PostingsBackend, fts5_available, tokenize
+
+BACKENDS = {"fts5": Fts5Backend, "postings": PostingsBackend}
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_corpus(count, vocab_size, words_per_doc, seed):
+    """Zipf-distributed words over a fixed vocabulary, like real text."""
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(vocab_size)))
+    for object_id in range(1, count + 1):
+        words = rng.choices(vocab, cum_weights=cum_weights, k=words_per_doc)
+        yield IndexDocument("feeditem", object_id, None, " ".join(words[:8]), " ".join(words[8:]))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark indexing throughput and query latency on a synthetic corpus. "
+        "Runs inside a transaction that is rolled back, e.g. "
+        "`manage.py bench_search --docs 1000000 --backend fts5`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--docs", type=int, default=100_000)
+        parser.add_argument("--backend", choices=sorted(BACKENDS), default=None)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--vocab", type=int, default=50_000)
+        parser.add_argument("--words", type=int, default=80, help="Words per document")
+        parser.add_argument("--chunk", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        name = options["backend"] or ("fts5" if fts5_available() else "postings")
+        backend = BACKENDS[name]()
+        rng = random.Random(options["seed"])
+
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                chunk = []
+                for doc in synthetic_corpus(options["docs"], options["vocab"], options["words"], options["seed"]):
+                    chunk.append(doc)
+                    if len(chunk) >= options["chunk"]:
+                        backend.index(chunk)
+                        chunk = []
+                backend.index(chunk)
+                index_seconds = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{name}: indexed {options['docs']:,} docs in {index_seconds:.1f}s "
+                    f"({options['docs'] / index_seconds:,.0f} docs/s)"
+                )
+
+                # mix of common, mid-frequency and rare terms, 1-3 per query
+                for label, lo, hi in (("common", 0, 50), ("mid", 500, 5_000), ("rare", 10_000, options["vocab"])):
+                    timings = []
+                    for _ in range(options["queries"]):
+                        terms = tokenize(" ".join(f"w{rng.randrange(lo, hi)}" for _ in range(rng.randint(1, 3))))
+                        t0 = time.perf_counter()
+                        backend.search(terms, ["feeditem"], None, 0, 20)
+                        timings.append((time.perf_counter() - t0) * 1000)
+                    timings.sort()
+                    self.stdout.write(
+                        f"  {label:>6} queries: p50 {statistics.median(timings):.2f} ms, "
+                        f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
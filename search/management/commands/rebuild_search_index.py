@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from feeds.models import FeedItem
+from journal.models import Note
+from search.index import get_backend, index_objects
+
+SOURCES = {
+    "feeditem": lambda: FeedItem.objects.only(
+        "id", "title", "summary", "content", "externalized",
+        "payload__codec", "payload__content_data",
+    ).select_related("payload"),
+    "note": lambda: Note.objects.only("id", "title", "content", "author_id"),
+}
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for feed items and notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=sorted(SOURCES), help="Only rebuild one kind")
+        parser.add_argument("--chunk", type=int, default=1000, help="Rows indexed per transaction")
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        kinds = [options["kind"]] if options["kind"] else sorted(SOURCES)
+        self.stdout.write(f"Rebuilding search index ({backend.name}): {', '.join(kinds)}")
+
+        for kind in kinds:
+            backend.clear(kind)
+            done = 0
+            last_pk = 0
+            while True:
+                # keyset over pk so each chunk is an index range scan
+                rows = list(SOURCES[kind]().filter(pk__gt=last_pk).order_by("pk")[:options["chunk"]])
+                if not rows:
+                    break
+                with transaction.atomic():
+                    index_objects(rows)
+                last_pk = rows[-1].pk
+                done += len(rows)
+                self.stdout.write(f"  {kind}: {done} indexed", ending="\r")
+            self.stdout.write(f"  {kind}: {done} indexed")
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:00
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def count_documents(apps, schema_editor):
+    SearchDocument = apps.get_model("search", "SearchDocument")
+    SearchStats = apps.get_model("search", "SearchStats")
+    totals = SearchDocument.objects.aggregate(n=Count("id"), total=Sum("length"))
+    SearchStats.objects.create(pk=1, documents=totals["n"] or 0, total_length=totals["total"] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('documents', models.PositiveBigIntegerField(default=0)),
+                ('total_length', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_documents, migrations.RunPython.noop),
+    ]
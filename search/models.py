@@ -0,0 +1,48 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    One indexed FeedItem or Note. Only used by the pure-Python postings
+    backend; on SQLite the FTS5 table (see migrations) is used instead.
+    """
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    # notes are private to their author; feed items have no owner
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_document"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
+
+
+class SearchStats(models.Model):
+    """
+    Corpus totals for BM25 (document count, summed length), kept up to
+    date by the postings backend as it writes, so a search doesn't have
+    to aggregate SearchDocument. A single row (pk=1).
+    """
+    documents = models.PositiveBigIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.documents} documents, {self.total_length} terms"
+
+
+class SearchPosting(models.Model):
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name="postings")
+    tf = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["term", "document"]),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.document_id}"
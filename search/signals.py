@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from feeds.models import FeedItem
+from feeds.signals import in_bulk_delete, items_ingested
+from journal.models import Note
+
+from .index import index_objects, remove_objects
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=FeedItem)
+def index_saved(sender, instance, **kwargs):
+    index_objects([instance])
+
+
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=FeedItem)
+def unindex_deleted(sender, instance, **kwargs):
+    if sender is FeedItem and in_bulk_delete():
+        return
+    remove_objects(sender._meta.model_name, [instance.pk])
+
+
+@receiver(items_ingested)
+def index_ingested(sender, items, **kwargs):
+    # bulk-created feed items never fire post_save
+    index_objects(items)
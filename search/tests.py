@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from feeds.models import FeedSource, FeedItem
+from feeds.services import save_items
+from journal.models import Note
+
+from . import index
+from .index import search
+from .models import SearchDocument
+
+User = get_user_model()
+
+
+class SearchTestsMixin:
+    def setUp(self):
+        index._backend = None
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass1234")
+        self.other = User.objects.create_user(email="other@example.com", password="pass1234")
+        self.source = FeedSource.objects.create(
+            name="News", slug="news", api_type=FeedSource.ApiType.RSS, endpoint="https://example.com/rss",
+        )
+
+    def tearDown(self):
+        index._backend = None
+
+    def ids(self, query, **kwargs):
+        hits, total = search(query, **kwargs)
+        return [(hit.kind, hit.object_id) for hit in hits]
+
+    def test_saved_objects_are_searchable_and_ranked(self):
+        weak = FeedItem.objects.create(source=self.source, external_id="1", title="Weather",
+                                       content="<p>some <b>python</b> mention</p>")
+        strong = FeedItem.objects.create(source=self.source, external_id="2", title="Python release",
+                                         summary="python python")
+        FeedItem.objects.create(source=self.source, external_id="3", title="Unrelated")
+
+        self.assertEqual(self.ids("Python"), [("feeditem", strong.pk), ("feeditem", weak.pk)])
+        self.assertEqual(self.ids("python weather"), [("feeditem", weak.pk)])
+        self.assertEqual(self.ids("b"), [])  # tags were stripped, single letters dropped
+
+    def test_updates_and_deletes_are_incremental(self):
+        note = Note.objects.create(author=self.owner, title="Draft", content="alpha")
+        self.assertEqual(self.ids("alpha", user=self.owner), [("note", note.pk)])
+
+        note.content = "beta"
+        note.save()
+        self.assertEqual(self.ids("alpha", user=self.owner), [])
+        self.assertEqual(self.ids("beta", user=self.owner), [("note", note.pk)])
+
+        note.delete()
+        self.assertEqual(self.ids("beta", user=self.owner), [])
+
+    def test_notes_only_visible_to_author(self):
+        Note.objects.create(author=self.owner, title="Secret", content="gamma")
+        self.assertEqual(len(self.ids("gamma", user=self.owner)), 1)
+        self.assertEqual(self.ids("gamma", user=self.other), [])
+        self.assertEqual(self.ids("gamma"), [])
+
+    def test_bulk_ingested_items_are_indexed(self):
+        items = [{"external_id": f"b{i}", "title": f"Delta {i}", "summary": "ingested"} for i in range(30)]
+        save_items(self.source, items)
+        self.assertEqual(search("ingested delta")[1], 30)
+        self.assertEqual(len(self.ids("ingested", page=2, per_page=20)), 10)
+
+    def test_inactive_items_are_not_counted(self):
+        items = [{"external_id": f"h{i}", "title": f"Kappa {i}", "summary": "hidden lambda"} for i in range(5)]
+        save_items(self.source, items)
+        FeedItem.objects.filter(external_id__in=["h0", "h1"]).update(is_active=False)
+        Note.objects.create(author=self.owner, title="Kappa note", content="lambda")
+
+        hits, total = search("kappa lambda", user=self.owner)
+        self.assertEqual(total, 4)
+        self.assertEqual(len(hits), 4)
+        self.assertEqual(search("hidden kappa")[1], 3)
+
+    def test_query_syntax_is_not_interpreted(self):
+        FeedItem.objects.create(source=self.source, external_id="q", title="Quote test")
+        self.assertEqual(len(self.ids('quote" OR "x')), 0)
+        self.assertEqual(len(self.ids("quote*")), 1)
+
+    def test_search_view(self):
+        FeedItem.objects.create(source=self.source, external_id="v", title="Epsilon news")
+        response = self.client.get(reverse("search:search"), {"q": "epsilon"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Epsilon news")
+        self.assertEqual(response.context["total"], 1)
+
+
+@override_settings(SEARCH_BACKEND="fts5")
+class Fts5SearchTests(SearchTestsMixin, TestCase):
+    pass
+
+
+@override_settings(SEARCH_BACKEND="postings")
+class PostingsSearchTests(SearchTestsMixin, TestCase):
+    def test_corpus_stats_follow_index_writes(self):
+        """BM25 totals are kept in SearchStats rather than aggregated per search."""
+        backend = index.get_backend()
+        note = Note.objects.create(author=self.owner, title="Stats", content="zeta eta")
+        FeedItem.objects.create(source=self.source, external_id="s", title="Zeta")
+        expected = SearchDocument.objects.aggregate(n=Count("id"), total=Sum("length"))
+        self.assertEqual(backend.stats(), (expected["n"], expected["total"]))
+        self.assertEqual(expected["n"], 2)
+
+        note.content = "zeta eta theta iota"
+        note.save()
+        note.delete()
+        length = SearchDocument.objects.get().length
+        self.assertEqual(backend.stats(), (1, length))
+
+        with self.assertNumQueries(4):  # term counts, matching postings, stats, refs
+            self.assertEqual(len(self.ids("zeta")), 1)
+        backend.clear()
+        self.assertEqual(backend.stats(), (0, 0))
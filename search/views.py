@@ -0,0 +1,56 @@
+from django.shortcuts import render
+
+from feeds.models import FeedItem
+from journal.models import Note
+
+from .index import search
+
+RESULTS_PER_PAGE = 20
+
+
+def _load_hits(hits, user):
+    """Resolve SearchHits to objects, keeping rank order and dropping stale hits."""
+    ids = {"feeditem": [], "note": []}
+    for hit in hits:
+        ids[hit.kind].append(hit.object_id)
+
+    objects = {}
+    if ids["feeditem"]:
+        for item in (FeedItem.objects.filter(pk__in=ids["feeditem"], is_active=True)
+                     .select_related("source").defer("raw", "content")):
+            objects[("feeditem", item.pk)] = item
+    if ids["note"] and user.is_authenticated:
+        for note in Note.objects.filter(pk__in=ids["note"], author=user):
+            objects[("note", note.pk)] = note
+
+    return [
+        {"kind": hit.kind, "object": objects[(hit.kind, hit.object_id)], "score": hit.score}
+        for hit in hits
+        if (hit.kind, hit.object_id) in objects
+    ]
+
+
+def search_view(request):
+    """
+    Ranked full-text search over feed items and the user's own notes.
+    ?q=terms&kind=feeditem|note&page=N
+    """
+    query = request.GET.get("q", "").strip()
+    kind = request.GET.get("kind") or None
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    hits, total = search(query, user=request.user, kinds=[kind] if kind else None,
+                         page=page, per_page=RESULTS_PER_PAGE)
+
+    return render(request, "search/results.html", {
+        "query": query,
+        "kind": kind,
+        "results": _load_hits(hits, request.user),
+        "total": total,
+        "page": page,
+        "has_previous": page > 1,
+        "has_next": page * RESULTS_PER_PAGE < total,
+    })